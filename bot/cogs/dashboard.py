@@ -1,11 +1,12 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import aiohttp
 import logging
 
-from settings import DASHBOARD_PUBLIC_URL, NODE_RED_ENDPOINT
+from settings import DASHBOARD_PUBLIC_URL
 from src.services.cveService import fetch_nvd_metrics
+from utils.http import http_client
+from core.nodered_outbox import nodered_outbox
 
 log = logging.getLogger("CyberIntel")
 
@@ -23,7 +24,7 @@ class Dashboard(commands.Cog):
     async def check_nodered_health(self):
         """Verifica se o container do Node-RED está respondendo"""
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_client.new_session("nodered") as session:
                 async with session.get(self.nodered_internal_url, timeout=2) as resp:
                     return resp.status == 200
         except Exception as e:
@@ -55,18 +56,13 @@ class Dashboard(commands.Cog):
                 )
                 embed_metrics_value = metrics_text
                 # Envia métricas ao Node-RED para o gauge (se o flow usar msg.payload.critical_count)
-                try:
-                    payload = {
-                        "critical_count": nvd_metrics.get("critical_count", 0),
-                        "high_count": nvd_metrics.get("high_count", 0),
-                        "total": nvd_metrics.get("total", 0),
-                        "source": "NVD",
-                        "period": "24h",
-                    }
-                    async with aiohttp.ClientSession() as session:
-                        await session.post(NODE_RED_ENDPOINT, json=payload, timeout=3)
-                except Exception as post_err:
-                    log.debug(f"Post métricas ao Node-RED (opcional): {post_err}")
+                nodered_outbox.push({
+                    "critical_count": nvd_metrics.get("critical_count", 0),
+                    "high_count": nvd_metrics.get("high_count", 0),
+                    "total": nvd_metrics.get("total", 0),
+                    "source": "NVD",
+                    "period": "24h",
+                })
             else:
                 embed_metrics_value = "⚠️ API NVD indisponível ou sem chave (rate limit)."
 
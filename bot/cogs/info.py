@@ -6,14 +6,22 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import logging
+from collections import deque
 
 from core.stats import stats
 from core.scanner import load_sources
 from utils.storage import p, load_json_safe, save_json_safe
+from utils.persistence import persistence
 
 log = logging.getLogger("CyberIntel")
 
 
+def _read_tail(path: str, lines: int) -> list:
+    """Últimas `lines` linhas do arquivo (sem carregar o arquivo inteiro numa lista)."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return list(deque(f, maxlen=lines))
+
+
 class InfoCog(commands.Cog):
     """Cog com comandos informativos."""
     
@@ -73,7 +81,7 @@ class InfoCog(commands.Cog):
     @app_commands.command(name="feeds", description="Lista todos os feeds monitorados.")
     async def feeds(self, interaction: discord.Interaction):
         try:
-            urls = load_sources()
+            urls = await persistence.run(load_sources)
             total = len(urls)
             
             if total == 0:
@@ -124,8 +132,8 @@ class InfoCog(commands.Cog):
                 return
 
             try:
-                with open(log_path, "r", encoding="utf-8", errors="ignore") as f:
-                    all_lines = f.readlines()
+                # Leitura fora do event loop; mantém só as últimas N linhas em memória
+                all_lines = await persistence.run(_read_tail, log_path, lines)
             except Exception as read_err:
                 log.exception(f"❌ Erro ao ler arquivo de log: {read_err}")
                 await interaction.followup.send("❌ Não foi possível ler o arquivo de log.", ephemeral=True)
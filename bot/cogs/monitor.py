@@ -4,6 +4,7 @@ import logging
 import os
 from src.services.newsService import get_latest_security_news
 from src.services.dbService import is_news_sent, mark_news_as_sent
+from utils.persistence import persistence
 from src.services.threatService import ThreatService
 from core.scanner import run_scan_once
 from discord import app_commands
@@ -110,7 +111,7 @@ class Monitor(commands.Cog):
             
             for item in news_items:
                 # Se o link NÃO estiver no banco, é novo!
-                if not is_news_sent(item['link']):
+                if not await persistence.run(is_news_sent, item['link']):
                     embed = discord.Embed(
                         title=f"🚨 NOVO ALERTA: {item['title']}",
                         url=item['link'],
@@ -123,7 +124,7 @@ class Monitor(commands.Cog):
                     await channel.send(embed=embed)
                     
                     # Salva no banco para não repetir
-                    mark_news_as_sent(item['link'], item['title'])
+                    await persistence.run(mark_news_as_sent, item['link'], item['title'])
                     
         except Exception as e:
             log.exception(f"❌ Erro no loop de monitoramento: {e}")
@@ -1,9 +1,9 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
 import logging
-from utils.storage import p, load_json_safe, save_json_safe
+from utils.config import config_service
+from utils.persistence import persistence
 
 log = logging.getLogger("CyberIntel")
 
@@ -28,22 +28,16 @@ class Setup(commands.Cog):
         await interaction.response.defer(ephemeral=True)
         
         try:
-            config_path = p("config.json")
-            config_data = load_json_safe(config_path, {})
-            
-            guild_id_str = str(interaction.guild_id)
-            
-            # Preserva configs existentes ou cria nova
-            if guild_id_str not in config_data:
-                config_data[guild_id_str] = {
+            # Preserva configs existentes ou cria nova; salva para persistência (atômico)
+            await persistence.run(
+                config_service.update_guild,
+                interaction.guild_id,
+                defaults={
                     "filters": ["security", "cyber", "hacker", "breach"], # Default filters
                     "language": "pt_BR" 
-                }
-                
-            config_data[guild_id_str]["channel_id"] = interaction.channel_id
-
-            # Salva a configuração para persistência
-            save_json_safe(config_path, config_data, atomic=True)
+                },
+                channel_id=interaction.channel_id,
+            )
             
             embed = discord.Embed(
                 title="🛡️ Canal Configurado",
@@ -72,10 +66,7 @@ class Setup(commands.Cog):
             embed = discord.Embed(title="📊 CyberIntel System Status", color=0x00FFCC)
             
             # 1. Canal Configurado
-            config_data = load_json_safe(p("config.json"), {})
-            guild_id_str = str(interaction.guild_id) if interaction.guild_id else "0"
-            guild_data = config_data.get(guild_id_str, {})
-            channel_id = guild_data.get("channel_id")
+            channel_id = config_service.channel_id(interaction.guild_id or 0)
             
             if channel_id:
                 channel = self.bot.get_channel(channel_id)
@@ -8,7 +8,9 @@ from datetime import datetime, timedelta
 import logging
 
 from core.stats import stats
-from settings import LOOP_MINUTES
+from core.delivery import delivery
+from core.source_health import source_health
+from settings import SCAN_TICK_MINUTES
 
 log = logging.getLogger("CyberIntel")
 
@@ -53,7 +55,7 @@ class StatusCog(commands.Cog):
             await interaction.response.defer(ephemeral=True) # Fix timeout
             
             # Calcula próxima varredura
-            next_scan = datetime.now() + timedelta(minutes=LOOP_MINUTES)
+            next_scan = datetime.now() + timedelta(minutes=SCAN_TICK_MINUTES)
             next_scan_ts = int(next_scan.timestamp())
             
             embed = discord.Embed(
@@ -82,7 +84,26 @@ class StatusCog(commands.Cog):
             
             embed.add_field(
                 name="📦 Cache Hits Total",
-                value=f"{stats.cache_hits_total}",
+                value=f"{stats.cache_hits_total} (304: {stats.not_modified_total} • corpo igual: {stats.body_hash_hits_total})",
+                inline=True
+            )
+            
+            embed.add_field(
+                name="📬 Fila de Envio",
+                value=(
+                    f"{delivery.total_depth()} pendente(s) • {stats.messages_delivered} entregue(s)\n"
+                    f"{stats.delivery_retries} retry • {stats.delivery_failures} falha(s)"
+                ),
+                inline=True
+            )
+            
+            health = source_health.summary()
+            embed.add_field(
+                name="🩺 Saúde das Fontes",
+                value=(
+                    f"{health['open']} em quarentena • {health['half_open']} em teste\n"
+                    f"{health['degraded']} com falhas recentes"
+                ),
                 inline=True
             )
             
@@ -103,7 +124,7 @@ class StatusCog(commands.Cog):
                 inline=True
             )
             
-            embed.set_footer(text=f"NetRunner v1.0 | Intervalo: {LOOP_MINUTES} min")
+            embed.set_footer(text=f"NetRunner v1.0 | Intervalo: {SCAN_TICK_MINUTES} min")
             
             # Adiciona o botão de scan
             view = ScanButton(self.run_scan_once)
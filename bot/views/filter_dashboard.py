@@ -2,11 +2,12 @@
 FilterDashboard view - Interactive button panel for filter configuration.
 """
 import discord
-from typing import Dict, Any, List
+from typing import List
 import logging
 
 from core.filters import FILTER_OPTIONS
-from utils.storage import p, load_json_safe, save_json_safe
+from utils.config import config_service
+from utils.persistence import persistence
 
 log = logging.getLogger("MaftyIntel")
 
@@ -22,31 +23,15 @@ class FilterDashboard(discord.ui.View):
         self.guild_id = str(guild_id)
         self._rebuild()
     
-    def _cfg(self) -> Dict[str, Any]:
-        """Carrega config.json e garante estrutura mínima por guild."""
-        cfg = load_json_safe(p("config.json"), {})
-        if not isinstance(cfg, dict):
-            log.error("config.json inválido. Recriando.")
-            cfg = {}
-        
-        cfg.setdefault(self.guild_id, {"filters": [], "channel_id": None})
-        
-        if not isinstance(cfg[self.guild_id].get("filters"), list):
-            cfg[self.guild_id]["filters"] = []
-        
-        return cfg
-    
-    def _save(self, cfg: Dict[str, Any]) -> None:
-        save_json_safe(p("config.json"), cfg)
-    
     def _filters(self) -> List[str]:
-        cfg = self._cfg()
-        return list(cfg[self.guild_id].get("filters", []))
+        return list(config_service.filters(self.guild_id))
     
     def _set_filters(self, new_filters: List[str]) -> None:
-        cfg = self._cfg()
-        cfg[self.guild_id]["filters"] = list(dict.fromkeys(new_filters))
-        self._save(cfg)
+        config_service.update_guild(
+            self.guild_id,
+            defaults={"filters": [], "channel_id": None},
+            filters=list(dict.fromkeys(new_filters)),
+        )
     
     def _is_admin(self, interaction: discord.Interaction) -> bool:
         """Somente admin altera filtros."""
@@ -57,13 +42,14 @@ class FilterDashboard(discord.ui.View):
     
     
     def _get_lang(self) -> str:
-        cfg = self._cfg()
-        return cfg[self.guild_id].get("language", "en_US")
+        return config_service.language(self.guild_id) or "en_US"
 
     def _set_lang(self, lang_code: str) -> None:
-        cfg = self._cfg()
-        cfg[self.guild_id]["language"] = lang_code
-        self._save(cfg)
+        config_service.update_guild(
+            self.guild_id,
+            defaults={"filters": [], "channel_id": None},
+            language=lang_code,
+        )
 
     def _rebuild(self) -> None:
         """Reconstrói botões conforme filtros ativos."""
@@ -189,7 +175,7 @@ class FilterDashboard(discord.ui.View):
                     current.append(category)
                     msg = f"➕ **{category.capitalize()}** adicionado."
         
-        self._set_filters(current)
+        await persistence.run(self._set_filters, current)
         self._rebuild()
         
         await interaction.response.edit_message(view=self)
@@ -204,7 +190,7 @@ class FilterDashboard(discord.ui.View):
         parts = interaction.data.get("custom_id", "").split(":")
         lang_code = parts[3]
         
-        self._set_lang(lang_code)
+        await persistence.run(self._set_lang, lang_code)
         self._rebuild()
         
         flags = {"en_US": "🇺🇸", "pt_BR": "🇧🇷", "es_ES": "🇪🇸", "it_IT": "🇮🇹", "ja_JP": "🇯🇵"}
@@ -236,7 +222,7 @@ class FilterDashboard(discord.ui.View):
             )
             return
         
-        self._set_filters([])
+        await persistence.run(self._set_filters, [])
         self._rebuild()
         
         await interaction.response.edit_message(view=self)
@@ -0,0 +1,228 @@
+"""
+Delivery module - Fila de envio para o Discord desacoplada da varredura.
+
+O scanner apenas enfileira mensagens renderizadas; workers por canal drenam
+as filas respeitando o bucket de rate-limit da rota POST /channels/{id}/messages
+(que no Discord é por canal), com retry e backoff exponencial.
+
+Cada mensagem pode levar um callback `on_result(ok)`, chamado uma única vez
+quando o Discord aceita a mensagem (True) ou quando ela é descartada de vez
+(False: tentativas esgotadas, 4xx, encerramento). O scanner só marca o link
+como visto a partir dele.
+"""
+import asyncio
+import logging
+import random
+from typing import Any, Callable, Dict, Optional
+
+import aiohttp
+import discord
+
+from core.stats import stats
+
+log = logging.getLogger("CyberIntel")
+
+# Intervalo mínimo entre mensagens no mesmo canal (substitui o antigo sleep(1) inline)
+CHANNEL_MIN_INTERVAL = 1.0
+# Tamanho máximo da fila por canal (protege a memória em caso de flood)
+CHANNEL_QUEUE_MAX = 200
+DELIVERY_MAX_RETRIES = 4
+DELIVERY_BACKOFF_BASE = 2.0
+DELIVERY_BACKOFF_MAX = 60.0
+# Tempo máximo (s) para drenar as filas no encerramento
+DELIVERY_CLOSE_TIMEOUT = 10.0
+
+
+class OutboundMessage:
+    """Mensagem pronta para envio (content/embed/view já renderizados)."""
+
+    __slots__ = ("channel", "content", "embed", "view", "attempts", "on_result")
+
+    def __init__(self, channel: Any, content: Optional[str] = None,
+                 embed: Optional[discord.Embed] = None, view: Optional[discord.ui.View] = None,
+                 on_result: Optional[Callable[[bool], Any]] = None):
+        self.channel = channel
+        self.content = content
+        self.embed = embed
+        self.view = view
+        self.attempts = 0
+        self.on_result = on_result
+
+    def resolve(self, delivered: bool) -> None:
+        """Informa o resultado final ao chamador (no máximo uma vez)."""
+        callback, self.on_result = self.on_result, None
+        if callback is None:
+            return
+        try:
+            callback(delivered)
+        except Exception as e:
+            log.exception(f"❌ Erro no callback de entrega: {e}")
+
+    def send_kwargs(self) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {}
+        if self.content is not None:
+            kwargs["content"] = self.content
+        if self.embed is not None:
+            kwargs["embed"] = self.embed
+        if self.view is not None:
+            kwargs["view"] = self.view
+        return kwargs
+
+
+class DeliveryQueue:
+    """
+    Filas de envio por canal com um worker assíncrono por canal.
+
+    - `enqueue` nunca bloqueia a varredura (put_nowait).
+    - Cada worker envia em ordem, espaçando CHANNEL_MIN_INTERVAL entre mensagens.
+    - 429 respeita o Retry-After; 5xx/erros de rede usam backoff exponencial com jitter.
+    - 403/404 descartam a mensagem (canal sem permissão ou removido).
+    - Workers terminam quando a fila esvazia e são recriados sob demanda.
+    """
+
+    def __init__(self, min_interval: float = CHANNEL_MIN_INTERVAL, max_queue: int = CHANNEL_QUEUE_MAX,
+                 max_retries: int = DELIVERY_MAX_RETRIES):
+        self.min_interval = min_interval
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self._queues: Dict[int, asyncio.Queue] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+
+    # -----------------------------------------------------
+    # API pública
+    # -----------------------------------------------------
+
+    def enqueue(self, channel: Any, content: Optional[str] = None,
+                embed: Optional[discord.Embed] = None, view: Optional[discord.ui.View] = None,
+                on_result: Optional[Callable[[bool], Any]] = None) -> bool:
+        """
+        Enfileira uma mensagem para o canal. Retorna False se a fila do canal estiver cheia
+        (nesse caso `on_result` não é chamado).
+        """
+        channel_id = channel.id
+        queue = self._queues.get(channel_id)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self.max_queue)
+            self._queues[channel_id] = queue
+
+        try:
+            queue.put_nowait(OutboundMessage(channel, content=content, embed=embed, view=view, on_result=on_result))
+        except asyncio.QueueFull:
+            stats.delivery_dropped += 1
+            log.warning(f"📪 Fila de envio cheia para o canal {channel_id} ({self.max_queue}). Mensagem descartada.")
+            return False
+
+        worker = self._workers.get(channel_id)
+        if worker is None or worker.done():
+            self._workers[channel_id] = asyncio.create_task(self._worker(channel_id, queue))
+        return True
+
+    def depth(self) -> Dict[int, int]:
+        """Profundidade atual por canal (apenas canais com mensagens pendentes)."""
+        return {cid: q.qsize() for cid, q in self._queues.items() if q.qsize()}
+
+    def total_depth(self) -> int:
+        """Total de mensagens aguardando envio em todos os canais."""
+        return sum(q.qsize() for q in self._queues.values())
+
+    async def join(self) -> None:
+        """Aguarda até que todas as filas atuais sejam drenadas."""
+        for queue in list(self._queues.values()):
+            await queue.join()
+
+    async def close(self, timeout: float = DELIVERY_CLOSE_TIMEOUT) -> int:
+        """
+        Tenta drenar as filas por até `timeout` segundos; depois cancela os workers.
+        O que não saiu é reportado como não entregue (on_result(False)), para o
+        chamador não marcar o link como visto. Retorna quantas mensagens sobraram.
+        """
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            log.warning(f"⏱️ Encerramento: {self.total_depth()} mensagem(ns) ainda na fila de envio.")
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+
+        leftover = 0
+        for queue in self._queues.values():
+            while not queue.empty():
+                queue.get_nowait().resolve(False)
+                queue.task_done()
+                leftover += 1
+        return leftover
+
+    # -----------------------------------------------------
+    # Worker
+    # -----------------------------------------------------
+
+    async def _worker(self, channel_id: int, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        last_sent = 0.0
+        while not queue.empty():
+            msg = queue.get_nowait()
+            delivered = False
+            try:
+                wait = self.min_interval - (loop.time() - last_sent)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                delivered = await self._send_with_retry(channel_id, msg)
+                last_sent = loop.time()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"❌ Erro inesperado no worker de envio do canal {channel_id}: {e}")
+            finally:
+                msg.resolve(delivered)
+                queue.task_done()
+
+    async def _send_with_retry(self, channel_id: int, msg: OutboundMessage) -> bool:
+        """Envia com retry. True se o Discord aceitou a mensagem."""
+        while True:
+            msg.attempts += 1
+            try:
+                await msg.channel.send(**msg.send_kwargs())
+                stats.messages_delivered += 1
+                return True
+            except (discord.Forbidden, discord.NotFound) as e:
+                stats.delivery_failures += 1
+                log.warning(f"🚫 Envio descartado no canal {channel_id} ({e.status}): {e.text[:100]}")
+                return False
+            except discord.HTTPException as e:
+                if e.status != 429 and e.status < 500:
+                    stats.delivery_failures += 1
+                    log.error(f"❌ Discord rejeitou mensagem no canal {channel_id} ({e.status}): {e.text[:200]}")
+                    return False
+                delay = self._retry_after(e) if e.status == 429 else None
+                if not await self._backoff(channel_id, msg, delay, e):
+                    return False
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                if not await self._backoff(channel_id, msg, None, e):
+                    return False
+
+    async def _backoff(self, channel_id: int, msg: OutboundMessage, delay: Optional[float], error: Exception) -> bool:
+        """Aguarda antes de nova tentativa. Retorna False quando as tentativas acabaram."""
+        if msg.attempts > self.max_retries:
+            stats.delivery_failures += 1
+            log.error(f"❌ Falha ao enviar no canal {channel_id} após {msg.attempts} tentativas: {error}")
+            return False
+        if delay is None:
+            delay = min(DELIVERY_BACKOFF_MAX, DELIVERY_BACKOFF_BASE ** msg.attempts)
+            delay += random.uniform(0, delay / 2)
+        stats.delivery_retries += 1
+        log.warning(f"🔁 Reenvio no canal {channel_id} em {delay:.1f}s (tentativa {msg.attempts}): {error}")
+        await asyncio.sleep(delay)
+        return True
+
+    @staticmethod
+    def _retry_after(error: discord.HTTPException) -> Optional[float]:
+        try:
+            value = error.response.headers.get("Retry-After")
+            return float(value) if value is not None else None
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+
+# Instância global
+delivery = DeliveryQueue()
@@ -0,0 +1,176 @@
+"""
+Feed schedule - Intervalo de polling aprendido por feed.
+
+Antes, toda varredura (a cada LOOP_MINUTES) baixava todas as fontes, tanto o
+blog que publica uma vez por semana quanto o The Hacker News, que publica de
+hora em hora. Aqui cada feed tem seu próprio intervalo e próximo horário
+(persistidos em state["feed_schedule"]), e a varredura do loop só busca os
+feeds vencidos:
+
+- a cadência de publicação é estimada pelas datas das entradas (mediana dos
+  intervalos, suavizada por EWMA); o alvo é metade dessa cadência;
+- respostas sem novidade (304 ou só itens já vistos) aumentam o intervalo aos poucos;
+- entrada nova faz o intervalo voltar ao alvo imediatamente;
+- prioridade da fonte (sources.json) encurta ou alonga o intervalo;
+- tudo limitado a [FEED_POLL_MIN_MINUTES, FEED_POLL_MAX_MINUTES].
+
+Chaves que não são feeds (ex: "api://nvd", "html://official") usam intervalo
+fixo via `due()`/`touch()`.
+"""
+import statistics
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from settings import LOOP_MINUTES, FEED_POLL_MIN_MINUTES, FEED_POLL_MAX_MINUTES
+
+# Multiplicador do intervalo por prioridade da fonte (sources.json)
+PRIORITY_FACTORS: Dict[str, float] = {
+    "critical": 0.5,
+    "high": 0.75,
+    "medium": 1.0,
+    "low": 1.5,
+}
+# Crescimento do intervalo quando o feed não trouxe nada novo
+IDLE_BACKOFF = 1.5
+# Peso da nova medição na média móvel da cadência
+CADENCE_ALPHA = 0.3
+# Prefixos das chaves de intervalo fixo (não são podadas junto com os feeds)
+FIXED_PREFIXES = ("api://", "html://")
+# Quantas datas de entrada (mais recentes) entram na estimativa de cadência
+CADENCE_SAMPLE = 20
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return min(max(value, low), high)
+
+
+class FeedSchedule:
+    """
+    Agenda de polling por feed (dict serializável em state["feed_schedule"]).
+
+    Cada entrada: {"interval": s, "next_due": ts, "cadence": s|None, "last_entry": ts|None}.
+    """
+
+    def __init__(self, data: Optional[Dict[str, Dict[str, Any]]] = None,
+                 min_interval: float = FEED_POLL_MIN_MINUTES * 60,
+                 max_interval: float = FEED_POLL_MAX_MINUTES * 60,
+                 default_interval: float = LOOP_MINUTES * 60):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.default_interval = _clamp(default_interval, self.min_interval, self.max_interval)
+        self._feeds: Dict[str, Dict[str, Any]] = {}
+        for url, entry in (data or {}).items():
+            if isinstance(url, str) and isinstance(entry, dict):
+                self._feeds[url] = dict(entry)
+
+    @classmethod
+    def from_state(cls, raw: Any, **kwargs: Any) -> "FeedSchedule":
+        return cls(raw if isinstance(raw, dict) else None, **kwargs)
+
+    def to_state(self) -> Dict[str, Dict[str, Any]]:
+        return {url: dict(entry) for url, entry in self._feeds.items()}
+
+    # -----------------------------------------------------
+    # Consulta
+    # -----------------------------------------------------
+
+    def due(self, keys: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """Chaves cujo próximo horário já passou (ou nunca foram buscadas), na ordem recebida."""
+        now = time.time() if now is None else now
+        return [k for k in keys if self._feeds.get(k, {}).get("next_due", 0) <= now]
+
+    def interval(self, key: str) -> float:
+        return self._feeds.get(key, {}).get("interval", self.default_interval)
+
+    def last_entry(self, key: str) -> Optional[float]:
+        """Data (epoch) da entrada mais nova já vista no feed (None se desconhecida)."""
+        return self._feeds.get(key, {}).get("last_entry")
+
+    def next_due(self, keys: Optional[Iterable[str]] = None) -> Optional[float]:
+        """Menor próximo horário entre as chaves (None se alguma nunca foi buscada)."""
+        keys = self._feeds.keys() if keys is None else keys
+        times = []
+        for k in keys:
+            entry = self._feeds.get(k)
+            if entry is None:
+                return None
+            times.append(entry.get("next_due", 0))
+        return min(times) if times else None
+
+    # -----------------------------------------------------
+    # Atualização
+    # -----------------------------------------------------
+
+    def touch(self, key: str, interval: float, now: Optional[float] = None) -> None:
+        """Agenda uma chave de intervalo fixo (APIs, monitor HTML)."""
+        now = time.time() if now is None else now
+        self._feeds[key] = {"interval": interval, "next_due": now + interval}
+
+    def record(self, url: str, entry_times: Optional[Iterable[float]] = None, not_modified: bool = False,
+               failed: bool = False, priority: Optional[str] = None, now: Optional[float] = None) -> float:
+        """
+        Registra o resultado de um poll e agenda o próximo.
+
+        Args:
+            url: URL do feed
+            entry_times: Datas (epoch) das entradas recebidas
+            not_modified: Servidor respondeu 304
+            failed: Erro/timeout (mantém o intervalo)
+            priority: Prioridade da fonte em sources.json (Critical/High/Medium/Low)
+
+        Returns:
+            Intervalo (s) até o próximo poll.
+        """
+        now = time.time() if now is None else now
+        entry = self._feeds.setdefault(url, {"interval": self.default_interval})
+        factor = PRIORITY_FACTORS.get(str(priority or "").lower(), 1.0)
+        upper = _clamp(self.max_interval * factor, self.min_interval, self.max_interval)
+        interval = entry.get("interval", self.default_interval)
+
+        if not failed:
+            fresh = False if not_modified else self._learn(entry, entry_times or (), now)
+            if fresh is None:
+                pass  # entradas sem data: sem base para ajustar, mantém o intervalo
+            elif fresh:
+                cadence = entry.get("cadence")
+                newest = entry.get("last_entry") or now
+                # Feed parado há muito tempo pesa mais do que a cadência histórica
+                gap = max(cadence, (now - newest) / 2) if cadence else self.default_interval * 2
+                interval = gap / 2 * factor
+            else:
+                interval = interval * IDLE_BACKOFF
+
+        interval = _clamp(interval, self.min_interval, upper)
+        entry["interval"] = round(interval, 1)
+        entry["next_due"] = round(now + interval, 1)
+        return interval
+
+    def _learn(self, entry: Dict[str, Any], entry_times: Iterable[float], now: float) -> Optional[bool]:
+        """
+        Atualiza cadência/última entrada.
+        Retorna True se havia entrada mais nova que a última vista, None se nenhuma entrada tinha data.
+        """
+        times = sorted({t for t in entry_times if t and t <= now + 3600})[-CADENCE_SAMPLE:]
+        if not times:
+            return None
+        last = entry.get("last_entry")
+        fresh = last is None or times[-1] > last
+
+        gaps = [b - a for a, b in zip(times, times[1:]) if b > a]
+        if last is not None and times[0] > last:
+            # Parse incremental devolve só as entradas novas: mede a distância até a última vista
+            gaps.append(times[0] - last)
+        if gaps:
+            sample = statistics.median(gaps)
+            old = entry.get("cadence")
+            entry["cadence"] = round(sample if old is None else old + CADENCE_ALPHA * (sample - old), 1)
+        entry["last_entry"] = max(times[-1], last or 0)
+        return fresh
+
+    def prune(self, keep: Iterable[str]) -> int:
+        """Remove feeds que saíram do sources.json; retorna quantos foram removidos."""
+        keep = set(keep)
+        stale = [k for k in self._feeds if k not in keep and not k.startswith(FIXED_PREFIXES)]
+        for k in stale:
+            del self._feeds[k]
+        return len(stale)
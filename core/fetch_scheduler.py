@@ -0,0 +1,287 @@
+"""
+Fetch scheduler - Concorrência adaptativa e polidez por host no download de feeds.
+
+Antes, a varredura usava um único Semaphore(5) para todos os feeds e um
+sleep(2) fixo para qualquer URL do YouTube: hosts rápidos esperavam atrás de
+hosts lentos e vários feeds do mesmo host (ex: 7 canais do YouTube) saíam em
+rajada. Aqui:
+
+- cada host tem um limite de requisições simultâneas e um intervalo mínimo
+  entre inícios de requisição (maior para hosts conhecidos por bloquear);
+- o limite global é adaptativo (AIMD): sobe aos poucos enquanto a latência
+  está abaixo do alvo e cai pela metade em 429/503/timeout;
+- 429/503 respeitam o Retry-After: o host fica em espera até o prazo e, se o
+  prazo for longo demais, o feed é pulado nesta varredura (HostBackoff).
+
+Uso:
+
+    async with fetch_scheduler.slot(url) as ticket:
+        async with session.get(url) as resp:
+            ticket.observe(resp.status, resp.headers)
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, Mapping, Optional
+from urllib.parse import urlparse
+
+from settings import (
+    FETCH_CONCURRENCY_MIN,
+    FETCH_CONCURRENCY_MAX,
+    FETCH_HOST_CONCURRENCY,
+    FETCH_HOST_MIN_INTERVAL,
+    FETCH_TARGET_LATENCY,
+)
+
+log = logging.getLogger("CyberIntel")
+
+# Limite global inicial (valor do antigo Semaphore)
+FETCH_CONCURRENCY_START = 5
+# Intervalo mínimo (s) por host para domínios sensíveis a rajadas (casado por sufixo)
+HOST_INTERVAL_OVERRIDES: Dict[str, float] = {
+    "youtube.com": 2.0,
+    "youtu.be": 2.0,
+}
+# Status que indicam sobrecarga/limitação no servidor
+THROTTLE_STATUSES = frozenset({429, 503})
+# Espera padrão (s) quando 429/503 vem sem Retry-After
+DEFAULT_RETRY_AFTER = 30.0
+# Maior espera (s) aceita dentro de uma varredura; acima disso o feed é pulado
+MAX_INLINE_WAIT = 60.0
+# Teto (s) para Retry-After absurdos
+MAX_RETRY_AFTER = 3600.0
+
+
+class HostBackoff(Exception):
+    """O host pediu para esperar mais do que MAX_INLINE_WAIT (feed pulado nesta varredura)."""
+
+    def __init__(self, host: str, wait: float):
+        super().__init__(f"{host} em backoff por mais {wait:.0f}s")
+        self.host = host
+        self.wait = wait
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Converte o header Retry-After (segundos ou HTTP-date) em segundos de espera.
+
+    Returns:
+        Segundos (>= 0, limitado a MAX_RETRY_AFTER) ou None se ausente/inválido.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when is None:
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        now = time.time() if now is None else now
+        seconds = when.timestamp() - now
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def host_of(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+
+class AdaptiveLimiter:
+    """
+    Semáforo com limite ajustável em tempo de execução (AIMD).
+
+    - aumento aditivo: +1 a cada `limit` respostas rápidas (≈ +1 por "rodada");
+    - redução multiplicativa: metade em sinal de congestionamento.
+    """
+
+    def __init__(self, start: int = FETCH_CONCURRENCY_START, minimum: int = FETCH_CONCURRENCY_MIN,
+                 maximum: int = FETCH_CONCURRENCY_MAX):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self._limit = float(min(max(start, self.minimum), self.maximum))
+        self.in_flight = 0
+        self._cond = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def increase(self) -> None:
+        self._limit = min(self.maximum, self._limit + 1.0 / max(self._limit, 1.0))
+
+    def decrease(self) -> None:
+        self._limit = max(float(self.minimum), self._limit / 2)
+
+
+class _HostState:
+    __slots__ = ("semaphore", "interval", "next_start", "not_before", "throttled")
+
+    def __init__(self, concurrency: int, interval: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.interval = interval
+        self.next_start = 0.0
+        self.not_before = 0.0
+        self.throttled = 0
+
+
+class FetchTicket:
+    """Resultado de uma requisição, informado pelo chamador via observe()."""
+
+    __slots__ = ("url", "host", "started", "status", "retry_after")
+
+    def __init__(self, url: str, host: str):
+        self.url = url
+        self.host = host
+        self.started = time.monotonic()
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+
+    def observe(self, status: int, headers: Optional[Mapping[str, str]] = None) -> None:
+        self.status = status
+        if status in THROTTLE_STATUSES:
+            self.retry_after = parse_retry_after((headers or {}).get("Retry-After"))
+
+
+class FetchScheduler:
+    """Agenda downloads por host com limite global adaptativo."""
+
+    def __init__(self, host_concurrency: int = FETCH_HOST_CONCURRENCY,
+                 host_min_interval: float = FETCH_HOST_MIN_INTERVAL,
+                 target_latency: float = FETCH_TARGET_LATENCY,
+                 concurrency_start: int = FETCH_CONCURRENCY_START,
+                 concurrency_min: int = FETCH_CONCURRENCY_MIN,
+                 concurrency_max: int = FETCH_CONCURRENCY_MAX):
+        self.host_concurrency = max(1, host_concurrency)
+        self.host_min_interval = max(0.0, host_min_interval)
+        self.target_latency = target_latency
+        self._limiter_args = (concurrency_start, concurrency_min, concurrency_max)
+        self._limiter: Optional[AdaptiveLimiter] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._hosts: Dict[str, _HostState] = {}
+        self.throttled = 0
+        self.skipped = 0
+
+    # -----------------------------------------------------
+    # Estado por loop / por host
+    # -----------------------------------------------------
+
+    @property
+    def limiter(self) -> AdaptiveLimiter:
+        # Primitivas asyncio são ligadas ao loop; recria se o loop mudar (ex: testes)
+        loop = asyncio.get_running_loop()
+        if self._limiter is None or self._loop is not loop:
+            self._limiter = AdaptiveLimiter(*self._limiter_args)
+            self._hosts.clear()
+            self._loop = loop
+        return self._limiter
+
+    def _interval_for(self, host: str) -> float:
+        for suffix, interval in HOST_INTERVAL_OVERRIDES.items():
+            if host == suffix or host.endswith("." + suffix):
+                return max(interval, self.host_min_interval)
+        return self.host_min_interval
+
+    def _host(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.host_concurrency, self._interval_for(host))
+        return state
+
+    # -----------------------------------------------------
+    # API pública
+    # -----------------------------------------------------
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[FetchTicket]:
+        """
+        Aguarda a vez do host (limite + intervalo + backoff) e uma vaga global.
+
+        Raises:
+            HostBackoff: se o host estiver em backoff por mais de MAX_INLINE_WAIT.
+        """
+        limiter = self.limiter
+        host = host_of(url)
+        state = self._host(host)
+
+        async with state.semaphore:
+            now = time.monotonic()
+            wait_backoff = state.not_before - now
+            if wait_backoff > MAX_INLINE_WAIT:
+                self.skipped += 1
+                raise HostBackoff(host, wait_backoff)
+
+            # Reserva o próximo horário de início do host (sem await entre ler e gravar)
+            start = max(now, state.next_start, state.not_before)
+            state.next_start = start + state.interval
+            if start > now:
+                await asyncio.sleep(start - now)
+
+            # Vaga global só depois da espera do host: quem espera o host não ocupa o limite global
+            await limiter.acquire()
+            ticket = FetchTicket(url, host)
+            try:
+                yield ticket
+            except asyncio.TimeoutError:
+                limiter.decrease()
+                raise
+            finally:
+                await limiter.release()
+            self._record(ticket, state, limiter)
+
+    def _record(self, ticket: FetchTicket, state: _HostState, limiter: AdaptiveLimiter) -> None:
+        if ticket.status is None:
+            return
+        if ticket.status in THROTTLE_STATUSES:
+            wait = ticket.retry_after if ticket.retry_after is not None else DEFAULT_RETRY_AFTER
+            state.not_before = max(state.not_before, time.monotonic() + wait)
+            state.throttled += 1
+            self.throttled += 1
+            limiter.decrease()
+            log.warning(f"🐢 {ticket.host} respondeu {ticket.status}; aguardando {wait:.0f}s (limite global={limiter.limit})")
+            return
+        latency = time.monotonic() - ticket.started
+        if latency <= self.target_latency:
+            limiter.increase()
+
+    def backoff_remaining(self, url: str) -> float:
+        state = self._hosts.get(host_of(url))
+        if state is None:
+            return 0.0
+        return max(0.0, state.not_before - time.monotonic())
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        limiter = self._limiter
+        return {
+            "limit": limiter.limit if limiter else self._limiter_args[0],
+            "in_flight": limiter.in_flight if limiter else 0,
+            "throttled": self.throttled,
+            "skipped": self.skipped,
+            "hosts_in_backoff": {
+                host: round(state.not_before - now, 1)
+                for host, state in self._hosts.items()
+                if state.not_before > now
+            },
+        }
+
+
+# Instância global
+fetch_scheduler = FetchScheduler()
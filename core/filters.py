@@ -1,7 +1,7 @@
 """
 Filters module - News filtering and categorization logic.
 """
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple, FrozenSet, Iterable, NamedTuple, Optional, Pattern
 import logging
 from utils.html import clean_html
 
@@ -57,6 +57,20 @@ FILTER_OPTIONS = {
 # =========================================================
 
 import re
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def _compile_keywords(keywords: Tuple[str, ...]) -> Pattern:
+    """
+    Compila (uma única vez por processo) o padrão de alternação para uma lista de keywords.
+
+    Padrão: (?<!:)\\b(?:kw1|kw2|...|kwn)s?\\b
+    """
+    escaped_kws = [re.escape(k) for k in keywords]
+    pattern_str = r'(?<!:)\b(?:' + '|'.join(escaped_kws) + r')s?\b'
+    return re.compile(pattern_str, re.IGNORECASE)
+
 
 def _contains_any(text: str, keywords: List[str]) -> bool:
     """
@@ -65,6 +79,8 @@ def _contains_any(text: str, keywords: List[str]) -> bool:
     A verificação é feita com "word boundaries" (\\b) para evitar falsos positivos
     em substrings (ex: 'bot' em 'bottle').
     Suporta pluralização simples opcional ('s?').
+    O padrão compilado fica em cache (lru_cache), então chamadas repetidas
+    com as mesmas keywords não recompilam a regex.
     
     Args:
         text (str): Texto a ser analisado.
@@ -76,15 +92,80 @@ def _contains_any(text: str, keywords: List[str]) -> bool:
     if not keywords:
         return False
 
-    # Escapa keywords para segurança no regex
-    # Monta padrão: (?<!:)\b(?:kw1|kw2|...|kwn)s?\b
-    escaped_kws = [re.escape(k) for k in keywords]
-    pattern_str = r'(?<!:)\b(?:' + '|'.join(escaped_kws) + r')s?\b'
-    
-    return bool(re.search(pattern_str, text, re.IGNORECASE))
+    return bool(_compile_keywords(tuple(keywords)).search(text))
 
 
-def match_intel(guild_id: str, title: str, summary: str, config: Dict[str, Any]) -> bool:
+# =========================================================
+# MOTOR DE FILTROS COMPILADO (MULTI-GUILD)
+# =========================================================
+
+class EntryVerdict(NamedTuple):
+    """Resultado da avaliação de uma notícia, independente de guild."""
+    blacklisted: bool
+    has_core: bool
+    categories: FrozenSet[str]
+
+
+class FilterEngine:
+    """
+    Motor de filtros pré-compilado.
+
+    Compila BLACKLIST, CYBER_CORE e cada categoria do CAT_MAP uma única vez.
+    Cada notícia é avaliada uma vez (`evaluate`) e a decisão por guild vira
+    uma interseção de conjuntos (`accepts`), sem regex por guild.
+    """
+
+    def __init__(self,
+                 blacklist: Iterable[str] = BLACKLIST,
+                 core: Iterable[str] = CYBER_CORE,
+                 cat_map: Optional[Dict[str, List[str]]] = None):
+        self._blacklist = _compile_keywords(tuple(blacklist))
+        self._core = _compile_keywords(tuple(core))
+        cat_map = CAT_MAP if cat_map is None else cat_map
+        self._categories = [
+            (name, _compile_keywords(tuple(kws))) for name, kws in cat_map.items() if kws
+        ]
+
+    def evaluate(self, title: str, summary: str) -> EntryVerdict:
+        """
+        Avalia uma notícia uma única vez.
+
+        Returns:
+            EntryVerdict com flags de blacklist/core e o conjunto de categorias que bateram.
+            Se a notícia cair na blacklist, as demais regex não são executadas.
+        """
+        content = f"{clean_html(title)} {clean_html(summary)}".lower()
+
+        if self._blacklist.search(content):
+            return EntryVerdict(True, False, frozenset())
+
+        if not self._core.search(content):
+            return EntryVerdict(False, False, frozenset())
+
+        matched = frozenset(name for name, pattern in self._categories if pattern.search(content))
+        return EntryVerdict(False, True, matched)
+
+    @staticmethod
+    def accepts(verdict: EntryVerdict, filters: Any) -> bool:
+        """
+        Decide se a guild (com a lista `filters`) deve receber a notícia avaliada.
+        Mesma lógica do match_intel, mas sem regex.
+        """
+        if not isinstance(filters, (list, tuple)) or not filters:
+            return False
+        if verdict.blacklisted or not verdict.has_core:
+            return False
+        if "todos" in filters or "all" in filters:
+            return True
+        return not verdict.categories.isdisjoint(filters)
+
+
+# Instância global (padrões compilados uma vez por processo)
+engine = FilterEngine()
+
+
+def match_intel(guild_id: str, title: str, summary: str, config: Dict[str, Any],
+                verdict: Optional[EntryVerdict] = None) -> bool:
     """
     Decide se notícia deve ir para a guild.
     
@@ -100,6 +181,7 @@ def match_intel(guild_id: str, title: str, summary: str, config: Dict[str, Any])
         title: Título da notícia
         summary: Resumo da notícia
         config: Configuração carregada
+        verdict: Avaliação prévia (engine.evaluate) para reaproveitar entre guilds
     
     Returns:
         True se notícia deve ser postada
@@ -107,32 +189,26 @@ def match_intel(guild_id: str, title: str, summary: str, config: Dict[str, Any])
     g = config.get(str(guild_id), {})
     filters = g.get("filters", [])
 
-    if not isinstance(filters, list) or not filters:
+    if not isinstance(filters, (list, tuple)) or not filters:
         log.debug(f"🛑 [Filtro] Guild {guild_id} sem filtros configurados.")
         return False
 
-    content = f"{clean_html(title)} {clean_html(summary)}".lower()
+    if verdict is None:
+        verdict = engine.evaluate(title, summary)
 
     # Bloqueia blacklist
-    if _contains_any(content, BLACKLIST):
+    if verdict.blacklisted:
         log.debug(f"🛑 [Filtro] Conteúdo bloqueado por blacklist: {title[:50]}...")
         return False
 
     # Exige pelo menos um termo Core (menos restritivo para não bloquear genéricos importantes)
     # Mas essencial para evitar notícias de "hacker" em contextos de golfe/jogos não relacionados
-    if not _contains_any(content, CYBER_CORE):
+    if not verdict.has_core:
         log.debug(f"🛑 [Filtro] Conteúdo ignorado (Sem termos CyberCore): {title[:50]}...")
         return False
 
-    # "todos" libera tudo
-    if "todos" in filters or "all" in filters:
+    if engine.accepts(verdict, filters):
         return True
 
-    # Verifica categorias específicas
-    for f in filters:
-        kws = CAT_MAP.get(f, [])
-        if kws and _contains_any(content, kws):
-            return True
-
     log.debug(f"🛑 [Filtro] Conteúdo rejeitado (Não bateu com categorias {filters}): {title[:50]}...")
     return False
@@ -1,113 +1,302 @@
 """
 HTML Monitor - Detects changes in static websites (Official Gundam Sites).
+
+Each check:
+- sends the stored ETag/Last-Modified (shared ValidatorCache); 304 = unchanged;
+- waits for its turn in the shared fetch scheduler (per-host limits, global cap);
+- parses off the event loop (parse pool from core.parsing), with lxml when installed;
+- hashes only the "region of interest" when the site entry in sources.json has
+  CSS selectors, e.g. {"url": "...", "selector": "main .news-list"}.
+
+Stored hashes carry a prefix with the hashing version and the selectors, so
+changing either re-initializes the site silently instead of raising a false
+"changed" alert.
+
+Besides the page hash, a compact snapshot of text blocks (paragraphs, list
+items, headings, table cells...) is kept per page: a 64-bit digest plus a
+short excerpt per block, capped at MAX_SNAPSHOT_BLOCKS. When the page hash
+changes, the alert lists the blocks that were added/removed instead of a
+generic "content has changed".
 """
-import ssl
 import logging
 import hashlib
 import asyncio
 import aiohttp
-import certifi
-from typing import List, Dict, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 from bs4 import BeautifulSoup
 
 from utils.storage import p, load_json_safe, save_json_safe
-from settings import FEED_USER_AGENT
+from utils.http import http_client, transfer_stats, read_limited, decode_body, ACCEPT_ENCODING
+from utils.cache import update_cache_state
+from core.fetch_scheduler import fetch_scheduler, HostBackoff
+from core.parsing import run_parse_job
+from settings import FEED_USER_AGENT, FEED_MAX_BYTES
+
+# Optional faster parser backend
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
 
 log = logging.getLogger("MaftyIntel")
 
+HTML_PARSER = "lxml" if HAS_LXML else "html.parser"
 # Tags to ignore during hash calculation (noise reduction)
 IGNORE_TAGS = ['script', 'style', 'meta', 'noscript', 'iframe', 'svg']
 # Classes/IDs often used for ads or dynamic widgets
 IGNORE_SELECTORS = ['.ad', '.advertisement', '.widget', '#clock', '.timestamp', '.cookie-consent']
+# Single combined selector: one tree walk instead of one per selector
+_IGNORE_SELECTOR = ", ".join(IGNORE_SELECTORS)
+# Bump when the text normalization changes (old hashes are re-initialized, not alerted)
+HASH_VERSION = "v2"
+
+# Leaf block elements used for the chunked snapshot
+BLOCK_TAGS = ['p', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'td', 'th', 'dt', 'dd',
+              'blockquote', 'pre', 'figcaption', 'caption']
+# Snapshot bounds (per page): number of blocks and excerpt length
+MAX_SNAPSHOT_BLOCKS = 200
+EXCERPT_LEN = 120
+BLOCK_DIGEST_SIZE = 8
+# Blocks listed per side (added/removed) in an alert
+MAX_DIFF_LINES = 5
+
 
-async def fetch_page_hash(session: aiohttp.ClientSession, url: str) -> Tuple[str, str, str]:
+def load_official_sites() -> List[Dict[str, Any]]:
     """
-    Fetches a page, cleans it, and returns (url, title, hash).
-    Returns (url, "", "") on failure.
+    Reads the monitored sites from sources.json.
+    Entries can be plain URLs or {"url": ..., "selector": "css" | ["css", ...]}.
+    """
+    sources = load_json_safe(p("sources.json"), {})
+    sites = []
+    for item in sources.get("official_sites_reference_(not_rss)", []):
+        if isinstance(item, str):
+            sites.append({"url": item, "selectors": []})
+        elif isinstance(item, dict) and isinstance(item.get("url"), str):
+            raw = item.get("selectors", item.get("selector")) or []
+            selectors = [raw] if isinstance(raw, str) else [s for s in raw if isinstance(s, str)]
+            sites.append({"url": item["url"], "selectors": selectors})
+    return sites
+
+
+def hash_prefix(selectors: Sequence[str]) -> str:
+    """Prefix of the stored hash: hashing version + which region was hashed."""
+    roi = hashlib.sha1("\n".join(selectors).encode("utf-8")).hexdigest()[:8] if selectors else "page"
+    return f"{HASH_VERSION}:{roi}:"
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def extract_blocks(regions: Iterable[Any]) -> List[List[str]]:
+    """
+    Leaf text blocks of the regions as [digest, excerpt] pairs (page order, no repeats).
+    Falls back to text lines when the markup has no block elements.
+    """
+    texts: List[str] = []
+    for region in regions:
+        leaves = [el for el in region.find_all(BLOCK_TAGS) if el.find(BLOCK_TAGS) is None]
+        if leaves:
+            texts.extend(_normalize(el.get_text(separator=" ", strip=True)) for el in leaves)
+        else:
+            texts.extend(_normalize(line) for line in region.get_text(separator="\n").splitlines())
+
+    blocks, seen = [], set()
+    for text in texts:
+        if not text:
+            continue
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=BLOCK_DIGEST_SIZE).hexdigest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        blocks.append([digest, text[:EXCERPT_LEN]])
+        if len(blocks) >= MAX_SNAPSHOT_BLOCKS:
+            break
+    return blocks
+
+
+def diff_blocks(old: Iterable[Sequence[str]], new: Iterable[Sequence[str]]) -> Tuple[List[str], List[str]]:
+    """(added, removed) excerpts between two snapshots, compared by block digest."""
+    old, new = list(old), list(new)
+    old_digests = {d for d, _ in old}
+    new_digests = {d for d, _ in new}
+    added = [excerpt for d, excerpt in new if d not in old_digests]
+    removed = [excerpt for d, excerpt in old if d not in new_digests]
+    return added, removed
+
+
+def format_diff(added: Sequence[str], removed: Sequence[str]) -> str:
+    """Short, bounded text for the alert."""
+    lines = []
+    for sign, items in (("➕", added), ("➖", removed)):
+        for excerpt in items[:MAX_DIFF_LINES]:
+            lines.append(f"{sign} {excerpt}")
+        if len(items) > MAX_DIFF_LINES:
+            lines.append(f"{sign} (+{len(items) - MAX_DIFF_LINES} more)")
+    return "\n".join(lines)
+
+
+def extract_page_sync(body: bytes, content_type: Optional[str] = None,
+                      selectors: Sequence[str] = ()) -> Tuple[str, str, List[List[str]]]:
     """
+    Cleans the page and returns (title, text_hash, blocks). Module-level so it can run in the parse pool.
+    text_hash is "" when none of the selectors matched (nothing reliable to compare).
+    """
+    soup = BeautifulSoup(decode_body(body, content_type), HTML_PARSER)
+    title = soup.title.get_text(strip=True) if soup.title else ""
+
+    # Remove noise tags / classes
+    for tag in soup(IGNORE_TAGS):
+        tag.decompose()
+    for match in soup.select(_IGNORE_SELECTOR):
+        match.decompose()
+
+    if selectors:
+        regions = [el for selector in selectors for el in soup.select(selector)]
+        if not regions:
+            return title or "No Title", "", []
+    else:
+        regions = [soup]
+
+    # Text only, whitespace collapsed (ignores HTML structure and reflow changes)
+    text_content = _normalize(" ".join(r.get_text(separator=" ", strip=True) for r in regions))
+    page_hash = hashlib.sha256(text_content.encode('utf-8')).hexdigest()
+    return title or "No Title", page_hash, extract_blocks(regions)
+
+
+async def fetch_page_hash(session: aiohttp.ClientSession, url: str, selectors: Sequence[str] = (),
+                          http_cache: Optional[Any] = None, conditional: bool = True
+                          ) -> Tuple[str, str, Optional[str], List[List[str]]]:
+    """
+    Fetches a page, cleans it, and returns (url, title, hash, blocks).
+    Returns (url, "", "", []) on failure and (url, "", None, []) when the server answered 304.
+    conditional=False skips the validators (no usable stored hash to keep on a 304).
+    """
+    headers = http_cache.headers(url) if http_cache is not None and conditional else {}
     try:
-        async with session.get(url) as resp:
-            if resp.status != 200:
-                log.debug(f"HTML Monitor: {url} returned {resp.status}")
-                return url, "", ""
-            
-            content = await resp.text(errors="ignore")
-            
-            # Parse and Clean
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            # Remove noise tags
-            for tag in soup(IGNORE_TAGS):
-                tag.decompose()
-            
-            # Remove noise classes (Safe attempt)
-            for selector in IGNORE_SELECTORS:
-                for match in soup.select(selector):
-                    match.decompose()
-            
-            # Get text content only (ignoring HTML structure changes)
-            text_content = soup.get_text(separator=' ', strip=True)
-            
-            # Hash calculation
-            page_hash = hashlib.sha256(text_content.encode('utf-8')).hexdigest()
-            title = soup.title.string.strip() if soup.title else "No Title"
-            
-            return url, title, page_hash
+        async with fetch_scheduler.slot(url) as ticket:
+            async with session.get(url, headers=headers) as resp:
+                ticket.observe(resp.status, resp.headers)
+                if resp.status == 304:
+                    if http_cache is not None:
+                        http_cache.hit()
+                    log.debug(f"HTML Monitor: {url} not modified (304)")
+                    return url, "", None, []
+                if resp.status != 200:
+                    log.debug(f"HTML Monitor: {url} returned {resp.status}")
+                    return url, "", "", []
+
+                # Streaming read with a size cap
+                body = await read_limited(resp, FEED_MAX_BYTES)
+                if body is None:
+                    log.warning(f"HTML Monitor: {url} exceeds {FEED_MAX_BYTES} bytes, skipped")
+                    return url, "", "", []
+                transfer_stats.record_response(url, resp, len(body))
+                content_type = resp.headers.get("Content-Type")
+                response_headers = resp.headers
 
+        # Parse + hash off the event loop, outside the network slot
+        title, page_hash, blocks = await run_parse_job(
+            extract_page_sync, body, content_type, tuple(selectors), label=url
+        )
+        if not page_hash:
+            log.warning(f"HTML Monitor: selectors {list(selectors)} matched nothing on {url}")
+            return url, title, "", []
+        # Validators only after a usable hash, so a later 304 never hides a missing one
+        if http_cache is not None:
+            update_cache_state(url, response_headers, http_cache)
+            http_cache.miss()
+        return url, title, hash_prefix(selectors) + page_hash, blocks
+
+    except HostBackoff as e:
+        log.info(f"HTML Monitor: {url} skipped this round ({e})")
+        return url, "", "", []
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
         log.warning(f"HTML Monitor: Failed to fetch {url}: {e}")
-        return url, "", ""
+        return url, "", "", []
+
 
-async def check_official_sites(current_state: Dict[str, str]) -> Tuple[List[Dict[str, str]], Dict[str, str]]:
+async def check_official_sites(current_state: Dict[str, str], http_cache: Optional[Any] = None,
+                               sites: Optional[Iterable[Dict[str, Any]]] = None,
+                               snapshots: Optional[Dict[str, Dict[str, Any]]] = None
+                               ) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
     """
     Checks official sites for changes.
     Args:
         current_state: Dict {url: last_hash}
+        http_cache: ValidatorCache for conditional requests (optional)
+        sites: Site list (defaults to sources.json)
+        snapshots: Dict {url: {"blocks": [[digest, excerpt], ...]}}, updated in place
+            (optional; without it alerts have no added/removed details)
     Returns:
-        (updates_list, new_state)
+        (updates_list, new_state). Updates carry "added"/"removed" excerpts when known.
     """
-    sources = load_json_safe(p("sources.json"), {})
-    urls = sources.get("official_sites_reference_(not_rss)", [])
-    
-    if not urls:
+    sites = load_official_sites() if sites is None else list(sites)
+
+    if not sites:
         return [], current_state
 
-    # SSL & Headers (Same as scanner.py)
-    ssl_ctx = ssl.create_default_context(cafile=certifi.where())
+    # Headers (Same as scanner.py)
     headers = {
         "User-Agent": FEED_USER_AGENT,
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9"
+        "Accept-Language": "en-US,en;q=0.9",
+        "Accept-Encoding": ACCEPT_ENCODING,
     }
-    connector = aiohttp.TCPConnector(ssl=ssl_ctx)
-    
+
     updates = []
     new_state = current_state.copy()
-    
-    async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
-        tasks = [fetch_page_hash(session, url) for url in urls]
+
+    def _usable(url: str, selectors: Sequence[str]) -> bool:
+        # 304 is only useful if there is a current-format hash (and snapshot) to keep
+        return (current_state.get(url, "").startswith(hash_prefix(selectors))
+                and (snapshots is None or url in snapshots))
+
+    async with http_client.new_session("html", headers=headers) as session:
+        # Concurrency is bounded by the shared fetch scheduler (per host + global)
+        tasks = [
+            fetch_page_hash(session, site["url"], site["selectors"], http_cache,
+                            conditional=_usable(site["url"], site["selectors"]))
+            for site in sites
+        ]
         results = await asyncio.gather(*tasks)
-        
-        for url, title, page_hash in results:
-            if not page_hash:
-                continue
-                
-            last_hash = current_state.get(url)
-            
-            # If no last hash (first run), just save it
-            if not last_hash:
-                new_state[url] = page_hash
-                log.info(f"HTML Monitor: Initialized hash for {url}")
-                continue
-            
-            # If hash changed, it's an update!
-            if page_hash != last_hash:
-                log.info(f"HTML Monitor: CHANGE DETECTED in {url}")
-                updates.append({
-                    "title": f"🔄 Update: {title}",
-                    "link": url,
-                    "summary": "Official site content has changed. Please check for new announcements."
-                })
-                new_state[url] = page_hash
-    
+
+    for (url, title, page_hash, blocks), site in zip(results, sites):
+        if not page_hash:
+            continue  # 304 (None) or failure ("")
+
+        last_hash = current_state.get(url)
+        previous = (snapshots or {}).get(url, {}).get("blocks")
+        if snapshots is not None:
+            snapshots[url] = {"blocks": blocks}
+
+        # First run, or hashing/selectors changed: just save it
+        if not last_hash or not last_hash.startswith(hash_prefix(site["selectors"])):
+            new_state[url] = page_hash
+            log.info(f"HTML Monitor: Initialized hash for {url}")
+            continue
+
+        # If hash changed, it's an update!
+        if page_hash != last_hash:
+            added, removed = diff_blocks(previous, blocks) if previous is not None else ([], [])
+            log.info(f"HTML Monitor: CHANGE DETECTED in {url} (+{len(added)}/-{len(removed)} blocks)")
+            updates.append({
+                "title": f"🔄 Update: {title}",
+                "link": url,
+                "summary": format_diff(added, removed)
+                or "Official site content has changed. Please check for new announcements.",
+                "added": added,
+                "removed": removed,
+            })
+            new_state[url] = page_hash
+
+    if snapshots is not None:
+        # Bounded storage: only sites still monitored keep a snapshot
+        monitored = {site["url"] for site in sites}
+        for url in [u for u in snapshots if u not in monitored]:
+            del snapshots[url]
+
     return updates, new_state
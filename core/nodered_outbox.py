@@ -0,0 +1,295 @@
+"""
+Node-RED outbox - Envio em lote dos alertas para o dashboard, fora da varredura.
+
+Cada notícia publicada fazia seu próprio POST para NODE_RED_ENDPOINT dentro da
+varredura (e o dbService usava requests.post bloqueante); com o Node-RED lento
+ou fora do ar, cada item somava até o timeout ao scan. Aqui os alertas só são
+colocados numa fila em memória:
+
+- `push()` nunca bloqueia e pode ser chamado de qualquer thread (o dbService
+  roda na thread de persistência);
+- fila cheia transborda para um arquivo JSON Lines em disco, relido quando a
+  memória esvazia (e no próximo início do bot);
+- um worker envia lotes (lista JSON) ao atingir NODE_RED_BATCH_SIZE itens ou
+  a cada NODE_RED_FLUSH_SECONDS;
+- falha de rede/5xx devolve o lote para a frente da fila e tenta de novo com
+  backoff exponencial; 4xx descarta o lote (payload rejeitado).
+
+Com NODE_RED_BATCH_SIZE=1 cada alerta é enviado como objeto único (formato
+antigo, para flows que não tratam listas).
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from settings import (
+    NODE_RED_ENDPOINT, NODE_RED_BATCH_SIZE, NODE_RED_FLUSH_SECONDS,
+    NODE_RED_OUTBOX_MAX, NODE_RED_SPILL_MAX,
+)
+from utils.storage import p
+from utils.http import http_client
+
+log = logging.getLogger("CyberIntel")
+
+# Arquivo de transbordo (alertas que não couberam na memória ou pendentes no encerramento)
+SPILL_PATH = p("data/nodered_outbox.jsonl")
+OUTBOX_BACKOFF_BASE = 2.0
+OUTBOX_BACKOFF_MAX = 300.0
+# Tempo máximo (s) da última tentativa de envio no encerramento
+CLOSE_FLUSH_TIMEOUT = 3.0
+
+
+class NodeRedOutbox:
+    """Fila limitada de alertas com transbordo em disco e envio em lote com retry."""
+
+    def __init__(self, endpoint: str = NODE_RED_ENDPOINT, batch_size: int = NODE_RED_BATCH_SIZE,
+                 flush_interval: float = NODE_RED_FLUSH_SECONDS, max_items: int = NODE_RED_OUTBOX_MAX,
+                 spill_max: int = NODE_RED_SPILL_MAX, spill_path: str = SPILL_PATH):
+        self.endpoint = endpoint
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_items = max(self.batch_size, max_items)
+        self.spill_max = spill_max
+        self.spill_path = spill_path
+        self._items: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._spilled = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._failures = 0
+        self.sent = 0
+        self.batches = 0
+        self.retries = 0
+        self.dropped = 0
+        self.last_error = ""
+
+    # -----------------------------------------------------
+    # API pública
+    # -----------------------------------------------------
+
+    def push(self, payload: Dict[str, Any]) -> bool:
+        """
+        Enfileira um alerta (thread-safe, não bloqueia).
+        Retorna False só se memória e arquivo de transbordo estiverem cheios.
+        """
+        with self._lock:
+            if len(self._items) < self.max_items and not self._spilled:
+                self._items.append(payload)
+                ready = len(self._items) >= self.batch_size
+            elif self._spill([payload]):
+                # Com transbordo pendente tudo passa pelo disco (preserva a ordem)
+                ready = True
+            else:
+                self.dropped += 1
+                log.warning(f"📪 Outbox do Node-RED cheia ({self.max_items} + {self.spill_max} em disco). Alerta descartado.")
+                return False
+        if ready:
+            self._notify()
+        return True
+
+    async def start(self) -> None:
+        """Inicia o worker de envio no loop atual (recupera o transbordo da execução anterior)."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        with self._lock:
+            self._spilled = self._count_spilled()
+        if self._spilled:
+            log.info(f"📦 Outbox do Node-RED: {self._spilled} alerta(s) pendente(s) em disco.")
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Última tentativa curta de envio; o que sobrar vai para o disco."""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        try:
+            await asyncio.wait_for(self.flush(), CLOSE_FLUSH_TIMEOUT)
+        except (asyncio.TimeoutError, Exception) as e:
+            log.debug(f"Outbox do Node-RED: envio final interrompido ({e})")
+        with self._lock:
+            pending = list(self._items)
+            self._items.clear()
+            if pending:
+                # Itens em memória são mais antigos que os já transbordados: vão para o início
+                self._spill(pending, force=True, front=True)
+
+    async def flush(self) -> int:
+        """Envia tudo o que está pendente agora. Retorna quantos alertas foram entregues."""
+        delivered = 0
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return delivered
+            if not await self._send(batch):
+                return delivered
+            delivered += len(batch)
+
+    def depth(self) -> int:
+        with self._lock:
+            return len(self._items) + self._spilled
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queued, spilled = len(self._items), self._spilled
+        return {
+            "queued": queued,
+            "spilled": spilled,
+            "sent": self.sent,
+            "batches": self.batches,
+            "retries": self.retries,
+            "dropped": self.dropped,
+            "last_error": self.last_error,
+        }
+
+    # -----------------------------------------------------
+    # Worker
+    # -----------------------------------------------------
+
+    def _notify(self) -> None:
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                if not await self._send(batch):
+                    delay = min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE ** self._failures)
+                    delay += random.uniform(0, delay / 2)
+                    self.retries += 1
+                    log.warning(f"🔁 Node-RED indisponível; novo envio em {delay:.0f}s ({self.depth()} pendente(s)): {self.last_error}")
+                    await asyncio.sleep(delay)
+                    break
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            if len(self._items) < self.max_items // 2 and self._spilled:
+                self._refill()
+            batch = []
+            while self._items and len(batch) < self.batch_size:
+                batch.append(self._items.popleft())
+            return batch
+
+    async def _send(self, batch: List[Dict[str, Any]]) -> bool:
+        """POST do lote. False = falha temporária (lote devolvido para a frente da fila)."""
+        body: Any = batch[0] if self.batch_size == 1 else batch
+        try:
+            async with http_client.new_session("nodered") as session:
+                async with session.post(self.endpoint, json=body) as resp:
+                    status = resp.status
+        except asyncio.CancelledError:
+            self._requeue(batch)
+            raise
+        except Exception as e:
+            status, self.last_error = None, f"{type(e).__name__}: {e}"
+
+        if status is not None and status < 300:
+            self.sent += len(batch)
+            self.batches += 1
+            self._failures = 0
+            log.debug(f"📡 Enviado para Node-RED: {len(batch)} alerta(s)")
+            return True
+        if status is not None and 400 <= status < 500 and status != 429:
+            # Payload rejeitado: tentar de novo não adianta
+            self.dropped += len(batch)
+            log.warning(f"⚠️ Node-RED rejeitou lote de {len(batch)} alerta(s) (HTTP {status})")
+            return True
+
+        if status is not None:
+            self.last_error = f"HTTP {status}"
+        self._failures += 1
+        self._requeue(batch)
+        return False
+
+    def _requeue(self, batch: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._items.extendleft(reversed(batch))
+            overflow = len(self._items) - self.max_items
+            if overflow > 0:
+                # Excedente volta para o início do transbordo (ordem preservada)
+                extra = [self._items.pop() for _ in range(overflow)][::-1]
+                self._spill(extra, force=True, front=True)
+
+    # -----------------------------------------------------
+    # Transbordo em disco (chamado com self._lock)
+    # -----------------------------------------------------
+
+    def _spill(self, items: List[Dict[str, Any]], force: bool = False, front: bool = False) -> bool:
+        if not force and self._spilled + len(items) > self.spill_max:
+            return False
+        lines = [json.dumps(item, ensure_ascii=False) + "\n" for item in items]
+        try:
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            if front and self._spilled:
+                with open(self.spill_path, "r", encoding="utf-8") as f:
+                    lines.extend(f.readlines())
+                tmp = self.spill_path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.writelines(lines)
+                os.replace(tmp, self.spill_path)
+            else:
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+        except OSError as e:
+            log.error(f"❌ Falha ao gravar transbordo do Node-RED: {e}")
+            return False
+        self._spilled += len(items)
+        return True
+
+    def _refill(self) -> None:
+        """Traz do disco o quanto couber na memória; o restante é regravado."""
+        try:
+            with open(self.spill_path, "r", encoding="utf-8") as f:
+                lines = [line for line in f if line.strip()]
+        except FileNotFoundError:
+            self._spilled = 0
+            return
+        except OSError as e:
+            log.error(f"❌ Falha ao ler transbordo do Node-RED: {e}")
+            return
+
+        room = self.max_items - len(self._items)
+        for line in lines[:room]:
+            try:
+                self._items.append(json.loads(line))
+            except json.JSONDecodeError:
+                self.dropped += 1
+        rest = lines[room:]
+        try:
+            if rest:
+                tmp = self.spill_path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.writelines(rest)
+                os.replace(tmp, self.spill_path)
+            else:
+                os.remove(self.spill_path)
+        except OSError as e:
+            log.error(f"❌ Falha ao regravar transbordo do Node-RED: {e}")
+        self._spilled = len(rest)
+
+    def _count_spilled(self) -> int:
+        try:
+            with open(self.spill_path, "r", encoding="utf-8") as f:
+                return sum(1 for line in f if line.strip())
+        except OSError:
+            return 0
+
+
+# Instância global
+nodered_outbox = NodeRedOutbox()
@@ -0,0 +1,347 @@
+"""
+Parsing module - Backend configurável para o parsing de feeds (feedparser).
+
+O feedparser é Python puro e segura o GIL; rodá-lo no executor de threads
+serializa os parses e atrasa o heartbeat do gateway do Discord em feeds grandes.
+Aqui o parse pode rodar em:
+
+- "process": pool de processos com FEED_PARSE_WORKERS workers (padrão)
+- "thread":  executor padrão do asyncio (comportamento antigo)
+- "inline":  no próprio event loop (debug/testes)
+
+As entradas voltam como dicts simples (só os campos usados pelo scanner), que
+atravessam a fronteira de processo com custo baixo de pickle.
+
+Também há um modo incremental (stream_feed_entries) que lê a resposta em
+pedaços e para de baixar o feed quando encontra itens já vistos; ele segue o
+backend (fora do "inline", o parser incremental roda no executor de threads).
+"""
+import asyncio
+import logging
+import multiprocessing
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import feedparser
+from dateutil import parser as dtparser
+
+from settings import FEED_PARSE_BACKEND, FEED_PARSE_WORKERS
+from core.stats import stats
+
+log = logging.getLogger("CyberIntel")
+
+# Parse acima deste tempo gera aviso no log
+SLOW_PARSE_MS = 2000
+
+# Campos de texto copiados de cada entrada do feedparser
+_TEXT_FIELDS = ("id", "title", "link", "summary", "description", "published", "updated")
+# Campos de data já interpretados pelo feedparser (struct_time -> tupla)
+_DATE_FIELDS = ("published_parsed", "updated_parsed")
+
+_executor: Optional[Executor] = None
+
+
+def entry_to_dict(entry: Any) -> Dict[str, Any]:
+    """
+    Converte uma entrada do feedparser em dict simples e serializável.
+
+    Usa dict.get para ler apenas as chaves reais (sem os aliases/fallbacks
+    do FeedParserDict, que emitem DeprecationWarning).
+    """
+    out: Dict[str, Any] = {}
+    for key in _TEXT_FIELDS:
+        value = dict.get(entry, key)
+        if value:
+            out[key] = str(value)
+    for key in _DATE_FIELDS:
+        value = dict.get(entry, key)
+        if value:
+            out[key] = tuple(value[:9])
+    media = dict.get(entry, "media_thumbnail")
+    if media:
+        out["media_thumbnail"] = [{"url": m.get("url")} for m in media if isinstance(m, dict) and m.get("url")]
+    return out
+
+
+def parse_feed_sync(body: bytes) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    Faz o parse do corpo do feed e devolve (entradas, tempo_ms).
+    Função de módulo (picklable) para rodar dentro do pool de processos.
+    """
+    started = time.perf_counter()
+    feed = feedparser.parse(body)
+    entries = [entry_to_dict(e) for e in (getattr(feed, "entries", []) or [])]
+    return entries, (time.perf_counter() - started) * 1000
+
+
+# Módulos carregados pelo servidor do forkserver (os workers nascem com eles importados)
+_WORKER_PRELOAD = ["core.parsing", "core.html_monitor"]
+
+
+def _mp_context():
+    """
+    Contexto dos workers: forkserver (POSIX) ou spawn (Windows).
+
+    O pool é criado sob demanda, com o processo já cheio de threads (persistência,
+    resolver do aiohttp, discord.py); fork nesse estado pode herdar locks presos.
+    O forkserver é um processo limpo que só importa os módulos de parsing.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(_WORKER_PRELOAD)
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def _get_executor() -> Optional[Executor]:
+    """Cria (uma vez) o pool de processos. Retorna None para o executor padrão de threads."""
+    global _executor
+    if FEED_PARSE_BACKEND != "process":
+        return None
+    if _executor is None:
+        try:
+            _executor = ProcessPoolExecutor(max_workers=FEED_PARSE_WORKERS, mp_context=_mp_context())
+            log.info(f"🧵 Pool de parsing iniciado (processos={FEED_PARSE_WORKERS}).")
+        except (ValueError, OSError) as e:
+            log.warning(f"⚠️ Pool de processos indisponível ({e}). Usando threads para parsing.")
+            return None
+    return _executor
+
+
+def shutdown_parse_executor() -> None:
+    """Encerra o pool de processos (se existir)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def run_parse_job(fn: Callable[..., Any], *args: Any, label: str = "") -> Any:
+    """
+    Executa uma função de parse (de módulo, picklable) no backend configurado.
+    Usado pelo parse de feeds e pela extração do monitor HTML.
+    """
+    if FEED_PARSE_BACKEND == "inline":
+        return fn(*args)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+    except BrokenProcessPool:
+        # Worker morreu (OOM, sinal...): recria o pool na próxima chamada e tenta em thread agora
+        log.warning(f"⚠️ Pool de parsing quebrado ao processar {label}. Recriando.")
+        shutdown_parse_executor()
+        return await loop.run_in_executor(None, fn, *args)
+
+
+async def parse_feed(body: bytes, url: str = "") -> List[Dict[str, Any]]:
+    """
+    Faz o parse de um feed usando o backend configurado e registra o tempo por feed.
+
+    Args:
+        body: Corpo bruto (bytes) da resposta HTTP
+        url: URL do feed (apenas para métricas/log)
+
+    Returns:
+        Lista de entradas como dicts simples.
+    """
+    started = time.perf_counter()
+    entries, parse_ms = await run_parse_job(parse_feed_sync, body, label=url)
+
+    total_ms = (time.perf_counter() - started) * 1000
+    if url:
+        stats.feed_parse_ms[url] = round(parse_ms, 1)
+    if parse_ms > SLOW_PARSE_MS:
+        log.warning(f"🐢 Parse lento ({parse_ms:.0f} ms, {len(body) / 1024:.0f} KB): {url}")
+    else:
+        log.debug(f"🧩 Parse {url}: {len(entries)} entradas em {parse_ms:.1f} ms (total {total_ms:.1f} ms)")
+    return entries
+
+
+# =========================================================
+# PARSE INCREMENTAL (STREAMING)
+# =========================================================
+
+STREAM_CHUNK_SIZE = 16 * 1024
+_ENTRY_TAGS = ("item", "entry")
+
+
+class FeedTooLarge(Exception):
+    """O corpo passou de max_bytes durante a leitura em streaming (feed descartado)."""
+
+
+def _local(tag: Any) -> str:
+    """Nome do elemento sem namespace ('{http://www.w3.org/2005/Atom}entry' -> 'entry')."""
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def _parse_date(value: str) -> Optional[Tuple[int, ...]]:
+    """Converte data RFC 822 (RSS) ou ISO 8601 (Atom) em tupla UTC estilo struct_time."""
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            dt = dtparser.isoparse(value)
+        except (TypeError, ValueError):
+            return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return tuple(dt.timetuple()[:9])
+
+
+def element_to_dict(elem: ET.Element) -> Dict[str, Any]:
+    """
+    Converte um <item> (RSS) ou <entry> (Atom/YouTube) no mesmo formato de entry_to_dict.
+    """
+    out: Dict[str, Any] = {}
+    for child in elem.iter():
+        if child is elem:
+            continue
+        name = _local(child.tag)
+        text = (child.text or "").strip()
+
+        if name == "link":
+            href = child.get("href")
+            if href and child.get("rel", "alternate") == "alternate":
+                out.setdefault("link", href)
+            elif text:
+                out.setdefault("link", text)
+        elif name == "title" and text:
+            out.setdefault("title", text)
+        elif name in ("description", "summary", "content", "encoded") and text:
+            out.setdefault("summary", text)
+        elif name in ("pubDate", "published", "date") and text:
+            out.setdefault("published", text)
+        elif name == "updated" and text:
+            out.setdefault("updated", text)
+        elif name in ("guid", "id") and text:
+            out.setdefault("id", text)
+        elif name == "thumbnail" and child.get("url"):
+            out.setdefault("media_thumbnail", [{"url": child.get("url")}])
+
+    for src, dst in (("published", "published_parsed"), ("updated", "updated_parsed")):
+        if src in out:
+            parsed = _parse_date(out[src])
+            if parsed:
+                out[dst] = parsed
+    return out
+
+
+class StreamingFeedParser:
+    """
+    Parser incremental de RSS/Atom baseado no XMLPullParser (expat, em C).
+
+    Recebe o corpo em pedaços (`feed`) e devolve as entradas assim que o
+    elemento <item>/<entry> fecha, liberando a memória do elemento em seguida.
+    Lança ET.ParseError para XML inválido (o chamador volta ao feedparser).
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("end",))
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        self._parser.feed(chunk)
+        entries = []
+        for _event, elem in self._parser.read_events():
+            if _local(elem.tag) in _ENTRY_TAGS:
+                entries.append(element_to_dict(elem))
+                elem.clear()
+        return entries
+
+
+async def stream_feed_entries(chunks: AsyncIterator[bytes], url: str,
+                              is_known: Callable[[Dict[str, Any]], bool],
+                              stop_after: int, max_bytes: int,
+                              entry_time: Optional[Callable[[Dict[str, Any]], Optional[float]]] = None,
+                              newest_known: Optional[float] = None) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Lê o feed em pedaços e para assim que `stop_after` entradas consecutivas já são conhecidas.
+
+    A parada cedo supõe o feed do mais novo para o mais antigo, então só vale quando
+    isso é verificável pelas datas: a sequência de conhecidas precisa começar numa
+    entrada tão nova quanto a mais nova já vista no feed (`newest_known`) e seguir
+    sem datas crescentes. Feed do mais antigo para o mais novo (ou sem datas) é lido
+    inteiro, senão os itens novos no fim nunca seriam lidos.
+
+    Args:
+        chunks: Iterador assíncrono de bytes (ex: resp.content.iter_chunked)
+        url: URL do feed (métricas/log)
+        is_known: Retorna True se a entrada já está no dedup/histórico
+        stop_after: Nº de entradas conhecidas consecutivas para encerrar a leitura
+        max_bytes: Limite de bytes lidos (acima disso o feed é descartado)
+        entry_time: Data (epoch) de uma entrada, ou None se ela não tem data
+        newest_known: Data (epoch) da entrada mais nova já vista no feed
+
+    Returns:
+        (entradas, parou_cedo). Se o XML for inválido, faz fallback para o
+        feedparser (parse_feed) com o corpo completo.
+
+    Raises:
+        FeedTooLarge: o corpo passou de `max_bytes` (mesmo tratamento do download completo).
+
+    Fora do backend "inline", cada pedaço é entregue ao parser no executor de
+    threads (o expat e o element_to_dict não rodam no event loop). O estado do
+    XMLPullParser não atravessa processos, então o backend "process" também usa
+    threads aqui.
+    """
+    loop = asyncio.get_running_loop()
+    offload = FEED_PARSE_BACKEND != "inline"
+    parser = StreamingFeedParser()
+    buffered: List[bytes] = []
+    entries: List[Dict[str, Any]] = []
+    read_bytes = 0
+    known_streak = 0
+    streak_time = 0.0
+    can_stop = entry_time is not None and newest_known is not None
+    started = time.perf_counter()
+
+    async for chunk in chunks:
+        read_bytes += len(chunk)
+        if read_bytes > max_bytes:
+            stats.stream_bytes_read += read_bytes
+            raise FeedTooLarge(f"{read_bytes} > {max_bytes} bytes")
+        buffered.append(chunk)
+
+        if parser is None:
+            continue
+        try:
+            if offload:
+                new_entries = await loop.run_in_executor(None, parser.feed, chunk)
+            else:
+                new_entries = parser.feed(chunk)
+        except ET.ParseError as e:
+            log.debug(f"Streaming indisponível para {url} ({e}). Usando feedparser.")
+            parser = None
+            continue
+
+        for entry in new_entries:
+            entries.append(entry)
+            ts = entry_time(entry) if can_stop and is_known(entry) else None
+            if ts is not None and known_streak and ts <= streak_time:
+                known_streak += 1
+            elif ts is not None and ts >= newest_known:
+                # Nada mais novo que o topo já visto pode vir depois desta entrada
+                known_streak = 1
+            else:
+                known_streak = 0
+            streak_time = ts or 0.0
+            if known_streak >= stop_after:
+                stats.stream_early_stops += 1
+                stats.stream_bytes_read += read_bytes
+                log.debug(
+                    f"⏹️ Streaming encerrado em {url}: {stop_after} itens já vistos "
+                    f"({len(entries)} entradas, {read_bytes / 1024:.0f} KB lidos)"
+                )
+                stats.feed_parse_ms[url] = round((time.perf_counter() - started) * 1000, 1)
+                return entries, True
+
+    stats.stream_bytes_read += read_bytes
+    if parser is None:
+        return await parse_feed(b"".join(buffered), url), False
+
+    stats.feed_parse_ms[url] = round((time.perf_counter() - started) * 1000, 1)
+    return entries, False
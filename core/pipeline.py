@@ -0,0 +1,179 @@
+"""
+Pipeline - Etapas assíncronas ligadas por filas limitadas.
+
+A varredura era uma sequência rígida: baixar todos os feeds, depois processar
+todos os resultados, depois o monitor HTML, depois persistir. O feed mais lento
+segurava o envio de tudo. Aqui cada etapa tem seus próprios workers e lê de uma
+asyncio.Queue com capacidade limitada: o item de um feed rápido segue até a
+entrega enquanto os lentos ainda estão baixando, e uma etapa lenta segura as
+anteriores (backpressure) em vez de acumular tudo na memória.
+
+Cada etapa é uma função `async def handler(item) -> Iterable | None`; o que ela
+devolve vai para a próxima etapa (lista vazia/None descarta o item, vários
+itens fazem fan-out). Por etapa são medidos: itens recebidos/emitidos, erros,
+tempo ocupado, tempo esperando entrada (etapa com fome), tempo bloqueado na
+fila cheia da etapa seguinte (backpressure) e a maior profundidade da fila.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+from settings import PIPELINE_QUEUE_SIZE
+
+log = logging.getLogger("CyberIntel")
+
+Handler = Callable[[Any], Awaitable[Optional[Iterable[Any]]]]
+
+# Marca de fim de fluxo (uma por worker da etapa seguinte)
+_DONE = object()
+
+
+class StageMetrics:
+    """Contadores de uma etapa durante uma execução do pipeline."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+        self.max_queue = 0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    @property
+    def wall(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "in": self.items_in,
+            "out": self.items_out,
+            "errors": self.errors,
+            "wall_s": round(self.wall, 3),
+            "busy_s": round(self.busy, 3),
+            "starved_s": round(self.starved, 3),
+            "blocked_s": round(self.blocked, 3),
+            "max_queue": self.max_queue,
+        }
+
+
+class Stage:
+    """Etapa do pipeline: nome, handler e quantidade de workers concorrentes."""
+
+    def __init__(self, name: str, handler: Handler, workers: int = 1):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+
+
+class Pipeline:
+    """
+    Executa etapas em sequência lógica, mas concorrentes no tempo.
+
+    Ordem: com 1 worker por etapa os itens saem na ordem em que entraram;
+    etapas com vários workers (ex: download) podem reordenar.
+    """
+
+    def __init__(self, stages: Sequence[Stage], queue_size: int = PIPELINE_QUEUE_SIZE):
+        if not stages:
+            raise ValueError("Pipeline precisa de ao menos uma etapa")
+        self.stages = list(stages)
+        self.queue_size = max(1, queue_size)
+        self.metrics: Dict[str, StageMetrics] = {}
+
+    async def run(self, items: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """Alimenta a primeira etapa com `items`, espera o fluxo esvaziar e devolve as métricas."""
+        self.metrics = {s.name: StageMetrics(s.name, s.workers) for s in self.stages}
+        queues: List[asyncio.Queue] = [asyncio.Queue(self.queue_size) for _ in self.stages]
+
+        async def feeder():
+            first = self.metrics[self.stages[0].name]
+            for item in items:
+                await self._put(queues[0], item, None, first)
+            for _ in range(self.stages[0].workers):
+                await queues[0].put(_DONE)
+
+        tasks = [asyncio.create_task(feeder())]
+        for index in range(len(self.stages)):
+            tasks.append(asyncio.create_task(self._run_stage(index, queues)))
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return self.stats()
+
+    async def _run_stage(self, index: int, queues: List[asyncio.Queue]) -> None:
+        stage = self.stages[index]
+        metrics = self.metrics[stage.name]
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(queues) else None
+        following = self.metrics[self.stages[index + 1].name] if outbox is not None else None
+
+        metrics.started = time.monotonic()
+        await asyncio.gather(*(self._worker(stage, metrics, inbox, outbox, following) for _ in range(stage.workers)))
+        metrics.finished = time.monotonic()
+
+        if outbox is not None:
+            for _ in range(following.workers):
+                await outbox.put(_DONE)
+
+    async def _worker(self, stage: Stage, metrics: StageMetrics,
+                      inbox: asyncio.Queue, outbox: Optional[asyncio.Queue],
+                      following: Optional[StageMetrics]) -> None:
+        while True:
+            waited = time.monotonic()
+            item = await inbox.get()
+            metrics.starved += time.monotonic() - waited
+            if item is _DONE:
+                return
+            metrics.items_in += 1
+
+            started = time.monotonic()
+            try:
+                produced = await stage.handler(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Um item problemático não derruba a varredura inteira
+                metrics.errors += 1
+                log.exception(f"❌ Etapa '{stage.name}' falhou em um item: {e}")
+                produced = None
+            finally:
+                metrics.busy += time.monotonic() - started
+
+            for out in produced or ():
+                metrics.items_out += 1
+                if outbox is not None:
+                    await self._put(outbox, out, metrics, following)
+
+    @staticmethod
+    async def _put(queue: asyncio.Queue, item: Any, producer: Optional[StageMetrics], consumer: StageMetrics) -> None:
+        """put() medindo o bloqueio do produtor (fila cheia) e a profundidade da fila do consumidor."""
+        if queue.full():
+            waited = time.monotonic()
+            await queue.put(item)
+            if producer is not None:
+                producer.blocked += time.monotonic() - waited
+        else:
+            queue.put_nowait(item)
+        consumer.max_queue = max(consumer.max_queue, queue.qsize())
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: m.snapshot() for name, m in self.metrics.items()}
+
+    def bottleneck(self) -> Optional[str]:
+        """Etapa com mais tempo ocupado por worker (candidata a gargalo)."""
+        if not self.metrics:
+            return None
+        return max(self.metrics.values(), key=lambda m: m.busy / m.workers).name
@@ -0,0 +1,197 @@
+"""
+Render module - Montagem de embeds/views das notícias com cache por varredura.
+
+O conteúdo de um alerta só varia por idioma, então o payload é construído uma
+única vez por (link, idioma) e reaproveitado por todas as guilds que aprovaram
+a notícia.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import discord
+
+from utils.html import clean_html, safe_discord_url
+from bot.views.share_buttons import ShareButtons
+
+log = logging.getLogger("CyberIntel")
+
+MEDIA_DOMAINS = ("youtube.com", "youtu.be", "twitch.tv")
+NVD_THUMBNAIL = "https://nvd.nist.gov/site-media/images/NIST_logo.svg?v=1"
+
+
+def classify_severity(title: str, link: str, feed_url: str, source_meta: Dict[str, Dict[str, str]]) -> Tuple[discord.Color, str, bool]:
+    """
+    Define severidade visual (cor, prefixo e flag crítico) combinando:
+    - prioridade/categoria do feed em sources.json
+    - palavras-chave no título
+    - domínio do link (ex: NVD)
+    """
+    meta = source_meta.get(feed_url, {})
+    priority = str(meta.get("priority", "Medium")).lower()
+    category = str(meta.get("category", "")).lower()
+    name = str(meta.get("name", "")).lower()
+
+    title_lower = title.lower()
+    link_lower = link.lower()
+
+    # Defaults
+    embed_color = discord.Color.from_rgb(0, 255, 204)  # Cyan Default
+    author_prefix = "🛡️ Intel Update"
+    is_critical = False
+
+    # Fonte crítica por natureza (Exploit, Ransomware, Vulnerability Intel, Regulatory)
+    if "exploit" in category or "poc" in category or "ransomware" in category:
+        priority = "critical"
+    if "regulatory" in category or "government" in category:
+        # Regulatório é alto impacto para GRC, mas não necessariamente incidente técnico
+        if priority not in ("high", "critical"):
+            priority = "high"
+
+    # Heurísticas por conteúdo
+    if any(word in title_lower for word in ("ransomware", "double extortion", "data leak", "data breach")):
+        is_critical = True
+
+    if any(word in title_lower for word in ("zero-day", "0-day", "exploit", "remote code execution", "rce")):
+        is_critical = True
+
+    # NVD / CVE explícito
+    if "nvd.nist.gov" in link_lower or "cve-" in title_lower:
+        # Se vier de Exploit-DB/ZDI/CVE feeds, trata como alta
+        if any(src in name for src in ("exploit-db", "zero day initiative", "zdi", "cve details")):
+            is_critical = True
+
+    # Marcações manuais (ex: título já com 🚨)
+    if "🚨" in title:
+        is_critical = True
+
+    # Aplica regras finais
+    if is_critical:
+        embed_color = discord.Color.from_rgb(255, 0, 0)  # Red
+        author_prefix = "🚨 CRITICAL ALERT"
+    elif priority in ("high", "critical"):
+        embed_color = discord.Color.from_rgb(255, 140, 0)  # Orange
+        if "regulatory" in category or "anpd" in name or "enisa" in name:
+            author_prefix = "📜 REGULATORY UPDATE"
+        elif "exploit" in category or "vulnerability" in category:
+            author_prefix = "⚠️ HIGH RISK"
+        else:
+            author_prefix = "⚠️ PRIORITY INTEL"
+    elif "regulatory" in category or "anpd" in name or "enisa" in name:
+        embed_color = discord.Color.from_rgb(0, 153, 255)  # Blue
+        author_prefix = "📜 REGULATORY UPDATE"
+
+    return embed_color, author_prefix, is_critical
+
+
+def _entry_thumbnail(entry: Any, link: str) -> Optional[str]:
+    """Extrai thumbnail de mídia (feedparser ou dict) com fallback para o logo do NIST."""
+    thumb_url = None
+    media = entry.get("media_thumbnail") if isinstance(entry, dict) else getattr(entry, "media_thumbnail", None)
+    if media:
+        try:
+            thumb_url = media[0].get("url")
+        except Exception as e:
+            log.debug(f"Falha ao extrair thumbnail de {link}: {e}")
+
+    if "nvd.nist.gov" in link:
+        thumb_url = NVD_THUMBNAIL
+    return thumb_url
+
+
+class RenderedMessage:
+    """Payload pronto para a fila de envio (content/embed/view)."""
+
+    __slots__ = ("content", "embed", "view", "is_critical")
+
+    def __init__(self, content: Optional[str], embed: Optional[discord.Embed],
+                 view: Optional[discord.ui.View], is_critical: bool):
+        self.content = content
+        self.embed = embed
+        self.view = view
+        self.is_critical = is_critical
+
+
+def render_entry(entry: Any, title: str, summary: str, link: str, feed_url: str,
+                 source_meta: Dict[str, Dict[str, str]], lang: str,
+                 bot_user: Optional[discord.ClientUser] = None) -> RenderedMessage:
+    """
+    Monta o payload de uma notícia (embed ou mensagem de mídia + botões de compartilhamento).
+
+    `lang` faz parte da chave de cache; a tradução está desativada (conteúdo original
+    para velocidade no SOC), então hoje o payload é o mesmo para todos os idiomas.
+    """
+    t_clean = clean_html(title).strip()
+    s_clean = clean_html(summary).strip()[:2000]
+
+    embed_color, author_prefix, is_critical = classify_severity(
+        title=title,
+        link=link,
+        feed_url=feed_url,
+        source_meta=source_meta,
+    )
+
+    # Validação Robust de URL para Discord
+    final_link = safe_discord_url(link)
+
+    # View com botões de compartilhamento (apenas botões de link: pode ser reenviada em vários canais)
+    view = ShareButtons(t_clean[:100], final_link or link, is_critical=is_critical)
+
+    if any(d in link for d in MEDIA_DOMAINS):
+        return RenderedMessage(f"📺 **{t_clean}**\n{final_link or link}", None, view, is_critical)
+
+    embed = discord.Embed(
+        title=t_clean[:256],
+        description=s_clean,
+        url=link,
+        color=embed_color,
+        timestamp=datetime.now()
+    )
+
+    icon_url = bot_user.avatar.url if bot_user and bot_user.avatar else None
+    embed.set_author(name=author_prefix, icon_url=icon_url)
+
+    source_domain = urlparse(link).netloc
+    embed.set_footer(text=f"Fonte: {source_domain} • CyberIntel SOC")
+
+    thumb_url = _entry_thumbnail(entry, link)
+    if thumb_url:
+        embed.set_thumbnail(url=thumb_url)
+
+    if not final_link:
+        embed.description = (embed.description or "") + f"\n\n🔗 **Link Original:** {link}"
+
+    return RenderedMessage(None, embed, view, is_critical)
+
+
+class RenderCache:
+    """
+    Cache de payloads por (link, idioma), válido durante uma varredura.
+
+    Contadores:
+        built  - payloads efetivamente construídos
+        reused - envios que reaproveitaram um payload já construído
+    """
+
+    def __init__(self):
+        self._items: Dict[Tuple[str, str], RenderedMessage] = {}
+        self.built = 0
+        self.reused = 0
+
+    def get_or_render(self, entry: Any, title: str, summary: str, link: str, feed_url: str,
+                      source_meta: Dict[str, Dict[str, str]], lang: str,
+                      bot_user: Optional[discord.ClientUser] = None) -> RenderedMessage:
+        key = (link, lang)
+        rendered = self._items.get(key)
+        if rendered is not None:
+            self.reused += 1
+            return rendered
+
+        rendered = render_entry(entry, title, summary, link, feed_url, source_meta, lang, bot_user)
+        self._items[key] = rendered
+        self.built += 1
+        return rendered
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -1,16 +1,13 @@
 """
 Scanner module - Feed fetching and processing logic.
 """
-import ssl
 import socket
 import asyncio
 import logging
-import feedparser
 import aiohttp
-import certifi
 from datetime import datetime, timedelta, timezone
 from dateutil import parser as dtparser
-from typing import List, Set, Tuple, Dict, Any
+from typing import List, Mapping, Optional, Set, Tuple, Dict, Any
 from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 import time
 import os
@@ -18,7 +15,7 @@ import os
 import discord
 from discord.ext import tasks
 
-from settings import LOOP_MINUTES, NODE_RED_ENDPOINT
+from settings import LOOP_MINUTES, SCAN_TICK_MINUTES, FEED_ADAPTIVE_POLLING, FEED_MAX_BYTES, FEED_STREAM_PARSE, FEED_STREAM_STOP_AFTER, FEED_PARSE_WORKERS
 
 # User-Agent de navegador comum para reduzir bloqueios (ex.: CISA)
 BROWSER_USER_AGENT = (
@@ -31,16 +28,26 @@ CONNECTIVITY_CHECK_HOST = "8.8.8.8"
 CONNECTIVITY_CHECK_PORT = 53
 CONNECTIVITY_CHECK_TIMEOUT = 3
 
-from utils.storage import p, load_json_safe, save_json_safe
-from utils.html import clean_html, safe_discord_url
-from utils.cache import load_http_state, save_http_state, get_cache_headers, update_cache_state
+from utils.storage import p, load_json_safe, save_json_safe, load_state, save_state, use_sqlite_state, get_state_store
+from utils.seen_store import LinkIndex, SeenStore
+from utils.config import config_service
+from utils.persistence import persistence
+from utils.http import http_client, transfer_stats, ACCEPT_ENCODING
+from utils.cache import load_http_state, save_http_state, update_cache_state, FingerprintReader, ValidatorCache
 # from utils.translator import translate_to_target, t (Removido sistema legado)
 from core.stats import stats
-from core.filters import match_intel
-from core.html_monitor import check_official_sites
+from core.delivery import delivery
+from core.filters import match_intel, engine as filter_engine
+from core.parsing import parse_feed, stream_feed_entries, FeedTooLarge, STREAM_CHUNK_SIZE
+from core.html_monitor import check_official_sites, load_official_sites
 from src.services.cveService import fetch_nvd_cves
 from src.services.threatService import ThreatService
-from bot.views.share_buttons import ShareButtons
+from core.render import RenderCache
+from core.fetch_scheduler import fetch_scheduler, HostBackoff, THROTTLE_STATUSES
+from core.feed_schedule import FeedSchedule
+from core.source_health import source_health, HALF_OPEN, PROBE_TIMEOUT
+from core.pipeline import Pipeline, Stage
+from core.nodered_outbox import nodered_outbox
 
 log = logging.getLogger("CyberIntel")
 
@@ -52,21 +59,70 @@ scan_lock = asyncio.Lock()
 # HISTORY MANAGEMENT
 # =========================================================
 
-def load_history() -> Tuple[List[str], Set[str]]:
-    """Carrega history.json e devolve (lista, set) para dedupe rápido."""
-    h = load_json_safe(p("history.json"), [])
+HISTORY_LIMIT = 2000
+
+# Chaves de intervalo fixo (LOOP_MINUTES) na agenda de polling
+FIXED_SCHEDULE_KEYS = ("api://nvd", "api://otx", "html://official")
+
+
+def load_history(limit: int = HISTORY_LIMIT) -> LinkIndex:
+    """Carrega history.json em um LinkIndex (membership O(1), limitado a `limit` links)."""
+    if use_sqlite_state():
+        h = get_state_store().load_history()
+    else:
+        h = load_json_safe(p("history.json"), [])
     if not isinstance(h, list):
         log.warning("history.json inválido. Reiniciando histórico.")
         h = []
     
-    # Filtra apenas strings para evitar erros
-    h = [x for x in h if isinstance(x, str)]
-    return h, set(h)
+    # Filtra apenas strings para evitar erros (LinkIndex.load ignora o resto)
+    return LinkIndex(max_items=limit, ttl=None, items=h)
 
 
-def save_history(history_list: List[str], limit: int = 2000) -> None:
-    """Mantém histórico limitado para não crescer infinito."""
-    save_json_safe(p("history.json"), history_list[-limit:])
+def save_history(history: LinkIndex) -> None:
+    """Persiste o histórico (já limitado pelo LinkIndex) como lista, formato original do arquivo."""
+    if use_sqlite_state():
+        get_state_store().save_history(history.to_list())
+    else:
+        save_json_safe(p("history.json"), history.to_list())
+
+
+# =========================================================
+# CONFIRMAÇÃO DE ENTREGA
+# =========================================================
+#
+# O link só entra no dedup/histórico depois que o Discord aceita a mensagem
+# (callback da DeliveryQueue). Enquanto o envio está na fila o link fica em
+# _inflight_links (varreduras seguintes não o reenfileiram); se nenhum canal
+# recebeu, ele simplesmente não é marcado e volta na próxima varredura.
+
+_inflight_links: Set[str] = set()
+# Entregas confirmadas ainda não aplicadas no dedup/histórico: (feed, link)
+_confirmed_links: List[Tuple[str, str]] = []
+
+
+def apply_confirmed_links(seen: SeenStore, history: LinkIndex) -> int:
+    """Aplica as entregas confirmadas no dedup/histórico carregados. Retorna quantas aplicou."""
+    applied = len(_confirmed_links)
+    for feed, link in _confirmed_links:
+        seen.add(feed, link)
+        history.add(link)
+    _confirmed_links.clear()
+    return applied
+
+
+async def persist_confirmed_links() -> None:
+    """Grava as entregas confirmadas fora de uma varredura (ex: encerramento do bot)."""
+    # Com uma varredura em andamento, ela mesma aplica e grava as confirmações no fim
+    if not _confirmed_links or scan_lock.locked():
+        return
+    state = await persistence.run(load_state)
+    history = await persistence.run(load_history)
+    seen = SeenStore.from_state(state.get("dedup", {}))
+    apply_confirmed_links(seen, history)
+    state["dedup"] = seen.to_state()
+    await persistence.write("history", save_history, history)
+    await persistence.write("state", save_state, state, wait=True)
 
 
 # =========================================================
@@ -137,8 +193,17 @@ def load_sources_meta() -> Dict[str, Dict[str, str]]:
                                 "category": item.get("category", ""),
                                 "priority": item.get("priority", "Medium"),
                             }
+                            # Limite opcional do corpo por fonte (bytes descomprimidos)
+                            if isinstance(item.get("max_bytes"), int) and item["max_bytes"] > 0:
+                                index[url]["max_bytes"] = item["max_bytes"]
     return index
 
+
+def source_max_bytes(meta: Optional[Mapping[str, Any]]) -> int:
+    """Limite do corpo de uma fonte: `max_bytes` do sources.json ou FEED_MAX_BYTES."""
+    value = (meta or {}).get("max_bytes")
+    return value if isinstance(value, int) and value > 0 else FEED_MAX_BYTES
+
 # utils/html.py handle link sanitization
 def sanitize_link(link: str) -> str:
     """
@@ -181,7 +246,8 @@ def parse_entry_dt(entry: Any) -> datetime:
     """
     Tenta extrair a data de publicação de forma robusta.
     Retorna datetime (com tzinfo se possível) ou None.
-    Aceita tanto objeto feedparser (getattr) quanto dict (get).
+    Aceita tanto objeto feedparser (getattr) quanto dict (get), inclusive os
+    dicts simples vindos de core.parsing (com "published_parsed" em tupla).
     """
     try:
         # Tenta dateutil primeiro (ISO 8601 do YouTube)
@@ -195,90 +261,28 @@ def parse_entry_dt(entry: Any) -> datetime:
     except:
         pass
     
-    # Fallback para struct_time do feedparser (apenas objetos)
-    if not isinstance(entry, dict):
-        try:
+    # Fallback para struct_time/tupla do feedparser (RFC 822 não passa no isoparse)
+    try:
+        if isinstance(entry, dict):
+            st = entry.get("published_parsed") or entry.get("updated_parsed")
+        else:
             st = getattr(entry, "published_parsed", None) or getattr(entry, "updated_parsed", None)
-            if st:
-                return datetime(*st[:6], tzinfo=timezone.utc)
-        except:
-            pass
+        if st:
+            return datetime(*st[:6], tzinfo=timezone.utc)
+    except:
+        pass
         
     return None
 
 
-def classify_severity(title: str, link: str, feed_url: str, source_meta: Dict[str, Dict[str, str]]) -> Tuple[discord.Color, str, bool]:
-    """
-    Define severidade visual (cor, prefixo e flag crítico) combinando:
-    - prioridade/categoria do feed em sources.json
-    - palavras-chave no título
-    - domínio do link (ex: NVD)
-    """
-    meta = source_meta.get(feed_url, {})
-    priority = str(meta.get("priority", "Medium")).lower()
-    category = str(meta.get("category", "")).lower()
-    name = str(meta.get("name", "")).lower()
-
-    title_lower = title.lower()
-    link_lower = link.lower()
-
-    # Defaults
-    embed_color = discord.Color.from_rgb(0, 255, 204)  # Cyan Default
-    author_prefix = "🛡️ Intel Update"
-    is_critical = False
-
-    # Fonte crítica por natureza (Exploit, Ransomware, Vulnerability Intel, Regulatory)
-    if "exploit" in category or "poc" in category or "ransomware" in category:
-        priority = "critical"
-    if "regulatory" in category or "government" in category:
-        # Regulatório é alto impacto para GRC, mas não necessariamente incidente técnico
-        if priority not in ("high", "critical"):
-            priority = "high"
-
-    # Heurísticas por conteúdo
-    if any(word in title_lower for word in ("ransomware", "double extortion", "data leak", "data breach")):
-        is_critical = True
-
-    if any(word in title_lower for word in ("zero-day", "0-day", "exploit", "remote code execution", "rce")):
-        is_critical = True
-
-    # NVD / CVE explícito
-    if "nvd.nist.gov" in link_lower or "cve-" in title_lower:
-        # Se vier de Exploit-DB/ZDI/CVE feeds, trata como alta
-        if any(src in name for src in ("exploit-db", "zero day initiative", "zdi", "cve details")):
-            is_critical = True
-
-    # Marcações manuais (ex: título já com 🚨)
-    if "🚨" in title:
-        is_critical = True
-
-    # Aplica regras finais
-    if is_critical:
-        embed_color = discord.Color.from_rgb(255, 0, 0)  # Red
-        author_prefix = "🚨 CRITICAL ALERT"
-    elif priority in ("high", "critical"):
-        embed_color = discord.Color.from_rgb(255, 140, 0)  # Orange
-        if "regulatory" in category or "anpd" in name or "enisa" in name:
-            author_prefix = "📜 REGULATORY UPDATE"
-        elif "exploit" in category or "vulnerability" in category:
-            author_prefix = "⚠️ HIGH RISK"
-        else:
-            author_prefix = "⚠️ PRIORITY INTEL"
-    elif "regulatory" in category or "anpd" in name or "enisa" in name:
-        embed_color = discord.Color.from_rgb(0, 153, 255)  # Blue
-        author_prefix = "📜 REGULATORY UPDATE"
-
-    return embed_color, author_prefix, is_critical
-
-
 # =========================================================
 # SCANNER LOGIC
 # =========================================================
 
 def _log_next_run() -> None:
     """Log explícito do próximo horário de varredura."""
-    nxt = datetime.now() + timedelta(minutes=LOOP_MINUTES)
-    log.info(f"⏳ Aguardando próxima varredura às {nxt:%Y-%m-%d %H:%M:%S} (em {LOOP_MINUTES} min)...")
+    nxt = datetime.now() + timedelta(minutes=SCAN_TICK_MINUTES)
+    log.info(f"⏳ Aguardando próxima varredura às {nxt:%Y-%m-%d %H:%M:%S} (em {SCAN_TICK_MINUTES} min)...")
 
 
 def _check_connectivity_sync() -> bool:
@@ -328,37 +332,70 @@ async def run_scan_once(bot: discord.Client, trigger: str = "manual", bypass_cac
         log.info(f"🔎 Iniciando varredura de inteligência... (trigger={trigger}, bypass={bypass_cache})")
 
 
-        config = load_json_safe(p("config.json"), {})
+        # Snapshot imutável do config.json (cache em memória, invalidado se o arquivo mudar)
+        config = config_service.snapshot()
         
         # Verifica se há guilds configuradas
-        if not config or not any(isinstance(v, dict) and v.get("channel_id") for v in config.values()):
+        if not config or not any(isinstance(v, Mapping) and v.get("channel_id") for v in config.values()):
             log.warning("⚠️ Nenhuma guild configurada com 'channel_id'. Use /dashboard para configurar.")
             _log_next_run()
             return
             
-        urls = load_sources()
+        # I/O de disco na thread de persistência (não trava o event loop/heartbeat)
+        urls = await persistence.run(load_sources)
         if not urls:
             log.warning("Nenhuma URL válida em sources.json.")
             _log_next_run()
             return
 
         # Índice de metadados das fontes (para severidade visual)
-        source_meta = load_sources_meta()
+        source_meta = await persistence.run(load_sources_meta)
 
         # =========================================================
         # UNIFIED STATE MANAGEMENT & AUTO-CLEANUP
         # =========================================================
         from utils.state_cleanup import check_and_cleanup_state
 
-        # Caminho do arquivo de estado unificado
-        state_file = p("state.json")
-
         # Verifica e limpa state.json se necessário (por tempo ou tamanho)
-        state = check_and_cleanup_state(force=False)
+        state = await persistence.run(check_and_cleanup_state, force=False)
         
-        http_cache = state["http_cache"]
+        # Validadores HTTP (ETag/Last-Modified/hash do corpo) com evição LRU/TTL por URL
+        http_cache = ValidatorCache.from_state(state["http_cache"])
+        official_sites = await persistence.run(load_official_sites)
+        evicted = http_cache.prune(list(urls) + [site["url"] for site in official_sites])
+        if evicted:
+            log.info(f"🧹 Cache HTTP: {evicted} validador(es) removido(s) (fora do sources.json ou sem uso)")
         html_hashes = state["html_hashes"]
-        history_list, history_set = load_history()
+        history = await persistence.run(load_history)
+        # Dedup por feed com membership O(1) e evição gradual (LRU/TTL)
+        seen = SeenStore.from_state(state["dedup"])
+        # Entregas confirmadas depois do fim da varredura anterior
+        apply_confirmed_links(seen, history)
+
+        # Polling adaptativo: no loop só entram os feeds vencidos; disparos manuais buscam tudo
+        schedule = FeedSchedule.from_state(state.get("feed_schedule"))
+        schedule.prune(urls)
+        full_scan = trigger != "loop" or not FEED_ADAPTIVE_POLLING
+        due_urls = urls if full_scan else schedule.due(urls)
+
+        # Circuit breaker: fontes com falhas seguidas ficam de fora até o fim do cooldown
+        source_health.load(state.get("source_health"))
+        allowed = source_health.filter(due_urls)
+        if len(allowed) < len(due_urls):
+            log.info(f"🔌 {len(due_urls) - len(allowed)} fonte(s) em quarentena (circuito aberto) nesta varredura.")
+        due_urls = allowed
+        # APIs e monitor HTML mantêm o intervalo fixo de LOOP_MINUTES
+        fixed_due = set(FIXED_SCHEDULE_KEYS) if full_scan else set(schedule.due(FIXED_SCHEDULE_KEYS))
+        if not due_urls and not fixed_due:
+            nxt = schedule.next_due(urls)
+            log.info(
+                f"⏭️ Nenhum feed vencido ({len(urls)} agendados"
+                + (f", próximo às {datetime.fromtimestamp(nxt):%H:%M}" if nxt else "") + ")."
+            )
+            _log_next_run()
+            return
+        if not full_scan:
+            log.info(f"🗓️ Feeds vencidos: {len(due_urls)}/{len(urls)}")
 
         # Check-up de conectividade antes de iniciar download dos feeds
         if not await check_network_connectivity():
@@ -366,87 +403,172 @@ async def run_scan_once(bot: discord.Client, trigger: str = "manual", bypass_cac
             _log_next_run()
             return
 
-        # SSL Configuration
-        ssl_ctx = ssl.create_default_context(cafile=certifi.where())
         # User-Agent de navegador (Chrome/Windows) para evitar bloqueio em sites como CISA
         base_headers = {
             "User-Agent": BROWSER_USER_AGENT,
             "Accept-Language": "en-US,en;q=0.9",
+            "Accept-Encoding": ACCEPT_ENCODING,
         }
-        timeout = aiohttp.ClientTimeout(total=30)
-        connector = aiohttp.TCPConnector(ssl=ssl_ctx)
 
         sent_count = 0
         cache_hits = 0
+        body_hash_hits = 0
+        render_cache = RenderCache()
         
-        MAX_CONCURRENT_FEEDS = 5
-        semaphore = asyncio.Semaphore(MAX_CONCURRENT_FEEDS)
+        not_modified: Set[str] = set()
 
         async def fetch_and_process_feed(session, url):
-            nonlocal cache_hits, state
-            
-            async with semaphore:
-                if "youtube.com" in url or "youtu.be" in url:
-                    await asyncio.sleep(2)
+            nonlocal cache_hits, body_hash_hits, state
+
+            # Garante User-Agent de navegador em toda requisição (cache headers são extras)
+            request_headers = {**http_cache.headers(url), "User-Agent": BROWSER_USER_AGENT}
+            max_bytes = source_max_bytes(source_meta.get(url))
 
-                # Garante User-Agent de navegador em toda requisição (cache headers são extras)
-                request_headers = {**get_cache_headers(url, http_cache), "User-Agent": BROWSER_USER_AGENT}
+            # Fonte saindo da quarentena: uma única tentativa curta decide se o circuito fecha
+            probe = source_health.state(url) == HALF_OPEN
+            max_attempts = 1 if probe else FEED_FETCH_MAX_RETRIES
+            get_kwargs = {"timeout": aiohttp.ClientTimeout(total=PROBE_TIMEOUT)} if probe else {}
+
+            for attempt in range(max_attempts):
+                try:
+                    # Vez do host (limite/intervalo/Retry-After) + vaga no limite global adaptativo
+                    async with fetch_scheduler.slot(url) as ticket:
+                        async with session.get(url, headers=request_headers, **get_kwargs) as resp:
+                            ticket.observe(resp.status, resp.headers)
+
+                            if resp.status in THROTTLE_STATUSES:
+                                # O agendador já colocou o host em espera (Retry-After); nova tentativa aguarda o prazo
+                                continue
 
-                for attempt in range(FEED_FETCH_MAX_RETRIES):
-                    try:
-                        async with session.get(url, headers=request_headers) as resp:
                             if resp.status == 304:
                                 cache_hits += 1
+                                not_modified.add(url)
+                                http_cache.hit()
+                                source_health.record_success(url)
                                 log.debug(f"📦 Cache hit: {url} (304)")
                                 return None
 
                             if resp.status == 431:
                                 log.warning(f"⚠️ Twitter/X Error: Header value too long (431) - {url}")
+                                source_health.record_failure(url, "HTTP 431")
                                 return None
 
-                            update_cache_state(url, resp.headers, http_cache)
-                            text = await resp.text(errors="ignore")
-
-                        loop = asyncio.get_running_loop()
-                        feed = await loop.run_in_executor(None, lambda: feedparser.parse(text))
-
-                        entries = getattr(feed, "entries", []) or []
-                        return (url, entries)
-
-                    except asyncio.CancelledError:
-                        # Não engolir: deixa o cancelamento propagar (ex.: shutdown do bot)
-                        raise
-                    except asyncio.TimeoutError:
-                        if attempt < FEED_FETCH_MAX_RETRIES - 1:
-                            await asyncio.sleep(FEED_FETCH_RETRY_DELAY)
-                            continue
-                        log.warning(
-                            "⏱️ Timeout ao baixar feed (30s) após %d tentativas: %s...",
-                            FEED_FETCH_MAX_RETRIES,
-                            url[:60],
-                        )
-                        return None
-                    except Exception as e:
-                        log.exception(f"❌ Falha ao baixar feed '{url}': {e}")
-                        return None
+                            if resp.status >= 400:
+                                log.warning(f"⚠️ Feed retornou HTTP {resp.status}: {url[:60]}")
+                                source_health.record_failure(url, f"HTTP {resp.status}")
+                                return None
 
-                return None
+                            if resp.content_length and resp.content_length > max_bytes:
+                                log.warning(f"📏 Feed ignorado (Content-Length {resp.content_length} > {max_bytes} bytes): {url}")
+                                source_health.record_failure(url, f"Content-Length {resp.content_length} > {max_bytes}")
+                                return None
 
-        async with aiohttp.ClientSession(connector=connector, headers=base_headers, timeout=timeout) as session:
-            # 1. Fetch RSS Feeds
-            tasks = [fetch_and_process_feed(session, url) for url in urls]
-            results = await asyncio.gather(*tasks)
-            
-            # 2. Fetch CVEs (NIST API)
-            try:
-                cve_entries = await fetch_nvd_cves()
-                if cve_entries:
-                    log.info(f"🔎 Encontradas {len(cve_entries)} novas vulnerabilidades críticas (NVD).")
-                    results.append(("api://nvd", cve_entries))
-            except Exception as e:
-                log.exception(f"❌ Falha ao buscar CVEs: {e}")
+                            # Servidores que ignoram ETag/Last-Modified: corpo idêntico ao da última leitura
+                            # (hash + tamanho) equivale a um 304, sem parse nem processamento de entradas
+                            reader = FingerprintReader(resp.content.iter_chunked(STREAM_CHUNK_SIZE), url, http_cache)
+                            if not bypass_cache and await reader.unchanged():
+                                transfer_stats.record_response(url, resp, reader.received)
+                                cache_hits += 1
+                                body_hash_hits += 1
+                                not_modified.add(url)
+                                http_cache.hit()
+                                update_cache_state(url, resp.headers, http_cache)
+                                source_health.record_success(url)
+                                log.debug(f"📦 Cache hit: {url} (corpo inalterado)")
+                                return None
+
+                            # Parse incremental: só faz sentido se já existe histórico para o feed
+                            if FEED_STREAM_PARSE and not bypass_cache and seen.has_feed(url):
+
+                                def _is_known(entry):
+                                    link = entry.get("link")
+                                    if not link:
+                                        return False
+                                    link = sanitize_link(link)
+                                    return seen.contains(url, link) or link in history
+
+                                def _entry_time(entry):
+                                    dt = parse_entry_dt(entry)
+                                    return dt.timestamp() if dt else None
+
+                                try:
+                                    entries, stopped = await stream_feed_entries(
+                                        reader,
+                                        url,
+                                        _is_known,
+                                        stop_after=FEED_STREAM_STOP_AFTER,
+                                        max_bytes=max_bytes,
+                                        entry_time=_entry_time,
+                                        newest_known=schedule.last_entry(url),
+                                    )
+                                except FeedTooLarge:
+                                    transfer_stats.record_response(url, resp, reader.received)
+                                    log.warning(f"📏 Feed ignorado (> {max_bytes} bytes durante streaming): {url}")
+                                    source_health.record_failure(url, f"corpo > {max_bytes} bytes")
+                                    return None
+                                transfer_stats.record_response(url, resp, reader.received)
+                                # Cache só é atualizado se o feed foi lido (total ou parcialmente)
+                                if entries:
+                                    update_cache_state(url, resp.headers, http_cache)
+                                    reader.remember(partial=stopped)
+                                http_cache.miss()
+                                source_health.record_success(url)
+                                return (url, entries)
+
+                            body = await reader.read(max_bytes)
+                            transfer_stats.record_response(url, resp, reader.received)
+                            if body is None:
+                                log.warning(f"📏 Feed ignorado (> {max_bytes} bytes): {url}")
+                                source_health.record_failure(url, f"corpo > {max_bytes} bytes")
+                                return None
+
+                            update_cache_state(url, resp.headers, http_cache)
+                            reader.remember()
+                            http_cache.miss()
+
+                    # Corpo bruto: o parse acontece na etapa seguinte, fora da vaga de rede
+                    source_health.record_success(url)
+                    return (url, body)
+
+                except HostBackoff as e:
+                    log.info(f"⏸️ Feed pulado nesta varredura ({e}): {url[:60]}")
+                    return None
+                except asyncio.CancelledError:
+                    # Não engolir: deixa o cancelamento propagar (ex.: shutdown do bot)
+                    raise
+                except asyncio.TimeoutError:
+                    if attempt < max_attempts - 1:
+                        await asyncio.sleep(FEED_FETCH_RETRY_DELAY)
+                        continue
+                    log.warning(
+                        "⏱️ Timeout ao baixar feed após %d tentativa(s): %s...",
+                        max_attempts,
+                        url[:60],
+                    )
+                    source_health.record_failure(url, "timeout")
+                    return None
+                except Exception as e:
+                    log.exception(f"❌ Falha ao baixar feed '{url}': {e}")
+                    source_health.record_failure(url, f"{type(e).__name__}: {e}")
+                    return None
+
+            log.warning(f"🐢 Feed limitado pelo servidor (429/503) após {max_attempts} tentativa(s): {url[:60]}")
+            source_health.record_failure(url, "HTTP 429/503")
+            return None
+
+        async def fetch_api(key):
+            """Fontes de API (NVD/OTX) entram no pipeline como se fossem feeds."""
+            schedule.touch(key, LOOP_MINUTES * 60)
+            if key == "api://nvd":
+                try:
+                    cve_entries = await fetch_nvd_cves()
+                    if cve_entries:
+                        log.info(f"🔎 Encontradas {len(cve_entries)} novas vulnerabilidades críticas (NVD).")
+                        return (key, cve_entries)
+                except Exception as e:
+                    log.exception(f"❌ Falha ao buscar CVEs: {e}")
+                return None
 
-            # 3. Fetch OTX Pulses
             try:
                 otx_pulses = await ThreatService.get_otx_pulses()
                 if otx_pulses:
@@ -462,232 +584,282 @@ async def run_scan_once(bot: discord.Client, trigger: str = "manual", bypass_cac
                             "source": "AlienVault OTX",
                             "published": p_item.get("created")
                         })
-                    results.append(("api://otx", formatted_pulses))
+                    return (key, formatted_pulses)
             except Exception as e:
                 log.exception(f"❌ Falha ao buscar OTX Pulses: {e}")
+            return None
 
-            # 4. Process All Results
-            for result in results:
-                if result is None:
+        # =========================================================
+        # PIPELINE: fetch → parse → normalize/dedupe → filter → render → deliver → persist
+        # =========================================================
+        # Links reivindicados nesta varredura: o mesmo link em dois feeds só segue uma vez
+        claimed: Set[str] = set()
+        # Envios por feed em cold start (limite de 3 por feed)
+        cold_posted: Dict[str, int] = {}
+
+        async def stage_fetch(key):
+            if key.startswith("api://"):
+                result = await fetch_api(key)
+                return [result] if result else None
+            result = await fetch_and_process_feed(session, key)
+            if result is None:
+                # 304/corpo igual aumenta o intervalo aos poucos; falha mantém
+                schedule.record(key, not_modified=key in not_modified, failed=key not in not_modified,
+                                priority=source_meta.get(key, {}).get("priority"))
+                return None
+            return [result]
+
+        async def stage_parse(item):
+            key, payload = item
+            if isinstance(payload, bytes):
+                try:
+                    # Parse fora do event loop (pool de processos por padrão)
+                    payload = await parse_feed(payload, key)
+                except Exception as e:
+                    log.exception(f"❌ Falha no parse do feed '{key}': {e}")
+                    source_health.record_failure(key, f"parse: {type(e).__name__}: {e}")
+                    schedule.record(key, failed=True, priority=source_meta.get(key, {}).get("priority"))
+                    return None
+            if not key.startswith("api://"):
+                # Reagenda conforme a cadência de publicação observada
+                entry_times = [dt.timestamp() for dt in map(parse_entry_dt, payload) if dt]
+                schedule.record(key, entry_times=entry_times, priority=source_meta.get(key, {}).get("priority"))
+            return [(key, payload)]
+
+        async def stage_normalize(item):
+            url, entries = item
+            is_cold_start = not seen.has_feed(url)
+            if is_cold_start:
+                log.info(f"❄️ [Cold Start] Detectado para {url}. Ignorando travas de tempo para os 3 primeiros posts.")
+                seen.feed(url)
+
+            out = []
+            for entry in entries:
+                link = entry.get("link") or ""
+                title = entry.get("title") or ""
+                summary = entry.get("summary") or entry.get("description") or ""
+
+                if not link: continue
+                link = sanitize_link(link)
+
+                # Deduplicação (Ignorada em modo Bypass)
+                if not bypass_cache:
+                    # touch: link ainda listado no feed não expira do índice
+                    if seen.contains(url, link, touch=True):
+                        continue
+                    if link in history or link in claimed or link in _inflight_links:
+                        continue
+
+                # Filtro de Data
+                entry_dt = parse_entry_dt(entry)
+                if entry_dt:
+                    now = datetime.now(entry_dt.tzinfo) if entry_dt.tzinfo else datetime.now()
+                    age = now - entry_dt
+                    if not is_cold_start and age.days > 7:
+                        log.debug(f"👴 [Old] Ignorado (idade {age.days}d): {link}")
+                        continue
+
+                claimed.add(link)
+                out.append({"feed": url, "entry": entry, "link": link, "title": title,
+                            "summary": summary, "cold_start": is_cold_start})
+            return out
+
+        async def stage_filter(item):
+            # Avalia o conteúdo uma única vez; cada guild só faz interseção de conjuntos
+            verdict = filter_engine.evaluate(item["title"], item["summary"])
+            targets = []
+            for gid, gdata in config.items():
+                if not isinstance(gdata, Mapping): continue
+
+                channel_id = gdata.get("channel_id")
+                if not isinstance(channel_id, int): continue
+
+                if not match_intel(str(gid), item["title"], item["summary"], config, verdict=verdict):
+                    log.debug(f"🛡️ [Filtro] Guild {gid} bloqueou: {item['title'][:50]}...")
                     continue
-                    
-                url, entries = result
-                
-                is_cold_start = url not in state["dedup"]
-                if is_cold_start:
-                    log.info(f"❄️ [Cold Start] Detectado para {url}. Ignorando travas de tempo para os 3 primeiros posts.")
-                    state["dedup"][url] = []
-                
-                feed_posted_count = 0
-                
-                for entry in entries:
-                    # Suporte a dict (CVE) ou objeto feedparser (RSS)
-                    if isinstance(entry, dict):
-                        link = entry.get("link") or ""
-                        title = entry.get("title") or ""
-                        summary = entry.get("summary") or ""
-                    else:
-                        link = entry.get("link") or ""
-                        title = entry.get("title") or ""
-                        summary = entry.get("summary") or entry.get("description") or ""
-
-                    if not link: continue
-                    link = sanitize_link(link)
-                    
-                    # Deduplicação (Ignorada em modo Bypass)
-                    if not bypass_cache:
-                        if link in state["dedup"].get(url, []):
-                            continue
-                        if link in history_set:
-                            continue
-
-                    # Em modo bypass, pegamos apenas a primeira notícia total para evitar flood
-                    if bypass_cache and sent_count >= 1: break
-                    if is_cold_start and feed_posted_count >= 3: continue
-
-                    # Filtro de Data
-                    entry_dt = parse_entry_dt(entry)
-                    if entry_dt:
-                        now = datetime.now(entry_dt.tzinfo) if entry_dt.tzinfo else datetime.now()
-                        age = now - entry_dt
-                        if not is_cold_start and age.days > 7:
-                            log.debug(f"👴 [Old] Ignorado (idade {age.days}d): {link}")
-                            continue
-
-                    posted_anywhere = False
-
-                    # Loop de Envio para Guilds
-                    for gid, gdata in config.items():
-                        if not isinstance(gdata, dict): continue
-                        
-                        channel_id = gdata.get("channel_id")
-                        if not isinstance(channel_id, int): continue
-
-                        if not match_intel(str(gid), title, summary, config):
-                            log.debug(f"🛡️ [Filtro] Guild {gid} bloqueou: {title[:50]}...")
-                            continue
-                        
-                        log.info(f"✨ [Match] Guild {gid} aprovou: {title[:50]}...")
-                        channel = bot.get_channel(channel_id)
-                        
-                        if channel is None:
-                            log.warning(f"Canal {channel_id} não encontrado.")
-                            continue
-
-                        t_clean = clean_html(title).strip()
-                        s_clean = clean_html(summary).strip()[:2000]
-
-                        target_lang = "en_US"
-                        if str(gid) in config and "language" in config[str(gid)]:
-                            target_lang = config[str(gid)]["language"]
-                        
-                        # Skip translation - Using original content for SOC speed
-                        t_translated = t_clean 
-                        s_translated = s_clean
-
-                        # Detector de Mídia
-                        media_domains = ("youtube.com", "youtu.be", "twitch.tv")
-                        # Lógica de Severidade Visual
-                        cvss_score = 0.0
-                        if isinstance(entry, dict) and "cvss" in entry:
-                            # Se vier da API com score
-                            # (Nota: no cveService já filtramos > 7.0)
-                            pass 
-
-                        # Severidade visual baseada em fonte + conteúdo
-                        embed_color, author_prefix, is_critical = classify_severity(
-                            title=title,
-                            link=link,
-                            feed_url=url,
-                            source_meta=source_meta,
-                        )
-
-                        try:
-                            embed = discord.Embed(
-                                title=t_translated[:256],
-                                description=s_translated,
-                                url=link,
-                                color=embed_color,
-                                timestamp=datetime.now()
-                            )
-                            
-                            # from utils.translator import t (Removido)
-                            # author_name = t.get('embed.author', lang=target_lang) 
-                            # Substituído pelo prefixo dinâmico de severidade
-                            
-                            icon_url = bot.user.avatar.url if bot.user and bot.user.avatar else None
-                            embed.set_author(name=author_prefix, icon_url=icon_url)
-                            
-                            source_domain = urlparse(link).netloc
-                            footer_text = f"Fonte: {source_domain} • CyberIntel SOC"
-                            embed.set_footer(text=footer_text)
-                            
-                            thumb_url = None
-                            if hasattr(entry, "media_thumbnail") and entry.media_thumbnail:
-                                try:
-                                    thumb_url = entry.media_thumbnail[0].get("url")
-                                    if thumb_url:
-                                        embed.set_thumbnail(url=thumb_url)
-                                except Exception as e:
-                                    log.debug(f"Falha ao extrair thumbnail de {link}: {e}")
-                            
-                            if "nvd.nist.gov" in link:
-                                 thumb_url = "https://nvd.nist.gov/site-media/images/NIST_logo.svg?v=1"
-
-                            if thumb_url:
-                                embed.set_thumbnail(url=thumb_url)
-
-                            # Validação Robust de URL para Discord
-                            final_link = safe_discord_url(link)
-                            
-                            # View com botões de compartilhamento
-                            view = ShareButtons(t_translated[:100], final_link or link, is_critical=is_critical)
-
-                            is_media = any(d in link for d in media_domains)
-                            if is_media:
-                                await channel.send(content=f"📺 **{t_translated}**\n{final_link or link}", view=view)
-                            else:
-                                if not final_link:
-                                    embed.description = (embed.description or "") + f"\n\n🔗 **Link Original:** {link}"
-                                await channel.send(embed=embed, view=view)
-
-                            posted_anywhere = True
-                            sent_count += 1
-                            if is_cold_start: feed_posted_count += 1
-                            
-                            await asyncio.sleep(1)
-
-                        except Exception as e:
-                            log.exception(f"❌ Falha ao enviar no canal {channel_id}: {e}")
-
-                    if posted_anywhere:
-                        state["dedup"][url].append(link)
-                        history_set.add(link)
-                        history_list.append(link)
-                        
-                        # =========================================================
-                        # NODE-RED ALERT PUSH
-                        # =========================================================
-                        try:
-                            alert_payload = {
-                                "title": title,
-                                "link": link,
-                                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                "source": urlparse(link).netloc,
-                                "summary": summary[:200]
-                            }
-                            async with session.post(NODE_RED_ENDPOINT, json=alert_payload) as nr_resp:
-                                if nr_resp.status == 200:
-                                    log.debug(f"📡 Enviado para Node-RED: {title[:30]}")
-                                else:
-                                    log.warning(f"⚠️ Node-RED retornou {nr_resp.status}")
-                        except Exception as nr_e:
-                            log.warning(f"⚠️ Falha ao enviar para Node-RED: {nr_e}")
+
+                log.info(f"✨ [Match] Guild {gid} aprovou: {item['title'][:50]}...")
+                channel = bot.get_channel(channel_id)
+
+                if channel is None:
+                    log.warning(f"Canal {channel_id} não encontrado.")
+                    continue
+                targets.append((channel, gdata.get("language", "en_US")))
+            if not targets:
+                return None
+            item["targets"] = targets
+            return [item]
+
+        async def stage_render(item):
+            # Payload montado uma vez por (link, idioma) e reaproveitado entre guilds
+            rendered = []
+            for channel, target_lang in item["targets"]:
+                try:
+                    rendered.append((channel, render_cache.get_or_render(
+                        item["entry"], item["title"], item["summary"], item["link"],
+                        item["feed"], source_meta, target_lang, bot.user
+                    )))
+                except Exception as e:
+                    log.exception(f"❌ Falha ao preparar envio no canal {channel.id}: {e}")
+            if not rendered:
+                return None
+            item["rendered"] = rendered
+            return [item]
+
+        def delivery_tracker(item):
+            """Callback por mensagem; com todos os canais resolvidos, confirma (ou libera) o link."""
+            progress = {"pending": 0, "delivered": False}
+
+            def on_result(delivered):
+                progress["pending"] -= 1
+                if delivered:
+                    progress["delivered"] = True
+                    stats.news_posted += 1
+                if progress["pending"] > 0:
+                    return
+                _inflight_links.discard(item["link"])
+                if not progress["delivered"]:
+                    log.warning(f"📭 Nenhum canal recebeu '{item['title'][:50]}'; será tentado de novo na próxima varredura.")
+                    return
+                _confirmed_links.append((item["feed"], item["link"]))
+
+                # =========================================================
+                # NODE-RED ALERT PUSH (outbox em lote; a varredura não espera o dashboard)
+                # =========================================================
+                nodered_outbox.push({
+                    "title": item["title"],
+                    "link": item["link"],
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "source": urlparse(item["link"]).netloc,
+                    "summary": item["summary"][:200]
+                })
+
+            return progress, on_result
+
+        async def stage_deliver(item):
+            nonlocal sent_count
+            url = item["feed"]
+            progress, on_result = delivery_tracker(item)
+            for channel, rendered in item["rendered"]:
+                # Em modo bypass, pegamos apenas a primeira notícia total para evitar flood
+                if bypass_cache and sent_count >= 1: break
+                if item["cold_start"] and cold_posted.get(url, 0) >= 3: break
+
+                # Envio desacoplado: a fila por canal cuida de rate-limit e retry;
+                # o link só é marcado quando o Discord confirma (on_result)
+                queued = delivery.enqueue(
+                    channel, content=rendered.content, embed=rendered.embed, view=rendered.view,
+                    on_result=on_result,
+                )
+                if not queued:
+                    continue
+
+                # Sem await entre os enqueues: nenhum callback roda antes do fim deste laço
+                progress["pending"] += 1
+                sent_count += 1
+                if item["cold_start"]:
+                    cold_posted[url] = cold_posted.get(url, 0) + 1
+            if not progress["pending"]:
+                return None
+            _inflight_links.add(item["link"])
+            return [item]
+
+        async def stage_persist(item):
+            # Entregas já confirmadas entram no dedup/histórico desta varredura
+            apply_confirmed_links(seen, history)
+            return None
 
         # =========================================================
-        # HTML MONITOR RUN
+        # HTML MONITOR RUN (em paralelo ao pipeline dos feeds)
         # =========================================================
-        try:
-            log.info("🔎 Verificando sites oficiais (HTML Watcher)...")
-            html_updates, new_hashes = await check_official_sites(html_hashes)
-            
-            if html_updates:
-                log.info(f"✨ {len(html_updates)} atualizações em sites oficiais!")
-                state["html_hashes"] = new_hashes
-                for update in html_updates:
-                    u_title = update["title"]
-                    
-                    # Notifica Discord
-                    for gid, gdata in config.items():
-                         channel_id = gdata.get("channel_id")
-                         if channel_id:
-                             channel = bot.get_channel(channel_id)
-                             if channel:
-                                 await channel.send(f"⚠️ **CYBERINTEL ALERT**\n{u_title}\n{update['link']}")
-            else:
-                 if new_hashes != html_hashes:
-                     state["html_hashes"] = new_hashes
-                     
-        except Exception as e:
-            log.exception(f"❌ Erro no HTML Monitor: {e}")
+        async def run_html_monitor():
+            schedule.touch("html://official", LOOP_MINUTES * 60)
+            try:
+                log.info("🔎 Verificando sites oficiais (HTML Watcher)...")
+                # Snapshot por blocos (atualizado in-place) para o alerta listar o que entrou/saiu
+                html_snapshots = state.setdefault("html_snapshots", {})
+                html_updates, new_hashes = await check_official_sites(
+                    html_hashes, http_cache, official_sites, snapshots=html_snapshots
+                )
+
+                if html_updates:
+                    log.info(f"✨ {len(html_updates)} atualizações em sites oficiais!")
+                    state["html_hashes"] = new_hashes
+                    for update in html_updates:
+                        u_title = update["title"]
+                        content = f"⚠️ **CYBERINTEL ALERT**\n{u_title}\n{update['link']}"
+                        if update.get("added") or update.get("removed"):
+                            content = f"{content}\n```\n{update['summary']}\n```"
+                        # Limite de 2000 caracteres do Discord
+                        content = content if len(content) <= 2000 else content[:1990] + "…\n```"
+
+                        # Notifica Discord
+                        for gid, gdata in config.items():
+                             channel_id = gdata.get("channel_id")
+                             if channel_id:
+                                 channel = bot.get_channel(channel_id)
+                                 if channel:
+                                     delivery.enqueue(channel, content=content)
+                else:
+                     if new_hashes != html_hashes:
+                         state["html_hashes"] = new_hashes
 
-        save_history(history_list)
-        # Persiste o estado atualizado de forma atômica
-        save_json_safe(state_file, state, atomic=True)
+            except Exception as e:
+                log.exception(f"❌ Erro no HTML Monitor: {e}")
+
+        pipeline = Pipeline([
+            # Download: o fetch_scheduler limita por host/global; cada fonte tem seu worker
+            Stage("fetch", stage_fetch, workers=len(due_urls) + 2),
+            Stage("parse", stage_parse, workers=FEED_PARSE_WORKERS),
+            # Etapas com estado compartilhado (dedup, contadores): 1 worker, ordem preservada
+            Stage("normalize", stage_normalize),
+            Stage("filter", stage_filter),
+            Stage("render", stage_render),
+            Stage("deliver", stage_deliver),
+            Stage("persist", stage_persist),
+        ])
+        sources = list(due_urls) + [k for k in ("api://nvd", "api://otx") if k in fixed_due]
+
+        # Sessão da varredura sobre o pool compartilhado (keep-alive/DNS/SSL reaproveitados entre scans)
+        async with http_client.new_session("feeds", headers=base_headers) as session:
+            html_task = asyncio.create_task(run_html_monitor()) if "html://official" in fixed_due else None
+            try:
+                stage_stats = await pipeline.run(sources)
+            finally:
+                if html_task is not None:
+                    await html_task
+        stats.last_pipeline = stage_stats
+        stats.last_fetch_seconds = stage_stats["fetch"]["wall_s"]
+
+        apply_confirmed_links(seen, history)
+        state["dedup"] = seen.to_state()
+        state["feed_schedule"] = schedule.to_state()
+        state["http_cache"] = http_cache.to_state()
+        state["source_health"] = source_health.to_state()
+        # Persiste histórico e estado (JSON atômico ou incremental no SQLite) na thread
+        # de persistência; escritas repetidas do mesmo alvo são coalescidas
+        await persistence.write("history", save_history, history)
+        await persistence.write("state", save_state, state)
         
-        # Backup automático após varredura bem-sucedida
-        try:
-            from utils.backup import auto_backup_critical_files
-            auto_backup_critical_files()
-        except Exception as backup_error:
-            log.warning(f"Falha no backup automático: {backup_error}")
+        # Backup automático após varredura bem-sucedida (FIFO: roda depois das escritas acima)
+        from utils.backup import auto_backup_critical_files
+        await persistence.write("backup", auto_backup_critical_files)
         
         stats.scans_completed += 1
-        stats.news_posted += sent_count
         stats.cache_hits_total += cache_hits
+        stats.body_hash_hits_total += body_hash_hits
+        stats.not_modified_total += cache_hits - body_hash_hits
         stats.last_scan_time = datetime.now()
+        stats.embeds_built_total += render_cache.built
+        stats.embeds_reused_total += render_cache.reused
+        stats.last_scan_embeds_reused = render_cache.reused
         
-        log.info(f"✅ Varredura concluída. (enviadas={sent_count}, cache_hits={cache_hits}/{len(urls)}, trigger={trigger})")
+        log.info(
+            f"✅ Varredura concluída. (enfileiradas={sent_count}, fila_envio={delivery.total_depth()}, "
+            f"cache_hits={cache_hits}/{len(due_urls)} (corpo igual={body_hash_hits}), embeds={render_cache.built} construídos/"
+            f"{render_cache.reused} reaproveitados, download={stats.last_fetch_seconds}s, "
+            f"gargalo={pipeline.bottleneck()}, trigger={trigger})"
+        )
         _log_next_run()
 
 
@@ -701,7 +873,7 @@ def start_scheduler(bot: discord.Client):
     """Inicia o loop agendado."""
     global loop_task
     
-    @tasks.loop(minutes=LOOP_MINUTES)
+    @tasks.loop(minutes=SCAN_TICK_MINUTES)
     async def intelligence_gathering():
         try:
             await run_scan_once(bot, trigger="loop")
@@ -714,4 +886,4 @@ def start_scheduler(bot: discord.Client):
     
     loop_task = intelligence_gathering
     loop_task.start()
-    log.info(f"🔄 Agendador de tarefas iniciado ({LOOP_MINUTES} min).")
+    log.info(f"🔄 Agendador de tarefas iniciado ({SCAN_TICK_MINUTES} min).")
@@ -0,0 +1,136 @@
+"""
+Source health - Circuit breaker por fonte (closed / open / half_open).
+
+Um feed que dá timeout custava, em toda varredura, FEED_FETCH_MAX_RETRIES × 30s
+de timeout mais os intervalos entre tentativas. Aqui cada fonte tem um disjuntor:
+
+- closed: normal; após SOURCE_FAILURE_THRESHOLD falhas seguidas abre o circuito;
+- open: a fonte é pulada até o fim do cooldown (cresce exponencialmente a
+  cada reabertura, até SOURCE_COOLDOWN_MAX_HOURS);
+- half_open: terminado o cooldown, uma única tentativa curta (sem retries,
+  timeout PROBE_TIMEOUT) testa a fonte; sucesso fecha o circuito, falha
+  reabre com cooldown dobrado.
+
+O estado fica em state["source_health"] (sobrevive a reinícios) e é exibido no
+/status e em /api/stats.
+"""
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from settings import SOURCE_FAILURE_THRESHOLD, SOURCE_COOLDOWN_MINUTES, SOURCE_COOLDOWN_MAX_HOURS
+
+log = logging.getLogger("CyberIntel")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Timeout (s) da tentativa de teste em half_open
+PROBE_TIMEOUT = 10
+# Tamanho máximo da mensagem de erro guardada por fonte
+MAX_ERROR_LEN = 200
+
+
+class SourceHealth:
+    """Disjuntores por fonte (dict serializável em state["source_health"])."""
+
+    def __init__(self, data: Optional[Dict[str, Dict[str, Any]]] = None,
+                 threshold: int = SOURCE_FAILURE_THRESHOLD,
+                 base_cooldown: float = SOURCE_COOLDOWN_MINUTES * 60,
+                 max_cooldown: float = SOURCE_COOLDOWN_MAX_HOURS * 3600):
+        self.threshold = max(1, threshold)
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max(max_cooldown, base_cooldown)
+        self._sources: Dict[str, Dict[str, Any]] = {}
+        self.load(data)
+
+    def load(self, data: Any) -> None:
+        """Substitui o estado pelo persistido (entradas inválidas são ignoradas)."""
+        self._sources = {}
+        if isinstance(data, dict):
+            for url, entry in data.items():
+                if isinstance(url, str) and isinstance(entry, dict) and entry.get("state") in (CLOSED, OPEN, HALF_OPEN):
+                    self._sources[url] = dict(entry)
+
+    def to_state(self) -> Dict[str, Dict[str, Any]]:
+        # Fontes saudáveis sem histórico de falha não precisam ocupar espaço no state
+        return {url: dict(e) for url, e in self._sources.items() if e["state"] != CLOSED or e.get("failures")}
+
+    # -----------------------------------------------------
+    # Consulta
+    # -----------------------------------------------------
+
+    def state(self, url: str) -> str:
+        return self._sources.get(url, {}).get("state", CLOSED)
+
+    def allow(self, url: str, now: Optional[float] = None) -> bool:
+        """
+        True se a fonte pode ser buscada agora.
+        Um circuito aberto com cooldown vencido passa para half_open (tentativa de teste).
+        """
+        entry = self._sources.get(url)
+        if entry is None or entry["state"] != OPEN:
+            return True
+        now = time.time() if now is None else now
+        if now < entry.get("open_until", 0):
+            return False
+        entry["state"] = HALF_OPEN
+        log.info(f"🩺 Testando fonte após cooldown: {url[:60]}")
+        return True
+
+    def filter(self, urls: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """Mantém só as fontes liberadas (na ordem recebida)."""
+        return [u for u in urls if self.allow(u, now)]
+
+    # -----------------------------------------------------
+    # Atualização
+    # -----------------------------------------------------
+
+    def record_success(self, url: str) -> None:
+        entry = self._sources.pop(url, None)
+        if entry and entry["state"] != CLOSED:
+            log.info(f"✅ Fonte recuperada (circuito fechado): {url[:60]}")
+
+    def record_failure(self, url: str, error: str = "", now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        entry = self._sources.setdefault(url, {"state": CLOSED, "failures": 0, "cooldown": 0})
+        entry["failures"] = entry.get("failures", 0) + 1
+        entry["last_failure"] = round(now, 1)
+        entry["last_error"] = str(error)[:MAX_ERROR_LEN]
+
+        if entry["state"] == HALF_OPEN:
+            cooldown = min(self.max_cooldown, (entry.get("cooldown") or self.base_cooldown) * 2)
+        elif entry["state"] == CLOSED and entry["failures"] >= self.threshold:
+            cooldown = self.base_cooldown
+        else:
+            return
+        entry.update(state=OPEN, cooldown=cooldown, open_until=round(now + cooldown, 1))
+        log.warning(
+            f"🔌 Circuito aberto para {url[:60]} por {cooldown / 60:.0f} min "
+            f"({entry['failures']} falhas; último erro: {entry['last_error'] or 'n/d'})"
+        )
+
+    # -----------------------------------------------------
+    # Métricas
+    # -----------------------------------------------------
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Contagem por estado e lista das fontes com circuito aberto/em teste."""
+        now = time.time() if now is None else now
+        counts = {CLOSED: 0, OPEN: 0, HALF_OPEN: 0}
+        unhealthy = {}
+        for url, entry in self._sources.items():
+            counts[entry["state"]] += 1
+            if entry["state"] != CLOSED:
+                unhealthy[url] = {
+                    "state": entry["state"],
+                    "failures": entry.get("failures", 0),
+                    "retry_in": max(0, round(entry.get("open_until", now) - now)),
+                    "last_error": entry.get("last_error", ""),
+                }
+        return {"degraded": counts[CLOSED], "open": counts[OPEN], "half_open": counts[HALF_OPEN], "sources": unhealthy}
+
+
+# Instância global (carregada do state a cada varredura e na inicialização)
+source_health = SourceHealth()
@@ -15,6 +15,27 @@ class BotStats:
         self.feeds_failed = 0
         self.last_scan_time = None
         self.cache_hits_total = 0
+        # Parte dos cache hits: 304 de verdade x corpo 200 idêntico (hash)
+        self.not_modified_total = 0
+        self.body_hash_hits_total = 0
+        # Fila de envio (core.delivery)
+        self.messages_delivered = 0
+        self.delivery_failures = 0
+        self.delivery_retries = 0
+        self.delivery_dropped = 0
+        # Cache de renderização (core.render)
+        self.embeds_built_total = 0
+        self.embeds_reused_total = 0
+        self.last_scan_embeds_reused = 0
+        # Tempo do último parse por feed, em ms (core.parsing)
+        self.feed_parse_ms = {}
+        # Parse incremental: leituras interrompidas ao achar itens já vistos
+        self.stream_early_stops = 0
+        self.stream_bytes_read = 0
+        # Tempo de parede (s) da etapa de download de feeds na última varredura
+        self.last_fetch_seconds = 0.0
+        # Métricas por etapa do pipeline na última varredura (core.pipeline)
+        self.last_pipeline = {}
     
     @property
     def uptime(self) -> timedelta:
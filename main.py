@@ -13,31 +13,43 @@ import discord
 from discord.ext import commands
 
 from settings import TOKEN, COMMAND_PREFIX, LOG_LEVEL
-from utils.storage import p, load_json_safe
+from utils.config import config_service
 from bot.views.filter_dashboard import FilterDashboard
-from core.scanner import start_scheduler, run_scan_once
+from core.scanner import start_scheduler, run_scan_once, persist_confirmed_links
+from core.delivery import delivery
 from web.server import start_web_server  # Novo web server
 from utils.git_info import get_git_changes, get_current_hash
-from utils.storage import save_json_safe
+from utils.storage import load_state, save_state
+from utils.persistence import persistence
+from utils.http import http_client
+from core.nodered_outbox import nodered_outbox
+from core.source_health import source_health
 
 # Configuração de Logs
 from utils.logger import setup_logger
-from src.services.dbService import init_db
+from src.services.dbService import init_db, compact_db
 
-# Inicializa Logger Centralizado
-setup_logger(level=LOG_LEVEL)
+log = logging.getLogger("CyberIntel")
 
-# Inicializa banco de dados
-init_db()
 
-# Limpa backups antigos na inicialização
-try:
-    from utils.backup import cleanup_old_backups
-    cleanup_old_backups()
-except Exception as e:
-    log.warning(f"Falha ao limpar backups antigos: {e}")
+def bootstrap():
+    """
+    Inicialização com efeitos colaterais (logger, banco, limpeza de backups).
+    Fica fora do import: os workers de parsing (forkserver/spawn) reimportam
+    este módulo como __mp_main__ e não podem repetir a inicialização.
+    """
+    # Inicializa Logger Centralizado
+    setup_logger(level=LOG_LEVEL)
 
-log = logging.getLogger("CyberIntel")
+    # Inicializa banco de dados
+    init_db()
+
+    # Limpa backups antigos na inicialização
+    try:
+        from utils.backup import cleanup_old_backups
+        cleanup_old_backups()
+    except Exception as e:
+        log.warning(f"Falha ao limpar backups antigos: {e}")
 
 
 # =========================================================
@@ -87,14 +99,12 @@ async def main():
                 log.exception(f"❌ Falha ao iniciar Web Server: {e}")
 
             # 1. Carregar Views Persistentes
-            cfg = load_json_safe(p("config.json"), {})
-            if isinstance(cfg, dict):
-                for gid in cfg.keys():
-                    try:
-                        bot.add_view(FilterDashboard(int(gid)))
-                        log.info(f"View persistente registrada para guild {gid}")
-                    except Exception as e:
-                        log.exception(f"❌ Erro ao registrar view para guild {gid}: {e}")
+            for gid in config_service.guilds():
+                try:
+                    bot.add_view(FilterDashboard(int(gid)))
+                    log.info(f"View persistente registrada para guild {gid}")
+                except Exception as e:
+                    log.exception(f"❌ Erro ao registrar view para guild {gid}: {e}")
 
             # 2. Sync Comandos (Slash) por Guild para visibilidade INSTANTÂNEA
             log.info("🔄 Sincronizando comandos Slash por Guild...")
@@ -129,19 +139,18 @@ async def main():
     # 4. Anúncio de Versão (Git Check)
     try:
         current_hash = get_current_hash()
-        state_file = p("state.json")
-        state = load_json_safe(state_file, {})
+        state = await persistence.run(load_state)
+        # Disjuntores das fontes persistidos (visíveis no /status antes da primeira varredura)
+        source_health.load(state.get("source_health"))
         last_hash = state.get("last_announced_hash")
-        cfg = load_json_safe(p("config.json"), {})
 
         if current_hash and current_hash != last_hash:
             changes = get_git_changes()
             target_channel = None
-            if isinstance(cfg, dict):
-                for gid, gdata in cfg.items():
-                    if isinstance(gdata, dict) and gdata.get("channel_id"):
-                         target_channel = bot.get_channel(gdata["channel_id"])
-                         if target_channel: break
+            for guild_cfg in config_service.guilds().values():
+                if guild_cfg.channel_id:
+                     target_channel = bot.get_channel(guild_cfg.channel_id)
+                     if target_channel: break
             
             if target_channel:
                 log.info(f"📢 Anunciando nova versão {current_hash} no canal {target_channel.name}")
@@ -159,7 +168,7 @@ async def main():
                 await target_channel.send(embed=embed)
                 
                 state["last_announced_hash"] = current_hash
-                save_json_safe(state_file, state)
+                await persistence.run(save_state, state)
     except Exception as e:
         log.exception(f"❌ Falha ao processar anúncio de versão: {e}")
 
@@ -192,13 +201,29 @@ async def main():
     # =========================================================
     # START
     # =========================================================
-    await bot.start(TOKEN)
+    # Pool HTTP compartilhado (fechado no encerramento, dentro do mesmo event loop)
+    await http_client.start()
+    # Outbox do Node-RED (envio em lote; pendências vão para o disco no encerramento)
+    await nodered_outbox.start()
+    try:
+        await bot.start(TOKEN)
+    finally:
+        # Última chance para a fila do Discord; links não entregues ficam fora do dedup
+        await delivery.close()
+        await persist_confirmed_links()
+        await nodered_outbox.close()
+        await http_client.close()
 
 
 if __name__ == "__main__":
+    bootstrap()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
         log.info("🛑 Bot encerrado pelo usuário.")
     except Exception as e:
         log.exception(f"🔥 Erro fatal: {e}")
+    finally:
+        # Drena as escritas pendentes e consolida o journal de notícias enviadas
+        persistence.close()
+        compact_db()
@@ -45,12 +45,12 @@ def test_bot_init():
         from utils.storage import p, load_json_safe
         
         sources = load_sources()
-        history_list, history_set = load_history()
+        history = load_history()
         config = load_json_safe(p("config.json"), {})
         
         log.info(f"✅ Componentes carregados:")
         log.info(f"   Fontes: {len(sources)}")
-        log.info(f"   Histórico: {len(history_list)} links")
+        log.info(f"   Histórico: {len(history)} links")
         log.info(f"   Guilds configuradas: {len(config)}")
         
         # Testa cogs
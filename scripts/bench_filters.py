@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do estágio de filtros: match_intel legado vs FilterEngine compilado.
+
+Uso (na raiz do projeto):
+
+    python scripts/bench_filters.py
+    python scripts/bench_filters.py --entries 300 --guilds 200
+
+O modo "legado" reproduz o comportamento antigo (padrão regex remontado a cada
+chamada, conteúdo limpo e todas as regex executadas uma vez por guild). O modo "engine" avalia cada
+notícia uma única vez e decide por guild com interseção de conjuntos.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.filters import BLACKLIST, CAT_MAP, CYBER_CORE, FILTER_OPTIONS, engine  # noqa: E402
+from utils.html import clean_html  # noqa: E402
+
+WORDS = (
+    "critical ransomware campaign hits hospitals exploit released for unpatched flaw "
+    "threat actor leaks database of millions records new botnet targets routers "
+    "patch tuesday fixes zero-day vulnerability cisa warns about phishing wave "
+    "quarterly earnings report market update football results weather forecast"
+).split()
+
+
+def _legacy_contains_any(text, keywords):
+    escaped_kws = [re.escape(k) for k in keywords]
+    pattern_str = r'(?<!:)\b(?:' + '|'.join(escaped_kws) + r')s?\b'
+    # Igual ao código original: padrão remontado a cada chamada e resolvido via re.search
+    return bool(re.search(pattern_str, text, re.IGNORECASE))
+
+
+def _legacy_match_intel(filters, title, summary):
+    if not filters:
+        return False
+    content = f"{clean_html(title)} {clean_html(summary)}".lower()
+    if _legacy_contains_any(content, BLACKLIST):
+        return False
+    if not _legacy_contains_any(content, CYBER_CORE):
+        return False
+    if "todos" in filters or "all" in filters:
+        return True
+    for f in filters:
+        kws = CAT_MAP.get(f, [])
+        if kws and _legacy_contains_any(content, kws):
+            return True
+    return False
+
+
+def _make_entries(n, rng):
+    entries = []
+    for _ in range(n):
+        title = " ".join(rng.choices(WORDS, k=10))
+        summary = "<p>" + " ".join(rng.choices(WORDS, k=60)) + "</p>"
+        entries.append((title, summary))
+    return entries
+
+
+def _make_guild_filters(n, rng):
+    keys = [k for k in FILTER_OPTIONS if k != "todos"]
+    out = []
+    for _ in range(n):
+        if rng.random() < 0.2:
+            out.append(["todos"])
+        else:
+            out.append(rng.sample(keys, k=rng.randint(1, 4)))
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=300, help="Notícias por varredura (~30 feeds x 10)")
+    parser.add_argument("--guilds", type=int, default=200, help="Guilds configuradas")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    entries = _make_entries(args.entries, rng)
+    guilds = _make_guild_filters(args.guilds, rng)
+
+    t0 = time.perf_counter()
+    legacy = [[_legacy_match_intel(f, t, s) for f in guilds] for t, s in entries]
+    legacy_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    compiled = []
+    for t, s in entries:
+        verdict = engine.evaluate(t, s)
+        compiled.append([engine.accepts(verdict, f) for f in guilds])
+    engine_s = time.perf_counter() - t0
+
+    assert legacy == compiled, "FilterEngine divergiu do match_intel legado"
+
+    decisions = args.entries * args.guilds
+    print(f"Entradas: {args.entries} | Guilds: {args.guilds} | Decisões: {decisions}")
+    print(f"Legado : {legacy_s * 1000:9.1f} ms")
+    print(f"Engine : {engine_s * 1000:9.1f} ms")
+    print(f"Ganho  : {legacy_s / engine_s:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
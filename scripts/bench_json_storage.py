@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark da persistência JSON: caminho antigo (dupla serialização) vs atual.
+
+Uso (na raiz do projeto):
+
+    python scripts/bench_json_storage.py
+    python scripts/bench_json_storage.py --sizes 1 4 16 --repeat 5
+
+"legado" reproduz o load_json_safe/save_json_safe anteriores: json.load +
+json.dumps de "validação" na leitura; json.dumps de validação + json.dump
+indentado na escrita. "stdlib" e "orjson" usam dumps_json/loads_json (uma
+única serialização, compacta). Mede tempo e pico de memória (tracemalloc).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.storage as storage  # noqa: E402
+
+
+def _make_state(target_mb):
+    """state.json realista: dedup {feed: {link: ts}}, http_cache e html_hashes."""
+    dedup, feeds = {}, 0
+    approx = 0
+    while approx < target_mb * 1024 * 1024:
+        url = f"https://feed{feeds}.example.com/rss"
+        dedup[url] = {f"https://feed{feeds}.example.com/2026/10/post-{i}-titulo-da-noticia": 1792338252.123 + i for i in range(500)}
+        approx += 500 * 80
+        feeds += 1
+    http_cache = {url: {"etag": '"5f3c-61a2b9c1e4d80"', "last_modified": "Mon, 12 Oct 2026 10:00:00 GMT"} for url in dedup}
+    html_hashes = {f"https://site{i}.gov.br/noticias": "a" * 64 for i in range(50)}
+    return {"dedup": dedup, "http_cache": http_cache, "html_hashes": html_hashes, "last_cleanup": 1792338252.0}
+
+
+def _legacy_save(path, data):
+    json.dumps(data)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def _legacy_load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    json.dumps(data)
+    return data
+
+
+def _new_save(path, data):
+    with open(path, "wb") as f:
+        f.write(storage.dumps_json(data))
+
+
+def _new_load(path):
+    with open(path, "rb") as f:
+        return storage.loads_json(f.read())
+
+
+def _measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best * 1000, peak / 1024 / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 4, 10], help="Tamanhos aproximados (MB)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    has_orjson = storage.HAS_ORJSON
+    modes = [("legado", _legacy_save, _legacy_load, False), ("stdlib", _new_save, _new_load, False)]
+    if has_orjson:
+        modes.append(("orjson", _new_save, _new_load, True))
+    else:
+        print("(orjson não instalado: modo orjson omitido)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.json")
+        for size in args.sizes:
+            data = _make_state(size)
+            print(f"\n== state.json ~{size:g} MB ({len(data['dedup'])} feeds) ==")
+            print(f"{'modo':8} {'save ms':>9} {'save pico MB':>13} {'load ms':>9} {'load pico MB':>13} {'arquivo MB':>11}")
+            for name, save, load, use_orjson in modes:
+                storage.HAS_ORJSON = use_orjson
+                save_ms, save_peak = _measure(lambda: save(path, data), args.repeat)
+                file_mb = os.path.getsize(path) / 1024 / 1024
+                load_ms, load_peak = _measure(lambda: load(path), args.repeat)
+                print(f"{name:8} {save_ms:9.1f} {save_peak:13.1f} {load_ms:9.1f} {load_peak:13.1f} {file_mb:11.2f}")
+    storage.HAS_ORJSON = has_orjson
+
+
+if __name__ == "__main__":
+    main()
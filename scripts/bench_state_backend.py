@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do custo de gravação por varredura: JSON (state.json + history.json) vs SQLite WAL.
+
+Uso (na raiz do projeto):
+
+    python scripts/bench_state_backend.py
+    python scripts/bench_state_backend.py --feeds 80 --links 500 --scans 20
+
+Cada "varredura" simulada adiciona alguns links novos por feed, renova o
+timestamp dos links ainda listados e troca parte dos ETags, como no scanner.
+O modo JSON reescreve os arquivos inteiros (save_json_safe); o modo SQLite
+grava só a diferença (SqliteStateStore.save_state/save_history).
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.storage import SqliteStateStore, save_json_safe  # noqa: E402
+
+
+def _make_state(feeds, links, rng):
+    now = time.time()
+    dedup = {
+        f"https://feed{f}.example/rss": {
+            f"https://feed{f}.example/post/{i}": now - (links - i) * 60 for i in range(links)
+        }
+        for f in range(feeds)
+    }
+    http_cache = {
+        url: {"etag": f'"{rng.getrandbits(64):x}"', "last_modified": "Mon, 01 Jan 2026 00:00:00 GMT"}
+        for url in dedup
+    }
+    html_hashes = {f"https://site{i}.example": f"{rng.getrandbits(128):032x}" for i in range(10)}
+    history = [link for items in dedup.values() for link in list(items)[-25:]][-2000:]
+    return {"dedup": dedup, "http_cache": http_cache, "html_hashes": html_hashes, "last_cleanup": now}, history
+
+
+def _mutate(state, history, scan, rng, new_per_feed, touched_per_feed):
+    now = time.time()
+    for f, (url, items) in enumerate(state["dedup"].items()):
+        for link in list(items)[-touched_per_feed:]:
+            items[link] = now
+        for i in range(new_per_feed):
+            link = f"{url}/new/{scan}/{i}"
+            items[link] = now
+            history.append(link)
+        while len(items) > 500:
+            items.pop(next(iter(items)))
+        if rng.random() < 0.3:
+            state["http_cache"][url]["etag"] = f'"{rng.getrandbits(64):x}"'
+    del history[:-2000]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--feeds", type=int, default=60)
+    parser.add_argument("--links", type=int, default=300, help="Links no dedup por feed")
+    parser.add_argument("--scans", type=int, default=10)
+    parser.add_argument("--new", type=int, default=2, help="Links novos por feed por varredura")
+    parser.add_argument("--touched", type=int, default=10, help="Links renovados (touch) por feed por varredura")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(args.seed)
+    base_state, base_history = _make_state(args.feeds, args.links, rng)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        state_path = os.path.join(tmp, "state.json")
+        history_path = os.path.join(tmp, "history.json")
+
+        # JSON: reescrita completa a cada varredura
+        state, history = copy.deepcopy(base_state), list(base_history)
+        json_s = 0.0
+        for scan in range(args.scans):
+            _mutate(state, history, scan, random.Random(scan), args.new, args.touched)
+            t0 = time.perf_counter()
+            save_json_safe(state_path, state, atomic=True)
+            save_json_safe(history_path, history, atomic=True)
+            json_s += time.perf_counter() - t0
+        json_bytes = os.path.getsize(state_path) + os.path.getsize(history_path)
+
+        # SQLite: carga inicial fora da medição, depois só diferenças
+        store = SqliteStateStore(os.path.join(tmp, "state.db"))
+        store.load_state()
+        store.save_state(copy.deepcopy(base_state))
+        store.load_history()
+        store.save_history(list(base_history))
+
+        state, history = store.load_state(), store.load_history()
+        sqlite_s = 0.0
+        rows = 0
+        for scan in range(args.scans):
+            _mutate(state, history, scan, random.Random(scan), args.new, args.touched)
+            t0 = time.perf_counter()
+            rows += store.save_state(state)
+            rows += store.save_history(history)
+            sqlite_s += time.perf_counter() - t0
+        store.close()
+
+    links = sum(len(v) for v in base_state["dedup"].values())
+    print(f"Feeds: {args.feeds} | Links no dedup: {links} | Varreduras: {args.scans}")
+    print(f"JSON   : {json_s / args.scans * 1000:9.1f} ms/varredura ({json_bytes / 1024:.0f} KB reescritos)")
+    print(f"SQLite : {sqlite_s / args.scans * 1000:9.1f} ms/varredura ({rows / args.scans:.0f} linhas alteradas)")
+    print(f"Ganho  : {json_s / sqlite_s:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,11 +16,44 @@ try:
 except ValueError:
     LOOP_MINUTES = 60
 
+# Polling adaptativo por feed: cada fonte tem intervalo próprio (aprendido pela cadência de
+# publicação, entre FEED_POLL_MIN_MINUTES e FEED_POLL_MAX_MINUTES); o loop roda a cada
+# FEED_POLL_MIN_MINUTES e só busca os feeds vencidos. Com "false", tudo a cada LOOP_MINUTES.
+FEED_ADAPTIVE_POLLING = os.getenv("FEED_ADAPTIVE_POLLING", "true").strip().lower() in ("1", "true", "yes", "on")
+try:
+    FEED_POLL_MIN_MINUTES = max(1, int(os.getenv("FEED_POLL_MIN_MINUTES", "10")))
+except ValueError:
+    FEED_POLL_MIN_MINUTES = 10
+try:
+    FEED_POLL_MAX_MINUTES = max(FEED_POLL_MIN_MINUTES, int(os.getenv("FEED_POLL_MAX_MINUTES", "360")))
+except ValueError:
+    FEED_POLL_MAX_MINUTES = 360
+# Intervalo do loop de varredura
+SCAN_TICK_MINUTES = min(LOOP_MINUTES, FEED_POLL_MIN_MINUTES) if FEED_ADAPTIVE_POLLING else LOOP_MINUTES
+
 # Logging Level (INFO, DEBUG, WARNING, ERROR)
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 
 # Node-RED Integration
 NODE_RED_ENDPOINT = os.getenv("NODE_RED_ENDPOINT", "http://cyber-nodered:1880/cyber-intel")
+# Outbox do Node-RED: alertas por lote (1 = objeto único, formato antigo), intervalo máximo (s)
+# entre envios, capacidade em memória e máximo de alertas transbordados para o disco
+try:
+    NODE_RED_BATCH_SIZE = max(1, int(os.getenv("NODE_RED_BATCH_SIZE", "20")))
+except ValueError:
+    NODE_RED_BATCH_SIZE = 20
+try:
+    NODE_RED_FLUSH_SECONDS = max(0.5, float(os.getenv("NODE_RED_FLUSH_SECONDS", "5")))
+except ValueError:
+    NODE_RED_FLUSH_SECONDS = 5.0
+try:
+    NODE_RED_OUTBOX_MAX = max(1, int(os.getenv("NODE_RED_OUTBOX_MAX", "500")))
+except ValueError:
+    NODE_RED_OUTBOX_MAX = 500
+try:
+    NODE_RED_SPILL_MAX = max(0, int(os.getenv("NODE_RED_SPILL_MAX", "10000")))
+except ValueError:
+    NODE_RED_SPILL_MAX = 10000
 
 # URL pública (ou via túnel) do Dashboard
 # - Produção (VPS): configure, por exemplo, como "https://seu-dominio-soc/ui"
@@ -35,8 +68,119 @@ FEED_USER_AGENT = os.getenv(
     "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
 ).strip()
 
+# Parsing de feeds – backend do feedparser: "process" (pool de processos, não trava o
+# event loop/heartbeat do Discord), "thread" (executor padrão) ou "inline" (debug/testes)
+FEED_PARSE_BACKEND = os.getenv("FEED_PARSE_BACKEND", "process").strip().lower()
+try:
+    FEED_PARSE_WORKERS = max(1, int(os.getenv("FEED_PARSE_WORKERS", "2")))
+except ValueError:
+    FEED_PARSE_WORKERS = 2
+# Tamanho máximo (bytes) do corpo de um feed; acima disso o feed é ignorado
+try:
+    FEED_MAX_BYTES = int(os.getenv("FEED_MAX_BYTES", str(5 * 1024 * 1024)))
+except ValueError:
+    FEED_MAX_BYTES = 5 * 1024 * 1024
+
+# Parse incremental: lê o feed em pedaços e para após N itens consecutivos já vistos
+FEED_STREAM_PARSE = os.getenv("FEED_STREAM_PARSE", "true").strip().lower() in ("1", "true", "yes", "on")
+try:
+    FEED_STREAM_STOP_AFTER = max(1, int(os.getenv("FEED_STREAM_STOP_AFTER", "3")))
+except ValueError:
+    FEED_STREAM_STOP_AFTER = 3
+
+# Pool HTTP compartilhado (aiohttp): conexões totais, por host, TTL do cache de DNS (s)
+# e tempo (s) que conexões ociosas ficam abertas (keep-alive)
+try:
+    HTTP_POOL_LIMIT = max(1, int(os.getenv("HTTP_POOL_LIMIT", "100")))
+except ValueError:
+    HTTP_POOL_LIMIT = 100
+try:
+    HTTP_POOL_LIMIT_PER_HOST = max(1, int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "8")))
+except ValueError:
+    HTTP_POOL_LIMIT_PER_HOST = 8
+try:
+    HTTP_DNS_TTL = max(0, int(os.getenv("HTTP_DNS_TTL", "300")))
+except ValueError:
+    HTTP_DNS_TTL = 300
+try:
+    HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+except ValueError:
+    HTTP_KEEPALIVE_TIMEOUT = 30.0
+
+# Agendador de downloads de feeds: limite global adaptativo (mín/máx), requisições
+# simultâneas por host, intervalo mínimo (s) entre requisições ao mesmo host e latência
+# alvo (s) abaixo da qual o limite global sobe
+try:
+    FETCH_CONCURRENCY_MIN = max(1, int(os.getenv("FETCH_CONCURRENCY_MIN", "2")))
+except ValueError:
+    FETCH_CONCURRENCY_MIN = 2
+try:
+    FETCH_CONCURRENCY_MAX = max(1, int(os.getenv("FETCH_CONCURRENCY_MAX", "16")))
+except ValueError:
+    FETCH_CONCURRENCY_MAX = 16
+try:
+    FETCH_HOST_CONCURRENCY = max(1, int(os.getenv("FETCH_HOST_CONCURRENCY", "2")))
+except ValueError:
+    FETCH_HOST_CONCURRENCY = 2
+try:
+    FETCH_HOST_MIN_INTERVAL = max(0.0, float(os.getenv("FETCH_HOST_MIN_INTERVAL", "0.5")))
+except ValueError:
+    FETCH_HOST_MIN_INTERVAL = 0.5
+try:
+    FETCH_TARGET_LATENCY = float(os.getenv("FETCH_TARGET_LATENCY", "2.0"))
+except ValueError:
+    FETCH_TARGET_LATENCY = 2.0
+
+# Pipeline da varredura: capacidade de cada fila entre etapas (backpressure)
+try:
+    PIPELINE_QUEUE_SIZE = max(1, int(os.getenv("PIPELINE_QUEUE_SIZE", "64")))
+except ValueError:
+    PIPELINE_QUEUE_SIZE = 64
+
+# Circuit breaker por fonte: falhas seguidas para abrir o circuito, cooldown inicial (min)
+# e teto do cooldown (h), que dobra a cada teste que falha
+try:
+    SOURCE_FAILURE_THRESHOLD = max(1, int(os.getenv("SOURCE_FAILURE_THRESHOLD", "3")))
+except ValueError:
+    SOURCE_FAILURE_THRESHOLD = 3
+try:
+    SOURCE_COOLDOWN_MINUTES = max(1, int(os.getenv("SOURCE_COOLDOWN_MINUTES", "30")))
+except ValueError:
+    SOURCE_COOLDOWN_MINUTES = 30
+try:
+    SOURCE_COOLDOWN_MAX_HOURS = max(1, int(os.getenv("SOURCE_COOLDOWN_MAX_HOURS", "24")))
+except ValueError:
+    SOURCE_COOLDOWN_MAX_HOURS = 24
+
+# Persistência do estado (dedup, cache HTTP, hashes HTML, histórico, notícias enviadas):
+# "json" (state.json/history.json/database.json, padrão) ou "sqlite" (banco WAL com
+# gravação incremental; na primeira execução os JSON existentes são migrados)
+STATE_BACKEND = os.getenv("STATE_BACKEND", "json").strip().lower()
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", "data/cyberintel.db").strip()
+
 # Threat Intel APIs
 NVD_API_KEY = os.getenv("NVD_API_KEY", "")
+# Cache local de CVEs (SQLite) sincronizado de forma incremental com a NVD (lastModified):
+# intervalo mínimo entre sincronizações (min), janela da primeira carga (dias) e
+# retenção (dias) de CVEs que não foram atualizadas pela sincronização
+NVD_CACHE_PATH = os.getenv("NVD_CACHE_PATH", "data/nvd_cves.db").strip()
+try:
+    NVD_SYNC_MINUTES = max(1, int(os.getenv("NVD_SYNC_MINUTES", "15")))
+except ValueError:
+    NVD_SYNC_MINUTES = 15
+try:
+    NVD_BOOTSTRAP_DAYS = max(1, int(os.getenv("NVD_BOOTSTRAP_DAYS", "7")))
+except ValueError:
+    NVD_BOOTSTRAP_DAYS = 7
+# Páginas da NVD buscadas em paralelo numa consulta (o rate limit continua valendo)
+try:
+    NVD_PAGE_CONCURRENCY = max(1, int(os.getenv("NVD_PAGE_CONCURRENCY", "2")))
+except ValueError:
+    NVD_PAGE_CONCURRENCY = 2
+try:
+    NVD_RETENTION_DAYS = max(1, int(os.getenv("NVD_RETENTION_DAYS", "90")))
+except ValueError:
+    NVD_RETENTION_DAYS = 90
 URLSCAN_API_KEY = os.getenv("URLSCAN_API_KEY", "")
 OTX_API_KEY = os.getenv("OTX_API_KEY", "")
 VT_API_KEY = os.getenv("VT_API_KEY", "")
@@ -1,237 +1,334 @@
-import aiohttp
+"""
+CVE Service - Sincronização incremental com a NVD e consultas ao índice local.
+
+A API da NVD só é chamada por `sync_nvd`, que busca as CVEs modificadas desde a
+última sincronização (lastModStartDate/lastModEndDate, paginando por startIndex)
+e grava no CveStore. Scanner, /dashboard e /cve respondem a partir do índice;
+o /cve só consulta a API quando a CVE não está no cache.
+
+Limites da NVD (janela móvel de 30s): 5 requisições sem chave, 50 com NVD_API_KEY.
+`iter_nvd_pages` entrega as páginas de uma consulta conforme chegam (até
+NVD_PAGE_CONCURRENCY em voo, dentro do rate limit); quem consome agrega página
+a página, sem juntar o JSON inteiro em memória.
+"""
+import asyncio
 import logging
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from settings import (
+    NVD_API_KEY, NVD_CACHE_PATH, NVD_SYNC_MINUTES, NVD_BOOTSTRAP_DAYS, NVD_RETENTION_DAYS,
+    NVD_PAGE_CONCURRENCY,
+)
+from core.fetch_scheduler import parse_retry_after
+from src.services.cveStore import CveStore, parse_nvd_item
+from utils.http import http_client
+from utils.persistence import persistence
+from utils.storage import p, loads_json
 
 log = logging.getLogger("CyberIntel")
 
 NVD_API_URL = "https://services.nvd.nist.gov/rest/json/cves/2.0"
 
-from settings import NVD_API_KEY
+# Rate limit público da NVD: requisições por janela de NVD_RATE_PERIOD segundos
+NVD_RATE_PERIOD = 30.0
+NVD_RATE_LIMIT_PUBLIC = 5
+NVD_RATE_LIMIT_KEY = 50
+# Resultados por página na sincronização (a API aceita até 2000, mas uma página
+# cheia tem dezenas de MB de JSON; páginas menores cabem no timeout e falham barato)
+NVD_PAGE_SIZE = 500
+# Tamanho de cada janela lastMod*Date (a API aceita até 120 dias). O marco avança
+# a cada janela completa: uma falha só refaz o último dia, não a carga inteira
+NVD_SYNC_WINDOW = timedelta(days=1)
+# Sobreposição entre janelas (CVEs indexadas pela NVD com atraso não se perdem)
+NVD_SYNC_OVERLAP = timedelta(minutes=10)
+# Respostas que indicam limitação (a NVD usa 403 quando o limite sem chave estoura)
+NVD_THROTTLE_STATUSES = frozenset({403, 429, 503})
+NVD_MAX_ATTEMPTS = 3
+NVD_RETRY_DELAY = 6.0
+
+# Janela das CVEs enviadas como alerta pelo scanner
+ALERT_WINDOW_DAYS = 7
+ALERT_MIN_SCORE = 7.0
+
+
+class NvdError(Exception):
+    """Página da NVD indisponível (erro HTTP ou limite esgotado após as tentativas)."""
+
+
+class NvdRateLimiter:
+    """Janela móvel: no máximo `max_requests` inícios de requisição a cada `period` segundos."""
+
+    def __init__(self, max_requests: int, period: float = NVD_RATE_PERIOD):
+        self.max_requests = max(1, max_requests)
+        self.period = period
+        self._starts: Deque[float] = deque()
+        self._lock = asyncio.Lock()
+        self.waited = 0.0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._starts and now - self._starts[0] >= self.period:
+                    self._starts.popleft()
+                if len(self._starts) < self.max_requests:
+                    self._starts.append(now)
+                    return
+                wait = self.period - (now - self._starts[0])
+                self.waited += wait
+                await asyncio.sleep(wait)
+
+
+nvd_limiter = NvdRateLimiter(NVD_RATE_LIMIT_KEY if NVD_API_KEY else NVD_RATE_LIMIT_PUBLIC)
+
+_store: Optional[CveStore] = None
+_sync_lock = asyncio.Lock()
+# Resultado das sincronizações (exposto em /api/stats)
+sync_status: Dict[str, Any] = {
+    "runs": 0,
+    "requests": 0,
+    "upserted": 0,
+    "last_run": None,
+    "last_error": "",
+}
+
+
+def get_cve_store() -> CveStore:
+    """Índice local global (aberto na primeira consulta)."""
+    global _store
+    if _store is None:
+        _store = CveStore(p(NVD_CACHE_PATH))
+    return _store
+
+
+def _headers() -> Dict[str, str]:
+    headers = {"User-Agent": "CyberIntelBot/1.0 (students_project)"}
+    # Adiciona API Key se configurada (aumenta rate limit)
+    if NVD_API_KEY:
+        headers["apiKey"] = NVD_API_KEY
+    return headers
+
+
+def _api_date(dt: datetime) -> str:
+    return dt.isoformat(timespec="milliseconds") + "Z"
+
+
+async def _request(session, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """GET na API respeitando o rate limit; repete em 403/429/503 (Retry-After ou 6s)."""
+    for attempt in range(1, NVD_MAX_ATTEMPTS + 1):
+        await nvd_limiter.acquire()
+        sync_status["requests"] += 1
+        async with session.get(NVD_API_URL, params=params, headers=_headers()) as resp:
+            if resp.status == 200:
+                body = await resp.read()
+                # Páginas grandes: decodifica fora do event loop
+                return await asyncio.get_running_loop().run_in_executor(None, loads_json, body)
+            if resp.status not in NVD_THROTTLE_STATUSES or attempt == NVD_MAX_ATTEMPTS:
+                sync_status["last_error"] = f"HTTP {resp.status}"
+                log.warning(f"⚠️ NVD API retornou status {resp.status}")
+                return None
+            delay = parse_retry_after(resp.headers.get("Retry-After"))
+            if delay is None:
+                delay = NVD_RETRY_DELAY * attempt
+        log.warning(f"🐢 NVD limitou a requisição (HTTP {resp.status}); nova tentativa em {delay:.0f}s")
+        await asyncio.sleep(delay)
+    return None
+
+
+async def iter_nvd_pages(session, params: Dict[str, Any],
+                         page_size: Optional[int] = None,
+                         concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Percorre todas as páginas (startIndex) de uma consulta, entregando cada resposta.
+
+    A primeira página informa totalResults; as demais são buscadas com no máximo
+    `concurrency` requisições em voo (o rate limiter continua valendo) e entregues
+    na ordem em que terminam. Só as páginas em voo ficam em memória.
+
+    Raises:
+        NvdError: uma página falhou; as requisições pendentes são canceladas.
+    """
+    page_size = page_size or NVD_PAGE_SIZE
+    concurrency = max(1, concurrency or NVD_PAGE_CONCURRENCY)
+
+    async def fetch(index: int) -> Dict[str, Any]:
+        data = await _request(session, {**params, "resultsPerPage": page_size, "startIndex": index})
+        if data is None:
+            raise NvdError(sync_status["last_error"] or f"página {index} indisponível")
+        return data
+
+    first = await fetch(0)
+    total = first.get("totalResults", 0)
+    # A NVD pode devolver menos que o pedido por página: o passo segue o que veio
+    step = len(first.get("vulnerabilities", []))
+    yield first
+    if not step or step >= total:
+        return
+
+    pending_indexes = iter(range(step, total, step))
+    in_flight = set()
+    try:
+        while True:
+            for index in pending_indexes:
+                in_flight.add(asyncio.ensure_future(fetch(index)))
+                if len(in_flight) >= concurrency:
+                    break
+            if not in_flight:
+                return
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in in_flight:
+            task.cancel()
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+
+
+async def sync_nvd(store: Optional[CveStore] = None, now: Optional[datetime] = None, force: bool = False) -> int:
+    """
+    Atualiza o índice local com as CVEs modificadas desde a última sincronização.
+
+    Janelas de NVD_SYNC_WINDOW (lastModStartDate/lastModEndDate), cada uma
+    paginada por startIndex. O marco só avança depois de uma janela completa, então
+    uma falha no meio é retomada na próxima chamada. As gravações no SQLite rodam
+    na thread de persistência (fora do event loop).
+
+    Returns:
+        Quantidade de CVEs gravadas nesta chamada.
+    """
+    store = store or get_cve_store()
+    now = now or datetime.utcnow()
+    last = store.last_sync()
+    if not force and last is not None:
+        # Outra sincronização em andamento: as consultas usam o que já está no índice
+        if _sync_lock.locked() or now - last < timedelta(minutes=NVD_SYNC_MINUTES):
+            return 0
+
+    async with _sync_lock:
+        last = store.last_sync()
+        start = last - NVD_SYNC_OVERLAP if last else now - timedelta(days=NVD_BOOTSTRAP_DAYS)
+        sync_status["runs"] += 1
+        sync_status["last_run"] = now.isoformat()
+        upserted = 0
+        try:
+            async with http_client.new_session("nvd_sync") as session:
+                while start < now:
+                    end = min(now, start + NVD_SYNC_WINDOW)
+                    # Sem noRejected: a rejeição de uma CVE já indexada precisa sobrescrever o registro
+                    window = {"lastModStartDate": _api_date(start), "lastModEndDate": _api_date(end)}
+                    async for page in iter_nvd_pages(session, window):
+                        upserted += await persistence.run(_store_page, store, page)
+                    await persistence.run(store.set_last_sync, end)
+                    start = end
+        except NvdError:
+            # Detalhe já registrado em sync_status/log por _request
+            return upserted
+        except Exception as e:
+            sync_status["last_error"] = f"{type(e).__name__}: {e}"
+            log.error(f"❌ Erro ao sincronizar CVEs da NVD: {e}")
+            return upserted
+        finally:
+            sync_status["upserted"] += upserted
+
+        pruned = await persistence.run(store.prune, NVD_RETENTION_DAYS)
+        sync_status["last_error"] = ""
+        log.info(f"🔄 NVD sincronizada: {upserted} CVE(s) atualizadas, {pruned} removida(s) do cache.")
+        return upserted
+
+
+def _store_page(store: CveStore, page: Dict[str, Any]) -> int:
+    """Converte e grava uma página (roda na thread de persistência)."""
+    return store.upsert(parse_nvd_item(item) for item in page.get("vulnerabilities", []))
+
+
+def nvd_cache_stats() -> Dict[str, Any]:
+    store = get_cve_store()
+    last = store.last_sync()
+    return {
+        **sync_status,
+        "cached": store.count(),
+        "last_sync": last.isoformat() if last else None,
+        "rate_limit": nvd_limiter.max_requests,
+        "rate_wait_s": round(nvd_limiter.waited, 1),
+    }
+
 
 async def fetch_nvd_cves(limit: int = 5) -> List[Dict[str, Any]]:
     """
-    Busca as últimas CVEs críticas/altas na API do NIST.
-    
+    Últimas CVEs críticas/altas (CVSS v3 >= 7.0) publicadas nos últimos 7 dias.
+
     Args:
         limit (int): Número máximo de CVEs para retornar.
-        
+
     Returns:
         List[Dict]: Lista de CVEs formatadas como 'news entries'.
     """
-    
-    # Filtra por data de publicação (últimos 7 dias) para reduzir load e focar em novidades
-    now = datetime.utcnow()
-    pub_start_date = (now - timedelta(days=7)).isoformat(timespec='milliseconds') + "Z"
-    pub_end_date = now.isoformat(timespec='milliseconds') + "Z"
-
-    params = {
-        "pubStartDate": pub_start_date,
-        "pubEndDate": pub_end_date,
-        "resultsPerPage": 20, # Pega um pouco mais para filtrar por CVSS depois
-        "noRejected": "" # Ignora CVEs rejeitadas
-    }
+    await sync_nvd()
+    since = datetime.utcnow() - timedelta(days=ALERT_WINDOW_DAYS)
+    results = []
+    for cve in get_cve_store().recent(since, min_score=ALERT_MIN_SCORE, limit=limit):
+        cve_id, score, summary = cve["id"], cve["score"], cve["summary"]
+        results.append({
+            "title": f"🚨 {cve_id} (CVSS {score}): {summary[:50]}...",
+            "link": f"https://nvd.nist.gov/vuln/detail/{cve_id}",
+            "summary": f"**Severity:** {cve['severity'] or 'UNKNOWN'} ({score})\n**Vector:** {cve['vector']}\n\n{summary}",
+            "published": cve["published"],  # ISO String
+            "source": "NIST NVD",
+        })
+    return results
 
-    headers = {
-        "User-Agent": "CyberIntelBot/1.0 (students_project)"
-    }
-    
-    # Adiciona API Key se configurada (aumenta rate limit)
-    if NVD_API_KEY:
-        headers["apiKey"] = NVD_API_KEY
-
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(NVD_API_URL, params=params, headers=headers, timeout=10) as resp:
-                if resp.status != 200:
-                    log.warning(f"⚠️ NVD API retornou status {resp.status}")
-                    return []
-                
-                data = await resp.json()
-                
-        cve_items = data.get("vulnerabilities", [])
-        results = []
-        
-        for item in cve_items:
-            cve = item.get("cve", {})
-            cve_id = cve.get("id")
-            
-            # 1. Checagem de Severidade (CVSS v3.1)
-            metrics = cve.get("metrics", {})
-            cvss_data = None
-            
-            # Tenta pegar V31, depois V30, depois V2
-            if "cvssMetricV31" in metrics:
-                cvss_data = metrics["cvssMetricV31"][0]["cvssData"]
-            elif "cvssMetricV30" in metrics:
-                cvss_data = metrics["cvssMetricV30"][0]["cvssData"]
-                
-            if not cvss_data:
-                continue # Pula se não tiver score CVSS moderno
-                
-            score = cvss_data.get("baseScore", 0)
-            
-            # Filtro: Apenas ALTA ou CRÍTICA (> 7.0)
-            if score < 7.0:
-                continue
-
-            # 2. Descrição
-            descriptions = cve.get("descriptions", [])
-            summary = "Sem descrição disponível."
-            for d in descriptions:
-                if d.get("lang") == "en":
-                    summary = d.get("value")
-                    break
-            
-            # 3. Formatação
-            entry = {
-                "title": f"🚨 {cve_id} (CVSS {score}): {summary[:50]}...",
-                "link": f"https://nvd.nist.gov/vuln/detail/{cve_id}",
-                "summary": f"**Severity:** {cvss_data.get('baseSeverity', 'UNKNOWN')} ({score})\n**Vector:** {cvss_data.get('vectorString')}\n\n{summary}",
-                "published": cve.get("published"), # ISO String
-                "source": "NIST NVD"
-            }
-            results.append(entry)
-            
-            if len(results) >= limit:
-                break
-                
-        return results
-
-
-
-    except Exception as e:
-        log.error(f"❌ Erro ao consultar NVD API: {e}")
-        return []
 
 async def get_cve_details(cve_id: str) -> Optional[Dict[str, Any]]:
     """
-    Busca detalhes de uma CVE específica.
+    Busca detalhes de uma CVE específica (índice local; API só se não estiver no cache).
     """
-    params = {"cveId": cve_id}
-    headers = {"User-Agent": "CyberIntelBot/1.0"}
-    if NVD_API_KEY:
-        headers["apiKey"] = NVD_API_KEY
-    
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(NVD_API_URL, params=params, headers=headers, timeout=10) as resp:
-                if resp.status != 200:
-                    return None
-                data = await resp.json()
-        
-        vulns = data.get("vulnerabilities", [])
+    store = get_cve_store()
+    cve = store.get(cve_id)
+    if cve is None:
+        try:
+            async with http_client.new_session("nvd") as session:
+                data = await _request(session, {"cveId": cve_id})
+        except Exception as e:
+            log.error(f"Erro ao buscar CVE details: {e}")
+            return None
+        vulns = (data or {}).get("vulnerabilities", [])
         if not vulns:
             return None
-            
-        cve_item = vulns[0].get("cve", {})
-        
-        # Extrai metrics (CVSS)
-        metrics = cve_item.get("metrics", {})
-        cvss = "UNKNOWN"
-        if "cvssMetricV31" in metrics:
-            cvss = metrics["cvssMetricV31"][0]["cvssData"]["baseScore"]
-        elif "cvssMetricV30" in metrics:
-            cvss = metrics["cvssMetricV30"][0]["cvssData"]["baseScore"]
-        elif "cvssMetricV2" in metrics:
-            cvss = metrics["cvssMetricV2"][0]["cvssData"]["baseScore"]
-            
-        # Extrai descrição
-        summary = "Sem descrição."
-        for d in cve_item.get("descriptions", []):
-            if d.get("lang") == "en":
-                summary = d.get("value")
-                break
-                
-        # Extrai referências
-        refs = [r.get("url") for r in cve_item.get("references", [])]
-        
-        # Extrai configs (produtos vulneráveis - simplificado)
-        products = []
-        # Nota: Parsing de CPE é complexo, aqui pegamos apenas se disponível de forma fácil
-        # Para simplificar, deixamos vazio por enquanto ou pegamos do configurations se sesejado.
-        
-        return {
-            "id": cve_item.get("id"),
-            "cvss": cvss,
-            "summary": summary,
-            "published": cve_item.get("published"),
-            "vulnerable_product": products,
-            "references": refs
-        }
-        
-    except Exception as e:
-        log.error(f"Erro ao buscar CVE details: {e}")
-        return None
+        cve = parse_nvd_item(vulns[0])
+        if cve is None:
+            return None
+        await persistence.run(store.upsert, [cve])
+
+    return {
+        "id": cve["id"],
+        "cvss": cve["score"] if cve["score"] is not None else "UNKNOWN",
+        "summary": cve["summary"],
+        "published": cve["published"],
+        # Parsing de CPE é complexo; produtos vulneráveis ficam vazios por enquanto
+        "vulnerable_product": [],
+        "references": cve["refs"],
+    }
 
 
 async def fetch_nvd_metrics(hours: int = 24) -> Dict[str, Any]:
     """
-    Busca contagens de CVEs por severidade nas últimas N horas (NVD API).
+    Contagens de CVEs por severidade publicadas nas últimas N horas (índice local).
     Usado para métricas do dashboard e para enviar ao Node-RED (gauge).
 
     Returns:
         Dict com: critical_count, high_count, total, period_hours, ok (bool).
     """
-    now = datetime.utcnow()
-    end = now
-    start = now - timedelta(hours=hours)
-    pub_start = start.isoformat(timespec="milliseconds") + "Z"
-    pub_end = end.isoformat(timespec="milliseconds") + "Z"
-
-    params = {
-        "pubStartDate": pub_start,
-        "pubEndDate": pub_end,
-        "resultsPerPage": 200,
-        "noRejected": "",
-    }
-    headers = {"User-Agent": "CyberIntelBot/1.0 (metrics)"}
-    if NVD_API_KEY:
-        headers["apiKey"] = NVD_API_KEY
-
-    result = {
-        "critical_count": 0,
-        "high_count": 0,
-        "total": 0,
-        "period_hours": hours,
-        "ok": False,
-    }
-
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(NVD_API_URL, params=params, headers=headers, timeout=15) as resp:
-                if resp.status != 200:
-                    log.warning(f"NVD metrics: API retornou {resp.status}")
-                    return result
-                data = await resp.json()
-
-        total_results = data.get("totalResults", 0)
-        items = data.get("vulnerabilities", [])
-
-        for item in items:
-            cve = item.get("cve", {})
-            metrics = cve.get("metrics", {})
-            cvss_data = None
-            if "cvssMetricV31" in metrics:
-                cvss_data = metrics["cvssMetricV31"][0].get("cvssData", {})
-            elif "cvssMetricV30" in metrics:
-                cvss_data = metrics["cvssMetricV30"][0].get("cvssData", {})
-
-            if not cvss_data:
-                continue
-            score = cvss_data.get("baseScore", 0)
-            severity = (cvss_data.get("baseSeverity") or "").upper()
-            if score >= 9.0 or severity == "CRITICAL":
-                result["critical_count"] += 1
-            elif score >= 7.0 or severity == "HIGH":
-                result["high_count"] += 1
-
-        result["total"] = len(items)
-        result["ok"] = True
-        # Se a API retornar totalResults maior que a página, podemos usá-lo como referência
-        if total_results > result["total"]:
-            result["total_results_api"] = total_results
-        return result
-    except Exception as e:
-        log.error(f"Erro ao buscar métricas NVD: {e}")
+    await sync_nvd()
+    store = get_cve_store()
+    result = {"critical_count": 0, "high_count": 0, "total": 0, "period_hours": hours, "ok": False}
+    last = store.last_sync()
+    if last is None:
         return result
+    result.update(store.severity_counts(datetime.utcnow() - timedelta(hours=hours)))
+    result["ok"] = True
+    result["last_sync"] = last.isoformat()
+    return result
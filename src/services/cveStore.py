@@ -0,0 +1,207 @@
+"""
+CVE Store - Índice local (SQLite) das CVEs da NVD.
+
+O scanner, o /dashboard e o /cve consultavam a API da NVD a cada chamada
+(janela inteira de 7 dias, 200 CVEs de 24h, uma requisição por /cve). Agora
+a sincronização incremental (cveService.sync_nvd) grava aqui só o que mudou
+desde a última janela, e as consultas respondem a partir deste índice.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+log = logging.getLogger("CyberIntel")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cves (
+    id            TEXT PRIMARY KEY,
+    published     TEXT,
+    last_modified TEXT,
+    cvss_version  TEXT,
+    score         REAL,
+    severity      TEXT,
+    vector        TEXT,
+    summary       TEXT,
+    refs          TEXT,
+    vuln_status   TEXT,
+    cached_at     REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_cves_published ON cves (published);
+CREATE INDEX IF NOT EXISTS idx_cves_cached_at ON cves (cached_at);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+_FIELDS = ("id", "published", "last_modified", "cvss_version", "score", "severity", "vector", "summary", "refs",
+           "vuln_status")
+# Colunas acrescentadas depois da primeira versão do schema (migração de bancos existentes)
+_ADDED_COLUMNS = (("vuln_status", "TEXT"),)
+# CVEs rejeitadas continuam no índice (a sincronização precisa ver a rejeição para
+# sobrescrever a versão antiga), mas ficam fora dos alertas e das métricas
+REJECTED = "Rejected"
+# Versões CVSS "modernas" (o alerta do scanner e as métricas ignoram CVEs só com v2)
+CVSS_V3 = ("3.1", "3.0")
+_LAST_SYNC_KEY = "last_sync"
+
+
+def nvd_timestamp(dt: datetime) -> str:
+    """Formato dos campos published/lastModified da NVD (UTC, milissegundos, sem fuso)."""
+    return dt.isoformat(timespec="milliseconds")[:23]
+
+
+def parse_nvd_item(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Converte um item de `vulnerabilities` da API 2.0 em registro do índice."""
+    cve = item.get("cve") or {}
+    cve_id = cve.get("id")
+    if not cve_id:
+        return None
+
+    metrics = cve.get("metrics") or {}
+    version, cvss_data, severity = None, {}, None
+    # Tenta pegar V31, depois V30, depois V2
+    for key, label in (("cvssMetricV31", "3.1"), ("cvssMetricV30", "3.0"), ("cvssMetricV2", "2.0")):
+        if metrics.get(key):
+            metric = metrics[key][0]
+            version, cvss_data = label, metric.get("cvssData") or {}
+            # No v2 a severidade fica fora do cvssData
+            severity = cvss_data.get("baseSeverity") or metric.get("baseSeverity")
+            break
+
+    summary = "Sem descrição disponível."
+    for d in cve.get("descriptions", []):
+        if d.get("lang") == "en":
+            summary = d.get("value") or summary
+            break
+
+    return {
+        "id": cve_id,
+        "published": (cve.get("published") or "")[:23],
+        "last_modified": (cve.get("lastModified") or "")[:23],
+        "cvss_version": version,
+        "score": cvss_data.get("baseScore"),
+        "severity": (severity or "").upper() or None,
+        "vector": cvss_data.get("vectorString"),
+        "summary": summary,
+        "refs": [r.get("url") for r in cve.get("references", []) if r.get("url")],
+        "vuln_status": cve.get("vulnStatus"),
+    }
+
+
+class CveStore:
+    """Tabela de CVEs indexada por publicação, com o marco da última sincronização."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(cves)")}
+        for name, sql_type in _ADDED_COLUMNS:
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE cves ADD COLUMN {name} {sql_type}")
+        self._lock = threading.RLock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # -----------------------------------------------------
+    # Escrita (sincronização)
+    # -----------------------------------------------------
+
+    def upsert(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Insere/atualiza registros (parse_nvd_item) numa transação. Retorna quantos gravou."""
+        now = time.time()
+        rows = [
+            (*(json.dumps(r["refs"]) if f == "refs" else r.get(f) for f in _FIELDS), now)
+            for r in records if r
+        ]
+        if not rows:
+            return 0
+        placeholders = ", ".join("?" * (len(_FIELDS) + 1))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO cves ({', '.join(_FIELDS)}, cached_at) VALUES ({placeholders})", rows
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return len(rows)
+
+    def prune(self, max_age_days: int) -> int:
+        """Remove CVEs que nenhuma sincronização/consulta tocou nos últimos N dias."""
+        cutoff = time.time() - max_age_days * 86400
+        with self._lock:
+            return self._conn.execute("DELETE FROM cves WHERE cached_at < ?", (cutoff,)).rowcount
+
+    def last_sync(self) -> Optional[datetime]:
+        """Fim da última janela sincronizada por completo (None = nunca sincronizou)."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (_LAST_SYNC_KEY,)).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def set_last_sync(self, when: datetime) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (_LAST_SYNC_KEY, when.isoformat())
+            )
+
+    # -----------------------------------------------------
+    # Consultas
+    # -----------------------------------------------------
+
+    def get(self, cve_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_FIELDS)} FROM cves WHERE id = ?", (cve_id,)
+            ).fetchone()
+        return self._to_record(row) if row else None
+
+    def recent(self, since: datetime, min_score: float = 0.0, limit: int = 20) -> List[Dict[str, Any]]:
+        """CVEs com CVSS v3 (não rejeitadas) publicadas desde `since`, mais recentes primeiro."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_FIELDS)} FROM cves"
+                " WHERE published >= ? AND cvss_version IN (?, ?) AND score >= ?"
+                " AND vuln_status IS NOT ? ORDER BY published DESC LIMIT ?",
+                (nvd_timestamp(since), *CVSS_V3, min_score, REJECTED, limit),
+            ).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def severity_counts(self, since: datetime) -> Dict[str, int]:
+        """Contagem de CVEs não rejeitadas publicadas desde `since`: críticas/altas (CVSS v3) e total."""
+        with self._lock:
+            critical, high, total = self._conn.execute(
+                "SELECT"
+                " SUM(cvss_version IN (?, ?) AND (score >= 9.0 OR severity = 'CRITICAL')),"
+                " SUM(cvss_version IN (?, ?) AND NOT (score >= 9.0 OR severity = 'CRITICAL')"
+                "     AND (score >= 7.0 OR severity = 'HIGH')),"
+                " COUNT(*)"
+                " FROM cves WHERE published >= ? AND vuln_status IS NOT ?",
+                (*CVSS_V3, *CVSS_V3, nvd_timestamp(since), REJECTED),
+            ).fetchone()
+        return {"critical_count": critical or 0, "high_count": high or 0, "total": total or 0}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cves").fetchone()[0]
+
+    @staticmethod
+    def _to_record(row) -> Dict[str, Any]:
+        record = dict(zip(_FIELDS, row))
+        record["refs"] = json.loads(record["refs"] or "[]")
+        return record
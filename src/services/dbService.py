@@ -1,24 +1,131 @@
 import os
 import json
-import requests
 from datetime import datetime
-from utils.storage import p, load_json_safe, save_json_safe
-from settings import NODE_RED_ENDPOINT
+from utils.storage import p, load_json_safe, save_json_safe, use_sqlite_state, get_state_store
+from utils.seen_store import LinkIndex
+from core.nodered_outbox import nodered_outbox
 
 DB_PATH = p("database.json")  # Usa função p() para garantir caminho correto
+# Journal append-only (JSON Lines) com as notícias ainda não consolidadas no database.json
+JOURNAL_PATH = os.path.splitext(DB_PATH)[0] + ".journal.jsonl"
 
 import logging
 
 log = logging.getLogger("CyberIntel")
 
+# Consolida o journal no database.json a cada N notícias
+JOURNAL_COMPACT_EVERY = 200
+
+# Banco em memória (carregado uma vez) + índice + controle do journal
+_db = None
+_sent_index = None
+_db_mtime = None
+_journal_pending = 0
+
+
+def _default_db():
+    return {"sent_news": [], "stats": {"total_processed": 0}}
+
+
+def _file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _read_journal():
+    """Lê as entradas do journal (linhas inválidas, ex: escrita interrompida, são ignoradas)."""
+    entries = []
+    if not os.path.exists(JOURNAL_PATH):
+        return entries
+    with open(JOURNAL_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                log.warning(f"⚠️ Linha inválida ignorada no journal: {line[:80]}")
+                continue
+            if isinstance(entry, dict) and entry.get("link"):
+                entries.append(entry)
+    return entries
+
+
+def _ensure_loaded():
+    """
+    Carrega database.json uma única vez (ou de novo se o arquivo for alterado por fora)
+    e reaplica o journal pendente, montando o índice de links.
+    """
+    global _db, _sent_index, _db_mtime, _journal_pending
+    mtime = _file_mtime(DB_PATH)
+    if _db is not None and mtime == _db_mtime:
+        return _db
+
+    if not os.path.exists(DB_PATH):
+        init_db()
+        mtime = _file_mtime(DB_PATH)
+
+    db = load_json_safe(DB_PATH, _default_db(), validate=True)
+    if not isinstance(db, dict):
+        db = _default_db()
+    sent_news = db.setdefault('sent_news', [])
+    db.setdefault('stats', {"total_processed": 0})
+
+    # Índice em memória dos links enviados (membership O(1)). Sem limite: espelha
+    # sent_news inteiro, senão links antigos voltariam a contar como não enviados
+    index = LinkIndex(max_items=None, ttl=None,
+                      items=[item.get('link') for item in sent_news if isinstance(item, dict)])
+
+    # Replay do journal (ignora o que já foi consolidado antes de uma queda)
+    pending = 0
+    for entry in _read_journal():
+        pending += 1
+        if entry["link"] in index:
+            continue
+        sent_news.append(entry)
+        index.add(entry["link"])
+        db['stats']['total_processed'] = db['stats'].get('total_processed', 0) + 1
+
+    _db, _sent_index, _db_mtime, _journal_pending = db, index, mtime, pending
+    return _db
+
+
+def _append_journal(entry):
+    """Acrescenta uma linha ao journal com fsync (registro durável sem reescrever o banco)."""
+    with open(JOURNAL_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def compact_db():
+    """
+    Consolida o journal no database.json (escrita atômica) e trunca o journal.
+    Chamado a cada JOURNAL_COMPACT_EVERY notícias e no encerramento do bot.
+    """
+    global _db_mtime, _journal_pending
+    if use_sqlite_state() or _db is None or not _journal_pending:
+        return
+    save_json_safe(DB_PATH, _db, atomic=True)
+    _db_mtime = _file_mtime(DB_PATH)
+    try:
+        os.remove(JOURNAL_PATH)
+    except FileNotFoundError:
+        pass
+    log.debug(f"🗜️ Journal consolidado no database.json ({_journal_pending} entradas)")
+    _journal_pending = 0
+
 def init_db():
     """
     Inicializa o arquivo JSON de banco de dados se não existir.
     Cria a estrutura básica com 'sent_news' e 'stats'.
     Usa funções seguras de storage para garantir integridade.
     """
-    default_data = {"sent_news": [], "stats": {"total_processed": 0}}
-    
+    default_data = _default_db()
+
     if not os.path.exists(DB_PATH):
         try:
             save_json_safe(DB_PATH, default_data, atomic=True)
@@ -28,81 +135,96 @@ def init_db():
 
 def load_db():
     """
-    Carrega banco de dados usando funções seguras com validação.
+    Retorna o banco de dados em memória (database.json + journal pendente).
+    O arquivo só é lido novamente se for alterado por outro processo.
     """
-    if not os.path.exists(DB_PATH):
-        init_db()
-    
-    return load_json_safe(DB_PATH, {"sent_news": [], "stats": {"total_processed": 0}}, validate=True)
+    return _ensure_loaded()
 
 def save_db(data):
     """
     Salva banco de dados usando escrita atômica e file locking.
     Garante integridade para auditoria e compliance.
     """
+    global _db, _sent_index, _db_mtime, _journal_pending
     save_json_safe(DB_PATH, data, atomic=True)
+    try:
+        os.remove(JOURNAL_PATH)
+    except FileNotFoundError:
+        pass
+    # Próximo acesso recarrega a partir do arquivo salvo
+    _db = _sent_index = _db_mtime = None
+    _journal_pending = 0
 
 def is_news_sent(link):
     """
     Verifica se um link já foi enviado anteriormente.
-    
+
     Args:
         link (str): URL da notícia.
-        
+
     Returns:
         bool: True se já estiver no banco, False caso contrário.
     """
-    db = load_db()
-    # Verifica se o link está na lista de enviados
-    # Otimização: para muitos dados, usar set seria melhor, mas para JSON simples list comprehension serve
-    return any(item['link'] == link for item in db.get('sent_news', []))
+    if use_sqlite_state():
+        return get_state_store().is_news_sent(link)
+    _ensure_loaded()
+    return link in _sent_index
 
 def notify_nodered(item):
-    """Envia a nova notícia para o dashboard do Node-RED"""
-    try:
-        # Timeout curto para não travar o bot se o Node-RED estiver offline
-        requests.post(NODE_RED_ENDPOINT, json=item, timeout=2)
-    except Exception as e:
-        log.warning(f"⚠️ Erro ao comunicar com Node-RED: {e}")
+    """Enfileira a nova notícia para o dashboard do Node-RED (envio em lote, sem bloquear)"""
+    nodered_outbox.push(item)
 
 def mark_news_as_sent(link, title="Sem Título"):
     """
     Registra uma notícia como enviada no banco de dados e notifica o Node-RED via webhook.
-    
+
     Args:
         link (str): URL da notícia.
         title (str): Título da notícia.
     """
-    db = load_db()
-    
-    # Verifica duplicidade antes de adicionar
-    if not any(item['link'] == link for item in db.get('sent_news', [])):
-        entry = {
-            "title": title,
-            "link": link,
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        db.setdefault('sent_news', []).append(entry)
-        
-        if 'stats' not in db:
-            db['stats'] = {"total_processed": 0}
-            
-        db['stats']['total_processed'] = db['stats'].get('total_processed', 0) + 1
-        
-        save_db(db)
-        
-        # Envia para o SOC Dashboard
-        notify_nodered(entry)
+    global _journal_pending
+    entry = {
+        "title": title,
+        "link": link,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+    if use_sqlite_state():
+        # Gravação incremental: uma linha por notícia, sem reescrever o banco inteiro
+        if get_state_store().add_sent_news(link, title, entry["timestamp"]):
+            notify_nodered(entry)
+        return
+
+    db = _ensure_loaded()
+
+    # Verifica duplicidade antes de adicionar (O(1) pelo índice)
+    if link in _sent_index:
+        return
+
+    _append_journal(entry)
+    db['sent_news'].append(entry)
+    db['stats']['total_processed'] = db['stats'].get('total_processed', 0) + 1
+    _sent_index.add(link)
+    _journal_pending += 1
+
+    if _journal_pending >= JOURNAL_COMPACT_EVERY:
+        compact_db()
+
+    # Envia para o SOC Dashboard
+    notify_nodered(entry)
 
 def get_db_stats():
-    db = load_db()
+    if use_sqlite_state():
+        return get_state_store().sent_news_stats()
+
+    db = _ensure_loaded()
     total = db.get('stats', {}).get('total_processed', 0)
-    
+
     sent_news = db.get('sent_news', [])
     if sent_news:
         # Assume que o último adicionado é o mais recente
         last_date = sent_news[-1].get('timestamp', "N/A")
     else:
         last_date = "N/A"
-        
+
     return total, last_date
@@ -1,6 +1,6 @@
-import aiohttp
 import logging
 from typing import Dict, Any, Optional, List
+from utils.http import http_client
 from settings import URLSCAN_API_KEY, OTX_API_KEY, VT_API_KEY, GREYNOISE_API_KEY, SHODAN_API_KEY
 
 log = logging.getLogger("CyberIntel_ThreatService")
@@ -32,7 +32,7 @@ class ThreatService:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_client.new_session("threat") as session:
                 async with session.post(endpoint, headers=headers, json=data, timeout=30) as resp:
                     if resp.status == 200:
                         return await resp.json()
@@ -50,7 +50,7 @@ class ThreatService:
         if not uuid: return None
         endpoint = f"https://urlscan.io/api/v1/result/{uuid}/"
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_client.new_session("threat") as session:
                 async with session.get(endpoint, timeout=30) as resp:
                      if resp.status == 200:
                          return await resp.json()
@@ -70,7 +70,7 @@ class ThreatService:
         headers = {"X-OTX-API-KEY": OTX_API_KEY}
         
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_client.new_session("threat") as session:
                 async with session.get(endpoint, headers=headers, params={"limit": limit}, timeout=30) as resp:
                     if resp.status == 200:
                         data = await resp.json()
@@ -94,7 +94,7 @@ class ThreatService:
         data = {"url": url}
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_client.new_session("threat") as session:
                 # 1. Submeter
                 async with session.post(endpoint, headers=headers, data=data, timeout=30) as resp:
                     if resp.status != 200:
@@ -114,7 +114,7 @@ class ThreatService:
         """
         endpoint = "https://api.ransomware.live/v2/recentvictims"
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_client.new_session("threat") as session:
                 async with session.get(endpoint, timeout=30) as resp:
                     if resp.status != 200:
                         log.warning(f"Ransomware.live retornou status {resp.status}")
@@ -146,7 +146,7 @@ class ThreatService:
         headers = {"key": GREYNOISE_API_KEY}
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_client.new_session("threat") as session:
                 async with session.get(endpoint, headers=headers, timeout=15) as resp:
                     if resp.status == 200:
                         return await resp.json()
@@ -171,7 +171,7 @@ class ThreatService:
         endpoint = f"https://api.shodan.io/shodan/host/{ip}?key={SHODAN_API_KEY}&minify=true"
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_client.new_session("threat") as session:
                 async with session.get(endpoint, timeout=20) as resp:
                     if resp.status == 200:
                         return await resp.json()
@@ -0,0 +1,69 @@
+"""
+Testes da impressão digital do corpo dos feeds (utils.cache.FingerprintReader).
+"""
+import pytest
+
+from utils.cache import FingerprintReader, body_fingerprint
+
+URL = "https://feed.example/rss"
+
+
+async def _chunks(data: bytes, size: int = 4):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def _collect(reader):
+    return b"".join([chunk async for chunk in reader])
+
+
+@pytest.mark.asyncio
+async def test_full_body_unchanged_and_changed():
+    """Corpo idêntico é detectado; corpo diferente ou maior é lido inteiro normalmente."""
+    cache = {}
+    body = b"<rss><item>a</item></rss>"
+    first = FingerprintReader(_chunks(body), URL, cache)
+    assert not await first.unchanged()  # sem impressão digital ainda
+    assert await first.read(1024) == body
+    first.remember()
+    assert cache[URL] == {"body_hash": body_fingerprint(body), "body_len": len(body)}
+
+    assert await FingerprintReader(_chunks(body), URL, cache).unchanged()
+
+    for other in (body.replace(b"a", b"b"), body + b"<!-- novo -->", body[:-3]):
+        reader = FingerprintReader(_chunks(other), URL, cache)
+        assert not await reader.unchanged()
+        assert await _collect(reader) == other  # nada do que foi lido na comparação se perde
+
+
+@pytest.mark.asyncio
+async def test_partial_read_compares_only_prefix():
+    """Leitura interrompida (parse incremental) compara só o prefixo consumido."""
+    cache = {}
+    body = b"<rss><item>novo</item><item>velho</item></rss>"
+    reader = FingerprintReader(_chunks(body), URL, cache)
+    consumed = b""
+    async for chunk in reader:
+        consumed += chunk
+        if len(consumed) >= 20:
+            break
+    reader.remember(partial=True)
+    assert cache[URL]["body_partial"] and cache[URL]["body_len"] == len(consumed)
+
+    # Mesmo prefixo, final diferente: tratado como inalterado
+    assert await FingerprintReader(_chunks(consumed + b"<item>x</item></rss>"), URL, cache).unchanged()
+    # Item novo no topo muda o prefixo
+    assert not await FingerprintReader(_chunks(b"<rss><item>mais novo</item>" + body[5:]), URL, cache).unchanged()
+
+    # Leitura completa limpa a marca de parcial
+    full = FingerprintReader(_chunks(body), URL, cache)
+    await full.read(1024)
+    full.remember()
+    assert "body_partial" not in cache[URL]
+
+
+@pytest.mark.asyncio
+async def test_read_respects_max_bytes():
+    """Corpo acima do limite devolve None."""
+    reader = FingerprintReader(_chunks(b"x" * 100), URL, {})
+    assert await reader.read(50) is None
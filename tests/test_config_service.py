@@ -0,0 +1,64 @@
+"""
+Testes do cache de config.json (utils.config.ConfigService).
+"""
+import json
+import os
+
+import pytest
+
+from core.filters import engine, match_intel
+from utils.config import ConfigService
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data))
+
+
+def test_reads_file_once_and_serves_immutable_snapshot(tmp_path):
+    """Leituras repetidas não voltam ao disco; snapshot não aceita alteração."""
+    cfg_path = tmp_path / "config.json"
+    _write(cfg_path, {"1": {"channel_id": 10, "filters": ["todos"], "language": "pt_BR"}})
+    service = ConfigService(str(cfg_path), stat_interval=0)
+
+    first = service.snapshot()
+    assert service.snapshot() is first
+    assert service.loads == 1
+    assert service.guild(1).channel_id == 10
+    assert service.filters("1") == ("todos",)
+    with pytest.raises(TypeError):
+        first["1"]["channel_id"] = 99
+
+
+def test_invalidates_when_file_changes(tmp_path):
+    """Alteração externa do arquivo (mtime/tamanho) invalida o cache."""
+    cfg_path = tmp_path / "config.json"
+    _write(cfg_path, {"1": {"language": "pt_BR"}})
+    service = ConfigService(str(cfg_path), stat_interval=0)
+    assert service.language("1") == "pt_BR"
+
+    _write(cfg_path, {"1": {"language": "en_US"}, "2": {}})
+    st = os.stat(cfg_path)
+    os.utime(cfg_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert service.language("1") == "en_US"
+    assert service.loads == 2
+
+
+def test_update_guild_persists_and_refreshes_cache(tmp_path):
+    """Escrita pela API grava o arquivo e atualiza o cache sem nova leitura."""
+    cfg_path = tmp_path / "config.json"
+    service = ConfigService(str(cfg_path), stat_interval=0)
+
+    service.update_guild(5, defaults={"filters": [], "channel_id": None}, language="es_ES")
+    assert json.loads(cfg_path.read_text()) == {"5": {"filters": [], "channel_id": None, "language": "es_ES"}}
+    assert service.language(5) == "es_ES"
+
+
+def test_snapshot_works_with_match_intel(tmp_path):
+    """Filtros congelados (tupla) continuam aceitos pelo motor de filtros."""
+    cfg_path = tmp_path / "config.json"
+    _write(cfg_path, {"1": {"channel_id": 10, "filters": ["todos"]}})
+    config = ConfigService(str(cfg_path)).snapshot()
+
+    title = "Critical ransomware exploit hits hospitals"
+    verdict = engine.evaluate(title, "")
+    assert match_intel("1", title, "", config, verdict=verdict) == engine.accepts(verdict, ["todos"])
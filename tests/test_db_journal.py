@@ -0,0 +1,70 @@
+"""
+Testes do dbService com índice em memória e journal append-only.
+Redireciona DB_PATH/JOURNAL_PATH para um diretório temporário.
+"""
+import json
+
+import pytest
+
+from src.services import dbService
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(dbService, "DB_PATH", str(tmp_path / "database.json"))
+    monkeypatch.setattr(dbService, "JOURNAL_PATH", str(tmp_path / "database.journal.jsonl"))
+    monkeypatch.setattr(dbService, "notify_nodered", lambda item: None)
+    monkeypatch.setattr(dbService, "_db", None)
+    monkeypatch.setattr(dbService, "_sent_index", None)
+    monkeypatch.setattr(dbService, "_db_mtime", None)
+    monkeypatch.setattr(dbService, "_journal_pending", 0)
+    return tmp_path
+
+
+def test_mark_appends_to_journal_without_rewriting_db(db):
+    """Nova notícia vai para o journal; database.json só muda na compactação."""
+    dbService.init_db()
+    before = (db / "database.json").read_text()
+
+    dbService.mark_news_as_sent("https://x/1", "A")
+    dbService.mark_news_as_sent("https://x/1", "A")  # duplicado: ignorado
+
+    assert (db / "database.json").read_text() == before
+    lines = (db / "database.journal.jsonl").read_text().splitlines()
+    assert [json.loads(line)["link"] for line in lines] == ["https://x/1"]
+    assert dbService.is_news_sent("https://x/1")
+    assert dbService.get_db_stats()[0] == 1
+
+
+def test_journal_is_replayed_after_restart(db, monkeypatch):
+    """Entradas do journal sobrevivem a um reinício (recarga do zero)."""
+    dbService.init_db()
+    dbService.mark_news_as_sent("https://x/1", "A")
+
+    monkeypatch.setattr(dbService, "_db", None)
+    monkeypatch.setattr(dbService, "_sent_index", None)
+    assert dbService.is_news_sent("https://x/1")
+    assert dbService.get_db_stats()[0] == 1
+
+
+def test_compaction_folds_journal_into_db(db, monkeypatch):
+    """Ao atingir o limite, o journal é consolidado e removido."""
+    monkeypatch.setattr(dbService, "JOURNAL_COMPACT_EVERY", 2)
+    dbService.init_db()
+    dbService.mark_news_as_sent("https://x/1", "A")
+    dbService.mark_news_as_sent("https://x/2", "B")
+
+    assert not (db / "database.journal.jsonl").exists()
+    data = json.loads((db / "database.json").read_text())
+    assert [item["link"] for item in data["sent_news"]] == ["https://x/1", "https://x/2"]
+    assert data["stats"]["total_processed"] == 2
+
+
+def test_index_covers_every_sent_news_entry(db):
+    """O índice não descarta links antigos: tudo em sent_news continua contando como enviado."""
+    sent = [{"title": str(i), "link": f"https://x/{i}", "timestamp": "2025-01-01 00:00:00"} for i in range(60000)]
+    (db / "database.json").write_text(json.dumps({"sent_news": sent, "stats": {"total_processed": len(sent)}}))
+
+    assert dbService.is_news_sent("https://x/0")
+    dbService.mark_news_as_sent("https://x/0", "0")
+    assert not (db / "database.journal.jsonl").exists()
@@ -0,0 +1,114 @@
+"""
+Testes da fila de envio por canal (core.delivery).
+Usa canais falsos; não conecta ao Discord.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+from core.delivery import DeliveryQueue
+
+
+class FakeChannel:
+    def __init__(self, channel_id, fail_with=None):
+        self.id = channel_id
+        self.sent = []
+        self._fail_with = list(fail_with or [])
+
+    async def send(self, **kwargs):
+        if self._fail_with:
+            raise self._fail_with.pop(0)
+        self.sent.append(kwargs)
+
+
+def _http_error(status, retry_after=None):
+    headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+    response = SimpleNamespace(status=status, reason="test", headers=headers)
+    return discord.HTTPException(response, "erro simulado")
+
+
+@pytest.mark.asyncio
+async def test_enqueue_does_not_block_and_preserves_order():
+    """enqueue retorna imediatamente; o worker entrega na ordem de chegada."""
+    queue = DeliveryQueue(min_interval=0)
+    channel = FakeChannel(1)
+
+    for i in range(3):
+        assert queue.enqueue(channel, content=f"msg {i}") is True
+    assert queue.total_depth() >= 2
+
+    await asyncio.wait_for(queue.join(), timeout=2)
+    assert [m["content"] for m in channel.sent] == ["msg 0", "msg 1", "msg 2"]
+    assert queue.total_depth() == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_send_is_retried_with_retry_after():
+    """429 com Retry-After deve ser reenviado, não descartado."""
+    queue = DeliveryQueue(min_interval=0)
+    channel = FakeChannel(2, fail_with=[_http_error(429, retry_after=0)])
+
+    queue.enqueue(channel, content="alerta")
+    await asyncio.wait_for(queue.join(), timeout=2)
+    assert channel.sent == [{"content": "alerta"}]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_new_messages():
+    """Fila cheia devolve False em vez de crescer sem limite."""
+    queue = DeliveryQueue(min_interval=0, max_queue=1)
+    channel = FakeChannel(3)
+
+    assert queue.enqueue(channel, content="a") is True
+    assert queue.enqueue(channel, content="b") is False
+    await asyncio.wait_for(queue.join(), timeout=2)
+    assert len(channel.sent) == 1
+
+
+@pytest.mark.asyncio
+async def test_on_result_reports_confirmed_and_failed_delivery():
+    """on_result(True) só depois do envio aceito; 403 e 4xx reportam False."""
+    queue = DeliveryQueue(min_interval=0)
+    ok_channel = FakeChannel(4)
+    forbidden = FakeChannel(5, fail_with=[discord.Forbidden(_http_error(403).response, "sem permissão")])
+    rejected = FakeChannel(6, fail_with=[_http_error(400)])
+    results = {}
+
+    for channel in (ok_channel, forbidden, rejected):
+        queue.enqueue(channel, content="alerta", on_result=lambda ok, cid=channel.id: results.setdefault(cid, ok))
+    await asyncio.wait_for(queue.join(), timeout=2)
+    assert results == {4: True, 5: False, 6: False}
+
+
+@pytest.mark.asyncio
+async def test_exhausted_retries_report_failure(monkeypatch):
+    """Depois de esgotar as tentativas, a mensagem é reportada como não entregue."""
+    monkeypatch.setattr("core.delivery.DELIVERY_BACKOFF_BASE", 0)
+    queue = DeliveryQueue(min_interval=0, max_retries=1)
+    channel = FakeChannel(7, fail_with=[_http_error(503), _http_error(503)])
+    results = []
+
+    queue.enqueue(channel, content="alerta", on_result=results.append)
+    await asyncio.wait_for(queue.join(), timeout=2)
+    assert results == [False] and channel.sent == []
+
+
+@pytest.mark.asyncio
+async def test_close_drains_queue_and_reports_leftovers():
+    """close() espera as filas; o que não sai no prazo recebe on_result(False)."""
+    queue = DeliveryQueue(min_interval=0)
+    channel = FakeChannel(8)
+    results = []
+    for i in range(3):
+        queue.enqueue(channel, content=f"msg {i}", on_result=results.append)
+    assert await queue.close(timeout=2) == 0
+    assert results == [True, True, True] and len(channel.sent) == 3
+
+    slow = DeliveryQueue(min_interval=5)
+    pending = []
+    for i in range(3):
+        slow.enqueue(FakeChannel(9), content=f"msg {i}", on_result=pending.append)
+    assert await slow.close(timeout=0.2) == 1
+    assert pending == [True, False, False]
@@ -0,0 +1,75 @@
+"""
+Testes da agenda de polling adaptativo por feed (core.feed_schedule).
+"""
+from core.feed_schedule import FeedSchedule
+
+HOUR = 3600
+DAY = 24 * HOUR
+NOW = 1_700_000_000.0
+
+
+def _schedule(**kwargs):
+    kwargs.setdefault("min_interval", 10 * 60)
+    kwargs.setdefault("max_interval", 6 * HOUR)
+    kwargs.setdefault("default_interval", 30 * 60)
+    return FeedSchedule(**kwargs)
+
+
+def test_new_feeds_are_due_and_record_schedules_next_poll():
+    """Feed nunca buscado está vencido; após o poll só volta a vencer no próximo horário."""
+    schedule = _schedule()
+    url = "https://feed.example/rss"
+    assert schedule.due([url], now=NOW) == [url]
+
+    interval = schedule.record(url, entry_times=[NOW - HOUR, NOW - 2 * HOUR], now=NOW)
+    assert schedule.due([url], now=NOW + interval - 1) == []
+    assert schedule.due([url], now=NOW + interval) == [url]
+
+
+def test_busy_feed_polls_faster_than_weekly_feed():
+    """Cadência horária resulta em intervalo curto; cadência semanal vai para o teto."""
+    schedule = _schedule()
+    hourly = schedule.record("https://busy/", entry_times=[NOW - i * HOUR for i in range(10)], now=NOW)
+    weekly = schedule.record("https://quiet/", entry_times=[NOW - 3 * DAY - i * 7 * DAY for i in range(5)], now=NOW)
+    assert hourly == 30 * 60
+    assert weekly == 6 * HOUR
+
+
+def test_idle_polls_back_off_and_new_entry_resets_interval():
+    """304/sem novidade aumenta o intervalo; entrada nova volta ao alvo da cadência."""
+    schedule = _schedule()
+    url = "https://feed.example/rss"
+    times = [NOW - i * HOUR for i in range(10)]
+    base = schedule.record(url, entry_times=times, now=NOW)
+
+    backed_off = schedule.record(url, not_modified=True, now=NOW + base)
+    assert backed_off > base
+    assert schedule.record(url, entry_times=times, now=NOW + 2 * base) > backed_off  # mesmos itens: sem novidade
+
+    fresh = NOW + 3 * base
+    assert schedule.record(url, entry_times=[fresh, *times], now=fresh) <= base
+
+
+def test_priority_and_failures():
+    """Prioridade alta encurta o intervalo; falha mantém o intervalo atual."""
+    schedule = _schedule()
+    times = [NOW - i * 2 * HOUR for i in range(10)]
+    medium = schedule.record("https://a/", entry_times=times, priority="Medium", now=NOW)
+    critical = schedule.record("https://b/", entry_times=times, priority="Critical", now=NOW)
+    assert critical == medium / 2
+
+    assert schedule.record("https://a/", failed=True, now=NOW + medium) == medium
+
+
+def test_state_roundtrip_prune_and_fixed_keys():
+    """Agenda sobrevive ao state; feeds removidos do sources.json são podados, chaves fixas não."""
+    schedule = _schedule()
+    schedule.record("https://kept/", entry_times=[NOW - HOUR], now=NOW)
+    schedule.record("https://gone/", entry_times=[NOW - HOUR], now=NOW)
+    schedule.touch("api://nvd", 30 * 60, now=NOW)
+
+    restored = FeedSchedule.from_state(schedule.to_state())
+    assert restored.prune(["https://kept/"]) == 1
+    assert set(restored.to_state()) == {"https://kept/", "api://nvd"}
+    assert restored.due(["api://nvd"], now=NOW + 30 * 60) == ["api://nvd"]
+    assert FeedSchedule.from_state(None).to_state() == {}
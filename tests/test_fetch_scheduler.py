@@ -0,0 +1,94 @@
+"""
+Testes do agendador de downloads por host (core.fetch_scheduler).
+"""
+import asyncio
+import time
+from email.utils import formatdate
+
+import pytest
+
+from core import fetch_scheduler as fs
+from core.fetch_scheduler import FetchScheduler, HostBackoff, parse_retry_after
+
+
+def test_parse_retry_after_seconds_and_http_date():
+    """Retry-After aceita segundos ou HTTP-date; valores inválidos viram None."""
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after("-5") == 0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("amanhã") is None
+    now = time.time()
+    assert parse_retry_after(formatdate(now + 90, usegmt=True), now=now) == pytest.approx(90, abs=1)
+
+
+@pytest.mark.asyncio
+async def test_same_host_requests_are_spaced_by_min_interval():
+    """Requisições ao mesmo host respeitam o intervalo mínimo entre inícios."""
+    scheduler = FetchScheduler(host_concurrency=4, host_min_interval=0.05)
+    starts = []
+
+    async def fetch(url):
+        async with scheduler.slot(url) as ticket:
+            starts.append(time.monotonic())
+            ticket.observe(200)
+
+    began = time.monotonic()
+    await asyncio.gather(*(fetch(f"https://a.example/{i}") for i in range(3)))
+    # Terceira requisição só pode começar após 2 intervalos (folga para a resolução do relógio)
+    assert starts[-1] - began >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_slow_host_does_not_block_other_hosts():
+    """O limite por host segura só o próprio host; outros hosts seguem em paralelo."""
+    scheduler = FetchScheduler(host_concurrency=1, host_min_interval=0)
+    release = asyncio.Event()
+    done = []
+
+    async def fetch(url, wait=False):
+        async with scheduler.slot(url) as ticket:
+            if wait:
+                await release.wait()
+            ticket.observe(200)
+            done.append(url)
+
+    slow = [asyncio.create_task(fetch(f"https://slow.example/{i}", wait=True)) for i in range(2)]
+    await asyncio.wait_for(asyncio.gather(*(fetch(f"https://fast{i}.example/") for i in range(3))), 1)
+    assert len(done) == 3
+    release.set()
+    await asyncio.gather(*slow)
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_when_fast_and_halves_on_429(monkeypatch):
+    """Respostas rápidas elevam o limite global; 429 reduz e coloca o host em espera."""
+    monkeypatch.setattr(fs, "MAX_INLINE_WAIT", 5)
+    scheduler = FetchScheduler(host_min_interval=0, target_latency=10,
+                               concurrency_start=4, concurrency_min=1, concurrency_max=8)
+    for i in range(40):
+        async with scheduler.slot(f"https://h{i}.example/") as ticket:
+            ticket.observe(200)
+    grown = scheduler.limiter.limit
+    assert grown > 4
+
+    async with scheduler.slot("https://busy.example/") as ticket:
+        ticket.observe(429, {"Retry-After": "600"})
+    assert scheduler.limiter.limit == grown // 2
+    assert scheduler.backoff_remaining("https://busy.example/x") > 500
+
+    # Espera maior que MAX_INLINE_WAIT: feed pulado nesta varredura
+    with pytest.raises(HostBackoff):
+        async with scheduler.slot("https://busy.example/x"):
+            pass
+    assert "busy.example" in scheduler.stats()["hosts_in_backoff"]
+
+
+@pytest.mark.asyncio
+async def test_timeout_decreases_limit():
+    """Timeout conta como congestionamento."""
+    scheduler = FetchScheduler(host_min_interval=0, concurrency_start=8, concurrency_min=1)
+    with pytest.raises(asyncio.TimeoutError):
+        async with scheduler.slot("https://t.example/"):
+            raise asyncio.TimeoutError()
+    assert scheduler.limiter.limit == 4
+    assert scheduler.limiter.in_flight == 0
@@ -0,0 +1,72 @@
+"""
+Testes do lock consultivo de arquivos (utils.storage._file_lock / async_file_lock).
+"""
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from utils.storage import HAS_FCNTL, LockTimeout, _file_lock, async_file_lock, lock_stats
+
+pytestmark = pytest.mark.skipif(not HAS_FCNTL, reason="requer fcntl")
+
+
+def test_shared_locks_coexist_and_exclusive_waits(tmp_path):
+    """Leitores compartilham o lock; escritor espera e recebe timeout limitado."""
+    path = str(tmp_path / "state.json")
+    with _file_lock(path, shared=True):
+        with _file_lock(path, shared=True):
+            pass
+        before = lock_stats.timeouts
+        with pytest.raises(LockTimeout):
+            with _file_lock(path, timeout=0.05):
+                pass
+        assert lock_stats.timeouts == before + 1
+
+    # Lock persistente: o arquivo .lock continua lá após a liberação
+    assert os.path.exists(path + ".lock")
+
+
+def test_exclusive_lock_is_acquired_after_release(tmp_path):
+    """Escritor contendido obtém o lock quando o outro libera (métrica de contenção)."""
+    path = str(tmp_path / "state.json")
+    released = threading.Event()
+
+    def holder():
+        with _file_lock(path):
+            time.sleep(0.1)
+        released.set()
+
+    contended_before = lock_stats.contended
+    t = threading.Thread(target=holder)
+    t.start()
+    time.sleep(0.02)
+    with _file_lock(path, timeout=2):
+        assert released.is_set()
+    t.join()
+    assert lock_stats.contended > contended_before
+
+
+@pytest.mark.asyncio
+async def test_async_lock_does_not_block_event_loop(tmp_path):
+    """Enquanto espera o lock, outras tarefas do loop continuam rodando."""
+    path = str(tmp_path / "state.json")
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    with _file_lock(path):
+        waiter = asyncio.create_task(asyncio.wait_for(_acquire(path), timeout=2))
+        await ticker()
+    await waiter
+    assert len(ticks) == 5
+
+
+async def _acquire(path):
+    async with async_file_lock(path, timeout=1):
+        return True
@@ -0,0 +1,48 @@
+"""
+Testes do FilterEngine (avaliação única por notícia + decisão por guild via conjuntos).
+"""
+from core.filters import FilterEngine, EntryVerdict, engine, match_intel, _compile_keywords
+
+
+def test_evaluate_returns_matching_categories():
+    """Uma notícia com termos de ransomware/exploit deve trazer as duas categorias."""
+    verdict = engine.evaluate("New ransomware exploit", "Security researchers published a PoC.")
+    assert verdict.blacklisted is False
+    assert verdict.has_core is True
+    assert {"ransomware", "exploit", "security"} <= verdict.categories
+
+
+def test_evaluate_blacklist_short_circuits():
+    """Blacklist corta a avaliação antes das categorias."""
+    verdict = engine.evaluate("<b>Casino Promo</b>", "Novo malware detectado")
+    assert verdict == EntryVerdict(True, False, frozenset())
+
+
+def test_accepts_uses_set_intersection():
+    """A decisão por guild não depende de regex, apenas das categorias avaliadas."""
+    verdict = EntryVerdict(False, True, frozenset({"malware"}))
+    assert FilterEngine.accepts(verdict, ["malware", "cve"]) is True
+    assert FilterEngine.accepts(verdict, ["cve"]) is False
+    assert FilterEngine.accepts(verdict, ["todos"]) is True
+    assert FilterEngine.accepts(verdict, []) is False
+
+
+def test_match_intel_equivalent_with_precomputed_verdict():
+    """match_intel com verdict pré-calculado deve decidir igual ao caminho sem verdict."""
+    config = {
+        "1": {"filters": ["malware"]},
+        "2": {"filters": ["cve"]},
+        "3": {"filters": ["todos"]},
+        "4": {"filters": []},
+    }
+    title = "Botnet malware spreads via unpatched routers"
+    summary = "Security advisory for the new trojan."
+    verdict = engine.evaluate(title, summary)
+
+    for gid in config:
+        assert match_intel(gid, title, summary, config) == match_intel(gid, title, summary, config, verdict=verdict)
+
+
+def test_keyword_patterns_are_compiled_once():
+    """O mesmo conjunto de keywords reaproveita o padrão compilado."""
+    assert _compile_keywords(("malware", "virus")) is _compile_keywords(("malware", "virus"))
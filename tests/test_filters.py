@@ -61,13 +61,17 @@ def test_requirements_has_dependencies():
 
 
 def test_scanner_has_ssl_fix():
-    """Verifica que core/scanner.py usa certifi para SSL."""
-    with open("core/scanner.py", "r", encoding="utf-8") as f:
+    """Verifica que o pool HTTP compartilhado (usado pelo scanner) usa certifi para SSL."""
+    with open("utils/http.py", "r", encoding="utf-8") as f:
         content = f.read()
+    with open("core/scanner.py", "r", encoding="utf-8") as f:
+        scanner = f.read()
     
     # Deve usar certifi
-    assert "certifi" in content, "core/scanner.py deve importar certifi para SSL seguro"
+    assert "certifi" in content, "utils/http.py deve importar certifi para SSL seguro"
+    assert "http_client" in scanner, "core/scanner.py deve usar o pool HTTP compartilhado"
     
     # NÃO deve ter CERT_NONE (inseguro)
-    assert "CERT_NONE" not in content, "core/scanner.py não deve usar CERT_NONE (inseguro)"
+    assert "CERT_NONE" not in content, "utils/http.py não deve usar CERT_NONE (inseguro)"
+    assert "CERT_NONE" not in scanner, "core/scanner.py não deve usar CERT_NONE (inseguro)"
 
@@ -0,0 +1,125 @@
+"""
+Testes do monitor de sites oficiais (core.html_monitor).
+Usa um servidor aiohttp local (sem rede externa).
+"""
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from core import html_monitor, parsing
+from core.fetch_scheduler import FetchScheduler
+from core.html_monitor import (
+    MAX_DIFF_LINES, MAX_SNAPSHOT_BLOCKS, check_official_sites, diff_blocks, extract_page_sync,
+    format_diff, hash_prefix,
+)
+from utils.cache import ValidatorCache
+from utils.http import http_client
+
+PAGE = """<html><head><title>Official</title></head><body>
+<div id="clock">{clock}</div><div class="ad">{ad}</div>
+<main><ul class="news"><li>{news}</li></ul></main><footer>{footer}</footer>
+</body></html>"""
+
+
+@pytest_asyncio.fixture
+async def site(monkeypatch):
+    """Página local com ETag; `page` controla o conteúdo e `requests` guarda os If-None-Match recebidos."""
+    monkeypatch.setattr(parsing, "FEED_PARSE_BACKEND", "inline")
+    monkeypatch.setattr(html_monitor, "fetch_scheduler", FetchScheduler(host_min_interval=0))
+    state = {"page": dict(clock="10:00", ad="promo", news="Episódio 1", footer="2025"), "requests": []}
+
+    async def page(request):
+        body = PAGE.format(**state["page"])
+        etag = f'"{hash(body)}"'
+        state["requests"].append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304)
+        return web.Response(text=body, content_type="text/html", headers={"ETag": etag})
+
+    app = web.Application()
+    app.router.add_get("/", page)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    tcp = web.TCPSite(runner, "127.0.0.1", 0)
+    await tcp.start()
+    port = tcp._server.sockets[0].getsockname()[1]
+    state["url"] = f"http://127.0.0.1:{port}/"
+    yield state
+    await runner.cleanup()
+    await http_client.close()
+
+
+def test_extract_ignores_noise_and_uses_region_of_interest():
+    """Relógio/anúncio não mudam o hash; com seletor, só a região de interesse conta."""
+    base = PAGE.format(clock="10:00", ad="promo", news="A", footer="2025").encode()
+    noisy = PAGE.format(clock="11:00", ad="outra", news="A", footer="2026").encode()
+    assert extract_page_sync(base)[0] == "Official"
+    assert extract_page_sync(base)[1] == extract_page_sync(PAGE.format(
+        clock="11:00", ad="outra", news="A", footer="2025").encode())[1]
+    assert extract_page_sync(base)[1] != extract_page_sync(noisy)[1]
+    assert extract_page_sync(base, None, ["main .news"])[1] == extract_page_sync(noisy, None, ["main .news"])[1]
+    assert extract_page_sync(base, None, [".inexistente"])[1] == ""
+
+
+@pytest.mark.asyncio
+async def test_conditional_requests_and_change_detection(site):
+    """Primeira leitura inicializa; 304 não reprocessa; mudança na região gera alerta."""
+    sites = [{"url": site["url"], "selectors": ["main .news"]}]
+    cache = ValidatorCache()
+
+    updates, hashes = await check_official_sites({}, cache, sites)
+    assert updates == [] and hashes[site["url"]].startswith(hash_prefix(["main .news"]))
+
+    updates, same = await check_official_sites(hashes, cache, sites)
+    assert updates == [] and same == hashes
+    assert site["requests"][-1] is not None  # enviou If-None-Match (respondido com 304)
+
+    site["page"]["footer"] = "2026"  # fora da região: página muda, hash não
+    updates, same = await check_official_sites(hashes, cache, sites)
+    assert updates == [] and same == hashes
+
+    site["page"]["news"] = "Episódio 2"
+    updates, changed = await check_official_sites(hashes, cache, sites)
+    assert [u["link"] for u in updates] == [site["url"]]
+    assert changed[site["url"]] != hashes[site["url"]]
+
+
+@pytest.mark.asyncio
+async def test_legacy_hash_is_reinitialized_without_alert(site):
+    """Hash no formato antigo (sem prefixo) é substituído sem gerar alerta falso."""
+    sites = [{"url": site["url"], "selectors": []}]
+    updates, hashes = await check_official_sites({site["url"]: "f" * 64}, ValidatorCache(), sites)
+    assert updates == []
+    assert hashes[site["url"]].startswith(hash_prefix([]))
+    assert site["requests"] == [None]  # sem hash utilizável: requisição incondicional
+
+
+def test_block_snapshot_diff_is_bounded():
+    """Blocos viram [digest, trecho]; diff lista entradas/saídas com limite de linhas e de blocos."""
+    items = "".join(f"<li>Notícia {i}</li>" for i in range(MAX_SNAPSHOT_BLOCKS + 50))
+    _, _, blocks = extract_page_sync(f"<ul>{items}</ul>".encode())
+    assert len(blocks) == MAX_SNAPSHOT_BLOCKS
+    assert blocks[0][1] == "Notícia 0" and len(blocks[0][0]) == 16
+
+    old = blocks[:10]
+    new = blocks[3:10] + [["x" * 16, f"Nova {i}"] for i in range(MAX_DIFF_LINES + 2)]
+    added, removed = diff_blocks(old, new)
+    assert removed == ["Notícia 0", "Notícia 1", "Notícia 2"]
+    text = format_diff(added, removed)
+    assert "➖ Notícia 1" in text and "➕ (+2 more)" in text
+
+
+@pytest.mark.asyncio
+async def test_change_alert_lists_added_and_removed_blocks(site):
+    """Com snapshot, o alerta traz os blocos que entraram/saíram em vez da mensagem genérica."""
+    sites = [{"url": site["url"], "selectors": ["main"]}]
+    cache, snapshots = ValidatorCache(), {"https://fora-do-monitor/": {"blocks": []}}
+
+    _, hashes = await check_official_sites({}, cache, sites, snapshots=snapshots)
+    assert list(snapshots) == [site["url"]]  # snapshots de sites removidos são podados
+
+    site["page"]["news"] = "Episódio 2"
+    updates, _ = await check_official_sites(hashes, cache, sites, snapshots=snapshots)
+    assert updates[0]["added"] == ["Episódio 2"]
+    assert updates[0]["removed"] == ["Episódio 1"]
+    assert updates[0]["summary"] == "➕ Episódio 2\n➖ Episódio 1"
@@ -0,0 +1,73 @@
+"""
+Testes do pool HTTP compartilhado (utils.http.HttpClientManager).
+Usa um servidor aiohttp local (sem rede externa).
+"""
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from utils.http import HttpClientManager, SERVICE_TIMEOUTS
+
+
+@pytest_asyncio.fixture
+async def local_server():
+    async def ok(request):
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_get("/", ok)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/"
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_sessions_share_connector_and_reuse_connections(local_server):
+    """Sessões diferentes usam o mesmo connector; a conexão keep-alive é reaproveitada."""
+    client = HttpClientManager()
+    try:
+        for service in ("nvd", "threat"):
+            async with client.new_session(service) as session:
+                assert session.connector is client.connector()
+                async with session.get(local_server) as resp:
+                    assert await resp.text() == "ok"
+
+        # Fechar a sessão não fecha o pool
+        assert not client.connector().closed
+        stats = client.stats()
+        assert stats["connections_created"] == 1
+        assert stats["requests"] == {"nvd": 1, "threat": 1}
+        assert stats["idle"] == 1 and stats["in_use"] == 0
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_timeout_comes_from_service():
+    """Timeout padrão por serviço, sobrescrevível na chamada."""
+    client = HttpClientManager()
+    try:
+        async with client.new_session("nodered") as session:
+            assert session.timeout.total == SERVICE_TIMEOUTS["nodered"]
+        async with client.new_session("desconhecido") as session:
+            assert session.timeout.total == SERVICE_TIMEOUTS["default"]
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_close_releases_pool():
+    """close() fecha o connector; o próximo uso cria um novo pool."""
+    client = HttpClientManager()
+    await client.start()
+    first = client.connector()
+    await client.close()
+    assert first.closed
+    assert client.stats()["in_use"] == 0
+    second = client.connector()
+    assert second is not first
+    await client.close()
@@ -0,0 +1,88 @@
+"""
+Testes da parte de transferência do utils.http (compressão, limite de tamanho,
+charset e bytes por fonte). Usa um servidor aiohttp local (sem rede externa).
+"""
+import gzip
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from utils.http import (
+    ACCEPT_ENCODING, HttpClientManager, TransferStats,
+    decode_body, detect_charset, read_limited, wire_bytes,
+)
+
+PAGE = ("<html><head><title>Notícia</title></head><body>" + "ação " * 2000 + "</body></html>").encode("latin-1")
+
+
+@pytest_asyncio.fixture
+async def local_server():
+    seen = {}
+
+    async def gzipped(request):
+        seen["accept_encoding"] = request.headers.get("Accept-Encoding")
+        return web.Response(body=gzip.compress(PAGE), headers={
+            "Content-Encoding": "gzip", "Content-Type": "text/html; charset=ISO-8859-1",
+        })
+
+    async def huge(request):
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        for _ in range(64):
+            await resp.write(b"x" * 16384)
+        return resp
+
+    app = web.Application()
+    app.router.add_get("/gz", gzipped)
+    app.router.add_get("/huge", huge)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}", seen
+    await runner.cleanup()
+
+
+def test_detect_charset_prefers_bom_then_header_then_declaration():
+    """BOM vence o cabeçalho; cabeçalho vence a declaração; inválido cai no default."""
+    assert detect_charset("text/xml; charset=iso-8859-1", b"\xef\xbb\xbf<?xml?>") == "utf-8-sig"
+    assert detect_charset("text/html; charset=ISO-8859-1", b"<meta charset='utf-8'>") == "iso8859-1"
+    assert detect_charset("text/xml", b'<?xml version="1.0" encoding="windows-1252"?>') == "cp1252"
+    assert detect_charset("text/html; charset=banana", b"<html>") == "utf-8"
+    assert decode_body("ação".encode("utf-16")) == "ação"
+
+
+@pytest.mark.asyncio
+async def test_compressed_body_is_decoded_and_wire_bytes_recorded(local_server):
+    """Resposta gzip: corpo descomprimido, charset do cabeçalho, fio < decodificado."""
+    base, seen = local_server
+    client, transfer = HttpClientManager(), TransferStats()
+    try:
+        async with client.new_session("html", headers={"Accept-Encoding": ACCEPT_ENCODING}) as session:
+            async with session.get(f"{base}/gz") as resp:
+                body = await read_limited(resp, 1024 * 1024)
+                transfer.record_response("gz", resp, len(body))
+                assert wire_bytes(resp, len(body)) < len(body)
+                assert "ação" in decode_body(body, resp.headers["Content-Type"])
+    finally:
+        await client.close()
+
+    assert seen["accept_encoding"] == ACCEPT_ENCODING
+    snap = transfer.snapshot()
+    assert snap["sources"]["gz"]["encoding"] == "gzip"
+    assert snap["decoded_bytes"] == len(PAGE) and snap["ratio"] < 0.2
+
+
+@pytest.mark.asyncio
+async def test_read_limited_stops_when_body_exceeds_cap(local_server):
+    """Corpo sem Content-Length maior que o limite é abandonado durante o streaming."""
+    base, _ = local_server
+    client = HttpClientManager()
+    try:
+        async with client.new_session("html") as session:
+            async with session.get(f"{base}/huge") as resp:
+                assert await read_limited(resp, 100_000) is None
+    finally:
+        await client.close()
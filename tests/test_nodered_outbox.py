@@ -0,0 +1,105 @@
+"""
+Testes da outbox do Node-RED (core.nodered_outbox).
+Usa um servidor aiohttp local (sem rede externa).
+"""
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from core import nodered_outbox as outbox_mod
+from core.nodered_outbox import NodeRedOutbox
+from utils.http import http_client
+
+
+@pytest_asyncio.fixture
+async def nodered():
+    """Endpoint falso: guarda os corpos recebidos; `fail` respostas 500 antes de aceitar."""
+    state = {"bodies": [], "fail": 0}
+
+    async def hook(request):
+        if state["fail"] > 0:
+            state["fail"] -= 1
+            return web.Response(status=500)
+        state["bodies"].append(await request.json())
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_post("/cyber-intel", hook)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    state["url"] = f"http://127.0.0.1:{port}/cyber-intel"
+    yield state
+    await runner.cleanup()
+    await http_client.close()
+
+
+def _alert(i):
+    return {"title": f"alerta {i}", "link": f"https://ex.com/{i}"}
+
+
+@pytest.mark.asyncio
+async def test_push_is_batched_by_size_and_by_time(nodered, tmp_path):
+    """Lote cheio sai na hora; o resto sai no intervalo de flush."""
+    outbox = NodeRedOutbox(nodered["url"], batch_size=3, flush_interval=0.2, spill_path=str(tmp_path / "o.jsonl"))
+    await outbox.start()
+    try:
+        for i in range(3):
+            assert outbox.push(_alert(i))
+        await asyncio.sleep(0.1)
+        assert nodered["bodies"] == [[_alert(0), _alert(1), _alert(2)]]
+        outbox.push(_alert(3))
+        await asyncio.sleep(0.05)
+        assert len(nodered["bodies"]) == 1  # lote incompleto espera o intervalo
+        await asyncio.sleep(0.3)
+        assert nodered["bodies"][-1] == [_alert(3)]
+        assert outbox.stats()["sent"] == 4 and outbox.stats()["batches"] == 2
+    finally:
+        await outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried_with_backoff(nodered, tmp_path, monkeypatch):
+    """5xx devolve o lote para a fila; a nova tentativa entrega na mesma ordem."""
+    monkeypatch.setattr(outbox_mod, "OUTBOX_BACKOFF_BASE", 0.05)
+    nodered["fail"] = 1
+    outbox = NodeRedOutbox(nodered["url"], batch_size=2, flush_interval=0.05, spill_path=str(tmp_path / "o.jsonl"))
+    await outbox.start()
+    try:
+        outbox.push(_alert(0))
+        outbox.push(_alert(1))
+        for _ in range(50):
+            if nodered["bodies"]:
+                break
+            await asyncio.sleep(0.05)
+        assert nodered["bodies"] == [[_alert(0), _alert(1)]]
+        assert outbox.stats()["retries"] == 1 and outbox.stats()["last_error"] == "HTTP 500"
+    finally:
+        await outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_overflow_spills_to_disk_and_survives_restart(nodered, tmp_path):
+    """Fila cheia transborda para o disco; pendências do encerramento são reenviadas no próximo início."""
+    spill = tmp_path / "o.jsonl"
+    outbox = NodeRedOutbox("http://127.0.0.1:9/down", batch_size=2, max_items=2, spill_max=3, spill_path=str(spill))
+    assert all(outbox.push(_alert(i)) for i in range(5))
+    assert not outbox.push(_alert(5))  # memória (2) + disco (3) cheios
+    assert outbox.stats() == {**outbox.stats(), "queued": 2, "spilled": 3, "dropped": 1}
+    await outbox.close()  # Node-RED fora do ar: tudo vai para o disco
+
+    assert [json.loads(line)["title"] for line in spill.read_text().splitlines()] == [f"alerta {i}" for i in range(5)]
+
+    restarted = NodeRedOutbox(nodered["url"], batch_size=10, spill_path=str(spill))
+    await restarted.start()
+    try:
+        assert await restarted.flush() == 5
+        assert nodered["bodies"] == [[_alert(i) for i in range(5)]]
+        assert not spill.exists()
+    finally:
+        await restarted.close()
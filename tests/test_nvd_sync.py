@@ -0,0 +1,209 @@
+"""
+Testes da sincronização incremental da NVD e do índice local (src.services.cveService / cveStore).
+Usa um servidor aiohttp local que imita a API 2.0 (sem rede externa).
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from src.services import cveService
+from src.services.cveService import (
+    NvdError, NvdRateLimiter, fetch_nvd_cves, fetch_nvd_metrics, get_cve_details, iter_nvd_pages, sync_nvd,
+)
+from src.services.cveStore import CveStore, nvd_timestamp
+from utils.http import http_client
+
+
+def _vuln(cve_id, score, published, version="cvssMetricV31", status="Analyzed"):
+    return {"cve": {
+        "id": cve_id,
+        "vulnStatus": status,
+        "published": nvd_timestamp(published),
+        "lastModified": nvd_timestamp(published),
+        "descriptions": [{"lang": "en", "value": f"Falha em {cve_id}"}],
+        "metrics": {version: [{"cvssData": {
+            "baseScore": score, "baseSeverity": "CRITICAL" if score >= 9 else "HIGH" if score >= 7 else "MEDIUM",
+            "vectorString": "CVSS:3.1/AV:N",
+        }}]},
+        "references": [{"url": f"https://ex.com/{cve_id}"}],
+    }}
+
+
+@pytest_asyncio.fixture
+async def nvd(monkeypatch, tmp_path):
+    """API falsa: filtra `items` pela janela lastMod*, pagina por startIndex e guarda os parâmetros recebidos."""
+    recent = datetime.utcnow() - timedelta(hours=2)
+    state = {"items": [_vuln(f"CVE-2025-{i:04d}", 9.8 if i % 2 else 7.5, recent) for i in range(5)],
+             "params": [], "throttle": 0, "delay": 0, "in_flight": 0, "max_in_flight": 0}
+
+    async def api(request):
+        params = dict(request.query)
+        state["params"].append(params)
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(state["delay"])
+        finally:
+            state["in_flight"] -= 1
+        if params.get("startIndex") in state.get("fail_pages", ()):
+            return web.Response(status=500)
+        if state["throttle"] > 0:
+            state["throttle"] -= 1
+            return web.Response(status=403, headers={"Retry-After": "0"})
+        if "cveId" in params:
+            found = [v for v in state["items"] if v["cve"]["id"] == params["cveId"]]
+            return web.json_response({"totalResults": len(found), "vulnerabilities": found})
+        start, size = int(params["startIndex"]), int(params["resultsPerPage"])
+        items = state["items"]
+        if "lastModStartDate" in params:
+            low, high = (params[k].rstrip("Z")[:23] for k in ("lastModStartDate", "lastModEndDate"))
+            items = [v for v in items if low <= v["cve"]["lastModified"] <= high]
+        return web.json_response({
+            "totalResults": len(items),
+            "vulnerabilities": items[start:start + size],
+        })
+
+    app = web.Application()
+    app.router.add_get("/cves", api)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    store = CveStore(str(tmp_path / "nvd.db"))
+    monkeypatch.setattr(cveService, "NVD_API_URL", f"http://127.0.0.1:{port}/cves")
+    monkeypatch.setattr(cveService, "NVD_PAGE_SIZE", 2)
+    monkeypatch.setattr(cveService, "nvd_limiter", NvdRateLimiter(100))
+    monkeypatch.setattr(cveService, "_sync_lock", asyncio.Lock())
+    monkeypatch.setattr(cveService, "_store", store)
+    state["store"] = store
+    yield state
+    store.close()
+    await runner.cleanup()
+    await http_client.close()
+
+
+@pytest.mark.asyncio
+async def test_bootstrap_paginates_and_next_sync_is_incremental(nvd):
+    """Primeira carga pagina por startIndex; a seguinte parte do fim da janela anterior."""
+    now = datetime.utcnow()
+    assert await sync_nvd(now=now) == 5
+    windows = sorted({q["lastModStartDate"] for q in nvd["params"]})
+    assert len(windows) == 7 and windows[0].startswith(nvd_timestamp(now - timedelta(days=7))[:16])
+    last_window = [int(q["startIndex"]) for q in nvd["params"] if q["lastModStartDate"] == windows[-1]]
+    assert sorted(last_window) == [0, 2, 4]
+    assert "noRejected" not in nvd["params"][0]
+    assert nvd["store"].last_sync() == now
+
+    nvd["params"].clear()
+    assert await sync_nvd(now=now + timedelta(minutes=1)) == 0  # intervalo mínimo
+    assert nvd["params"] == []
+
+    nvd["items"] = [_vuln("CVE-2025-0000", 9.8, now + timedelta(minutes=30))]
+    later = now + timedelta(hours=1)
+    assert await sync_nvd(now=later) == 1
+    assert nvd["params"][0]["lastModStartDate"] == cveService._api_date(now - cveService.NVD_SYNC_OVERLAP)
+    assert nvd["params"][0]["lastModEndDate"] == cveService._api_date(later)
+
+
+@pytest.mark.asyncio
+async def test_long_gap_is_split_into_daily_windows(nvd):
+    """Dias sem sincronizar: uma janela por dia (mais a sobreposição), encadeadas."""
+    now = datetime.utcnow()
+    nvd["store"].set_last_sync(now - timedelta(days=3))
+    nvd["items"] = []
+    await sync_nvd(now=now)
+    windows = [(q["lastModStartDate"], q["lastModEndDate"]) for q in nvd["params"]]
+    assert len(windows) == 4 and all(a[1] == b[0] for a, b in zip(windows, windows[1:]))
+    assert nvd["store"].last_sync() == now
+
+
+@pytest.mark.asyncio
+async def test_queries_answer_from_local_index(nvd):
+    """Scanner, métricas e /cve respondem do índice; /cve só vai à API na falta do cache."""
+    entries = await fetch_nvd_cves(limit=10)
+    assert len(entries) == 5 and entries[0]["source"] == "NIST NVD"
+    requests_after_sync = len(nvd["params"])
+
+    metrics = await fetch_nvd_metrics(hours=24)
+    assert metrics["ok"] and metrics["critical_count"] == 2 and metrics["high_count"] == 3
+    details = await get_cve_details("CVE-2025-0001")
+    assert details["cvss"] == 9.8 and details["references"] == ["https://ex.com/CVE-2025-0001"]
+    assert len(nvd["params"]) == requests_after_sync
+
+    nvd["items"].append(_vuln("CVE-2014-0160", 5.0, datetime(2014, 4, 7), version="cvssMetricV2"))
+    details = await get_cve_details("CVE-2014-0160")
+    assert details["cvss"] == 5.0 and nvd["params"][-1] == {"cveId": "CVE-2014-0160"}
+    assert nvd["store"].get("CVE-2014-0160") is not None
+
+
+@pytest.mark.asyncio
+async def test_rejected_cves_are_indexed_but_not_reported(nvd):
+    """CVE rejeitada sobrescreve a versão antiga e sai dos alertas e das métricas."""
+    await sync_nvd()
+    nvd["items"] = [_vuln("CVE-2025-0001", 9.8, datetime.utcnow() - timedelta(hours=2), status="Rejected")]
+    nvd["items"][0]["cve"]["lastModified"] = nvd_timestamp(datetime.utcnow())
+    await sync_nvd(force=True)
+
+    assert nvd["store"].get("CVE-2025-0001")["vuln_status"] == "Rejected"
+    assert "CVE-2025-0001" not in [e["link"].rsplit("/", 1)[-1] for e in await fetch_nvd_cves(limit=10)]
+    metrics = await fetch_nvd_metrics(hours=24)
+    assert metrics["total"] == 4 and metrics["critical_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_throttled_request_is_retried_and_failed_window_is_resumed(nvd, monkeypatch):
+    """403 da NVD é repetido; falha definitiva não avança o marco da sincronização."""
+    nvd["throttle"] = 1
+    assert await sync_nvd() == 5
+    assert len(nvd["params"]) == 10  # 7 janelas, +2 páginas, +1 repetição
+
+    monkeypatch.setattr(cveService, "NVD_MAX_ATTEMPTS", 1)
+    last = nvd["store"].last_sync()
+    nvd["throttle"] = 1
+    await sync_nvd(now=last + timedelta(hours=1))
+    assert nvd["store"].last_sync() == last
+    assert cveService.sync_status["last_error"] == "HTTP 403"
+
+
+@pytest.mark.asyncio
+async def test_pages_stream_with_bounded_concurrency(nvd):
+    """Depois da 1ª página, as demais saem em paralelo até o limite; todas são entregues uma vez."""
+    nvd["items"] = [_vuln(f"CVE-2025-{i:04d}", 8.0, datetime.utcnow()) for i in range(11)]
+    nvd["delay"] = 0.05
+    async with http_client.new_session("nvd") as session:
+        pages = [page async for page in iter_nvd_pages(session, {}, page_size=2, concurrency=3)]
+    ids = sorted(v["cve"]["id"] for page in pages for v in page["vulnerabilities"])
+    assert ids == sorted(v["cve"]["id"] for v in nvd["items"])
+    assert len(pages) == 6 and nvd["max_in_flight"] == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_page_cancels_pending_pages(nvd):
+    """Página com erro interrompe a consulta; a sincronização não avança o marco."""
+    nvd["items"] = [_vuln(f"CVE-2025-{i:04d}", 8.0, datetime.utcnow()) for i in range(20)]
+    nvd["fail_pages"] = {"4"}
+    async with http_client.new_session("nvd") as session:
+        with pytest.raises(NvdError):
+            async for _ in iter_nvd_pages(session, {}, page_size=2, concurrency=2):
+                pass
+    assert len(nvd["params"]) < 10  # não buscou as 10 páginas
+
+    assert await sync_nvd() < 20
+    assert nvd["store"].last_sync() < datetime.utcnow() - timedelta(hours=12)  # parou antes do último dia
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_sliding_window():
+    """Acima do limite da janela, a próxima requisição espera a janela liberar."""
+    limiter = NvdRateLimiter(2, period=0.2)
+    started = time.monotonic()
+    for _ in range(3):
+        await limiter.acquire()
+    assert time.monotonic() - started >= 0.19
+    assert limiter.waited > 0
@@ -0,0 +1,203 @@
+"""
+Testes do backend de parsing de feeds (core.parsing).
+"""
+import pickle
+
+import pytest
+
+from core import parsing
+from core.scanner import parse_entry_dt
+
+RSS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Feed</title>
+<item><title>Critical RCE patched</title><link>https://example.com/1</link>
+<description>&lt;p&gt;Patch now&lt;/p&gt;</description><pubDate>Mon, 06 Jan 2025 10:00:00 GMT</pubDate></item>
+<item><title>Second</title><link>https://example.com/2</link></item>
+</channel></rss>"""
+
+
+def test_parse_feed_sync_returns_plain_picklable_dicts():
+    """As entradas devem ser dicts simples (baratos para atravessar processos)."""
+    entries, elapsed_ms = parsing.parse_feed_sync(RSS)
+    assert elapsed_ms >= 0
+    assert [type(e) for e in entries] == [dict, dict]
+    assert entries[0]["link"] == "https://example.com/1"
+    assert entries[0]["published_parsed"][:3] == (2025, 1, 6)
+    assert pickle.loads(pickle.dumps(entries)) == entries
+
+
+def test_parse_entry_dt_handles_rfc822_dict_entries():
+    """Datas RFC 822 (RSS) devem ser lidas via published_parsed nos dicts."""
+    entries, _ = parsing.parse_feed_sync(RSS)
+    dt = parse_entry_dt(entries[0])
+    assert dt is not None and (dt.year, dt.month, dt.day) == (2025, 1, 6)
+    assert parse_entry_dt(entries[1]) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["inline", "thread", "process"])
+async def test_parse_feed_backends_agree(monkeypatch, backend):
+    """Todos os backends produzem o mesmo resultado e registram o tempo por feed."""
+    monkeypatch.setattr(parsing, "FEED_PARSE_BACKEND", backend)
+    try:
+        entries = await parsing.parse_feed(RSS, "https://example.com/feed")
+    finally:
+        parsing.shutdown_parse_executor()
+    assert [e["title"] for e in entries] == ["Critical RCE patched", "Second"]
+    assert "https://example.com/feed" in parsing.stats.feed_parse_ms
+
+
+@pytest.mark.asyncio
+async def test_broken_process_pool_is_shut_down_before_recreating(monkeypatch):
+    """Pool quebrado é encerrado (não vaza a thread de gerência) e o parse cai para thread."""
+    from concurrent.futures import Executor
+    from concurrent.futures.process import BrokenProcessPool
+
+    class BrokenPool(Executor):
+        shut_down = False
+
+        def submit(self, fn, *args, **kwargs):
+            raise BrokenProcessPool("worker morreu")
+
+        def shutdown(self, wait=True, *, cancel_futures=False):
+            self.shut_down = True
+
+    pool = BrokenPool()
+    monkeypatch.setattr(parsing, "FEED_PARSE_BACKEND", "process")
+    monkeypatch.setattr(parsing, "_executor", pool)
+    entries, _ = await parsing.run_parse_job(parsing.parse_feed_sync, RSS, label="feed")
+    assert len(entries) == 2
+    assert pool.shut_down and parsing._executor is None
+
+
+def test_process_pool_does_not_fork_a_threaded_process():
+    """Workers vêm do forkserver (POSIX) ou spawn, nunca de fork do processo do bot."""
+    assert parsing._mp_context().get_start_method() in ("forkserver", "spawn")
+
+
+ATOM = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:media="http://search.yahoo.com/mrss/">
+<entry><title>Video 1</title><link rel="alternate" href="https://www.youtube.com/watch?v=1"/>
+<published>2025-01-06T10:00:00+00:00</published>
+<media:group><media:thumbnail url="https://i.ytimg.com/1.jpg"/><media:description>Talk</media:description></media:group></entry>
+</feed>"""
+
+
+def _entry_time(entry):
+    dt = parse_entry_dt(entry)
+    return dt.timestamp() if dt else None
+
+
+async def _chunks(data, size=32):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def test_streaming_parser_handles_rss_and_atom_in_small_chunks():
+    """Entradas aparecem assim que o elemento fecha, mesmo com pedaços pequenos."""
+    for body, first_link in ((RSS, "https://example.com/1"), (ATOM, "https://www.youtube.com/watch?v=1")):
+        parser = parsing.StreamingFeedParser()
+        entries = []
+        for i in range(0, len(body), 7):
+            entries.extend(parser.feed(body[i:i + 7]))
+        assert entries[0]["link"] == first_link
+
+    atom_entry = parsing.StreamingFeedParser().feed(ATOM)[0]
+    assert atom_entry["media_thumbnail"] == [{"url": "https://i.ytimg.com/1.jpg"}]
+    assert atom_entry["summary"] == "Talk"
+    assert parse_entry_dt(atom_entry).year == 2025
+
+
+@pytest.mark.asyncio
+async def test_stream_stops_after_consecutive_known_entries():
+    """Com stop_after=1 e o primeiro item já visto, a leitura termina cedo."""
+    newest = parse_entry_dt({"published": "2025-01-06T10:00:00Z"}).timestamp()
+    entries, stopped = await parsing.stream_feed_entries(
+        _chunks(RSS), "https://example.com/feed",
+        lambda e: e.get("link") == "https://example.com/1",
+        stop_after=1, max_bytes=10_000,
+        entry_time=_entry_time, newest_known=newest,
+    )
+    assert stopped is True
+    assert [e["link"] for e in entries] == ["https://example.com/1"]
+
+
+def _dated_rss(order):
+    items = "".join(
+        f"<item><title>Item {i}</title><link>https://example.com/{i}</link>"
+        f"<pubDate>Mon, 06 Jan 2025 {i:02d}:00:00 GMT</pubDate></item>"
+        for i in order
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>F</title>{items}</channel></rss>'.encode()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("order,expect_stop", [(range(10), False), (range(9, -1, -1), True)])
+async def test_stream_early_stop_only_on_newest_first_feeds(order, expect_stop):
+    """Feed do mais antigo para o mais novo é lido inteiro: os itens novos estão no fim."""
+    known = {f"https://example.com/{i}" for i in range(8)}
+    newest = parse_entry_dt({"published": "2025-01-06T07:00:00Z"}).timestamp()
+    entries, stopped = await parsing.stream_feed_entries(
+        _chunks(_dated_rss(order)), "https://example.com/feed",
+        lambda e: e.get("link") in known, stop_after=3, max_bytes=10_000,
+        entry_time=_entry_time, newest_known=newest,
+    )
+    links = [e["link"] for e in entries]
+    assert stopped is expect_stop
+    assert {"https://example.com/8", "https://example.com/9"} <= set(links)
+    if expect_stop:
+        assert links[-1] == "https://example.com/5"
+
+
+@pytest.mark.asyncio
+async def test_stream_without_dates_reads_whole_feed():
+    """Sem referência de data (feed sem histórico no agendador) não há parada cedo."""
+    entries, stopped = await parsing.stream_feed_entries(
+        _chunks(RSS), "https://example.com/feed", lambda e: True, stop_after=1, max_bytes=10_000,
+        entry_time=_entry_time, newest_known=None,
+    )
+    assert stopped is False and len(entries) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["inline", "thread", "process"])
+async def test_stream_respects_parse_backend(monkeypatch, backend):
+    """Fora do inline o parser incremental roda fora da thread do event loop."""
+    import threading
+
+    monkeypatch.setattr(parsing, "FEED_PARSE_BACKEND", backend)
+    threads = set()
+    original = parsing.StreamingFeedParser.feed
+
+    def feed(self, chunk):
+        threads.add(threading.get_ident())
+        return original(self, chunk)
+
+    monkeypatch.setattr(parsing.StreamingFeedParser, "feed", feed)
+    entries, stopped = await parsing.stream_feed_entries(
+        _chunks(RSS), "https://example.com/feed", lambda e: False, stop_after=3, max_bytes=10_000,
+    )
+    assert [e["link"] for e in entries] == ["https://example.com/1", "https://example.com/2"]
+    on_loop = threads == {threading.get_ident()}
+    assert on_loop is (backend == "inline")
+
+
+@pytest.mark.asyncio
+async def test_stream_over_max_bytes_raises():
+    """Corpo acima do limite durante o streaming é erro (conta no circuit breaker), não feed vazio."""
+    with pytest.raises(parsing.FeedTooLarge):
+        await parsing.stream_feed_entries(
+            _chunks(RSS), "https://example.com/feed", lambda e: False, stop_after=3, max_bytes=100,
+        )
+
+
+@pytest.mark.asyncio
+async def test_stream_falls_back_to_feedparser_on_invalid_xml(monkeypatch):
+    """XML inválido (ex: entidades HTML) cai no feedparser com o corpo completo."""
+    monkeypatch.setattr(parsing, "FEED_PARSE_BACKEND", "inline")
+    broken = RSS.replace(b"<title>Second</title>", b"<title>Second&nbsp;</title>")
+    entries, stopped = await parsing.stream_feed_entries(
+        _chunks(broken), "https://example.com/feed", lambda e: False, stop_after=3, max_bytes=10_000,
+    )
+    assert stopped is False
+    assert [e["link"] for e in entries] == ["https://example.com/1", "https://example.com/2"]
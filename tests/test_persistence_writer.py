@@ -0,0 +1,71 @@
+"""
+Testes da thread de persistência (utils.persistence.PersistenceWriter).
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.persistence import PersistenceWriter
+
+
+@pytest.mark.asyncio
+async def test_run_executes_off_the_event_loop_thread():
+    """Operações rodam na thread escritora e devolvem o resultado."""
+    writer = PersistenceWriter()
+    try:
+        name = await writer.run(lambda: threading.current_thread().name)
+        assert name == writer.name != threading.current_thread().name
+    finally:
+        writer.close()
+
+
+@pytest.mark.asyncio
+async def test_pending_writes_to_same_key_are_coalesced():
+    """Várias escritas pendentes da mesma chave viram uma só (a mais recente)."""
+    writer = PersistenceWriter()
+    written = []
+    gate = threading.Event()
+    try:
+        await writer.write("block", gate.wait)
+        for i in range(5):
+            await writer.write("state.json", written.append, i)
+        gate.set()
+        await writer.flush()
+        assert written == [4]
+        assert writer.coalesced == 4
+    finally:
+        writer.close()
+
+
+@pytest.mark.asyncio
+async def test_write_wait_is_a_durability_point_and_order_is_fifo():
+    """wait=True só retorna após a escrita; leitura posterior vê o dado novo."""
+    writer = PersistenceWriter()
+    store = {}
+    try:
+        await writer.write("k", lambda: (time.sleep(0.05), store.__setitem__("v", 1)), wait=True)
+        assert store == {"v": 1}
+        await writer.write("k", store.__setitem__, "v", 2)
+        assert await writer.run(store.get, "v") == 2
+    finally:
+        writer.close()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_waits_without_blocking_loop():
+    """Fila cheia faz o chamador aguardar (assíncrono) por uma vaga."""
+    writer = PersistenceWriter(max_pending=1)
+    gate, started = threading.Event(), threading.Event()
+    try:
+        await writer.write("a", lambda: (started.set(), gate.wait()))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 2)
+        await writer.write("b", lambda: None)  # ocupa a única vaga
+        blocked = asyncio.create_task(writer.write("c", lambda: None))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        gate.set()
+        await asyncio.wait_for(blocked, timeout=2)
+    finally:
+        writer.close()
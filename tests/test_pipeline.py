@@ -0,0 +1,69 @@
+"""
+Testes do pipeline de etapas com filas limitadas (core.pipeline).
+"""
+import asyncio
+
+import pytest
+
+from core.pipeline import Pipeline, Stage
+
+
+@pytest.mark.asyncio
+async def test_fast_items_reach_the_end_while_slow_ones_are_still_fetching():
+    """Item de fonte rápida chega à última etapa antes de a fonte lenta terminar."""
+    release = asyncio.Event()
+    delivered = []
+
+    async def fetch(item):
+        if item == "slow":
+            await release.wait()
+        return [item]
+
+    async def deliver(item):
+        delivered.append(item)
+        if item == "fast":
+            release.set()  # só libera a lenta depois que a rápida foi entregue
+        return None
+
+    pipeline = Pipeline([Stage("fetch", fetch, workers=2), Stage("deliver", deliver)])
+    metrics = await asyncio.wait_for(pipeline.run(["slow", "fast"]), 2)
+    assert delivered == ["fast", "slow"]
+    assert metrics["fetch"]["in"] == 2 and metrics["deliver"]["in"] == 2
+
+
+@pytest.mark.asyncio
+async def test_fan_out_order_and_failing_item_is_isolated():
+    """Fan-out mantém a ordem com 1 worker; item com erro é contado e descartado."""
+    out = []
+
+    async def split(item):
+        if item == "bad":
+            raise ValueError("boom")
+        return [f"{item}-{i}" for i in range(3)]
+
+    async def collect(item):
+        out.append(item)
+        return None
+
+    pipeline = Pipeline([Stage("split", split), Stage("collect", collect)])
+    metrics = await pipeline.run(["a", "bad", "b"])
+    assert out == ["a-0", "a-1", "a-2", "b-0", "b-1", "b-2"]
+    assert metrics["split"]["errors"] == 1
+    assert metrics["split"]["out"] == 6
+
+
+@pytest.mark.asyncio
+async def test_slow_stage_applies_backpressure_on_bounded_queue():
+    """Etapa lenta enche a fila limitada e a anterior fica bloqueada (blocked_s > 0)."""
+    async def produce(item):
+        return [item]
+
+    async def slow(item):
+        await asyncio.sleep(0.01)
+        return None
+
+    pipeline = Pipeline([Stage("produce", produce), Stage("slow", slow)], queue_size=2)
+    metrics = await pipeline.run(range(10))
+    assert metrics["slow"]["max_queue"] <= 2
+    assert metrics["produce"]["blocked_s"] > 0
+    assert pipeline.bottleneck() == "slow"
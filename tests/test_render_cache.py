@@ -0,0 +1,43 @@
+"""
+Testes do cache de renderização por (link, idioma) em core.render.
+"""
+import pytest
+
+from core.render import RenderCache, classify_severity
+
+
+@pytest.mark.asyncio
+async def test_render_cache_builds_once_per_link_and_language():
+    """Várias guilds com o mesmo idioma reaproveitam o mesmo embed/view."""
+    cache = RenderCache()
+    entry = {"title": "Ransomware hits hospital", "link": "https://example.com/a"}
+    args = (entry, entry["title"], "<p>Resumo</p>", entry["link"], "https://example.com/feed", {})
+
+    first = cache.get_or_render(*args, "en_US")
+    for _ in range(199):
+        assert cache.get_or_render(*args, "en_US") is first
+
+    other_lang = cache.get_or_render(*args, "pt_BR")
+    assert other_lang is not first
+    assert cache.built == 2
+    assert cache.reused == 199
+    assert first.embed.description == "Resumo"
+    assert first.is_critical is True
+
+
+@pytest.mark.asyncio
+async def test_media_links_render_as_plain_message():
+    """Links de vídeo viram mensagem simples com link, sem embed."""
+    cache = RenderCache()
+    link = "https://www.youtube.com/watch?v=abc"
+    rendered = cache.get_or_render({}, "Talk", "", link, "https://youtube.com/feed", {}, "en_US")
+    assert rendered.embed is None
+    assert link in rendered.content
+
+
+def test_classify_severity_uses_source_priority():
+    """Prioridade alta vinda do sources.json vira alerta laranja."""
+    meta = {"https://feed": {"name": "X", "category": "News", "priority": "High"}}
+    _, prefix, critical = classify_severity("Weekly digest", "https://x.com/1", "https://feed", meta)
+    assert prefix == "⚠️ PRIORITY INTEL"
+    assert critical is False
@@ -0,0 +1,59 @@
+"""
+Testes do índice de links vistos (utils.seen_store) e da poda gradual do dedup.
+"""
+import time
+
+from utils.seen_store import LinkIndex, SeenStore
+from utils.state_cleanup import cleanup_state
+
+
+def test_link_index_evicts_oldest_when_full():
+    """Acima de max_items, sai o link mais antigo (não o índice inteiro)."""
+    index = LinkIndex(max_items=3, ttl=None)
+    for i in range(5):
+        index.add(f"https://x/{i}")
+
+    assert len(index) == 3
+    assert "https://x/0" not in index
+    assert index.to_list() == ["https://x/2", "https://x/3", "https://x/4"]
+
+
+def test_link_index_ttl_and_touch():
+    """Links expirados não contam como vistos; touch renova o link."""
+    index = LinkIndex(max_items=10, ttl=60)
+    old = time.time() - 120
+    index.add("https://x/velho", ts=old)
+    index.add("https://x/renovado", ts=old)
+    index.touch("https://x/renovado")
+
+    assert "https://x/velho" not in index
+    assert "https://x/renovado" in index
+    assert index.evict_expired() == 1
+    assert index.to_list() == ["https://x/renovado"]
+
+
+def test_seen_store_loads_legacy_list_format():
+    """state["dedup"] no formato antigo (listas) é migrado para {link: timestamp}."""
+    store = SeenStore.from_state({"https://feed/a": ["https://x/1", "https://x/2"]})
+
+    assert store.contains("https://feed/a", "https://x/1")
+    assert not store.contains("https://feed/b", "https://x/1")
+    state = store.to_state()
+    assert list(state["https://feed/a"]) == ["https://x/1", "https://x/2"]
+    assert SeenStore.from_state(state).contains("https://feed/a", "https://x/2")
+
+
+def test_cleanup_state_prunes_gradually():
+    """Dedup acima do limite é podado pelos mais antigos, sem zerar o histórico."""
+    now = time.time()
+    dedup = {
+        f"https://feed/{f}": {f"https://x/{f}/{i}": now - (500 - i) for i in range(500)}
+        for f in range(50)
+    }
+    state, _ = cleanup_state({"dedup": dedup, "http_cache": {}, "html_hashes": {}}, reason="teste")
+
+    store = SeenStore.from_state(state["dedup"])
+    assert 0 < store.total() <= 20000
+    assert store.has_feed("https://feed/0")
+    # Os mais recentes continuam vistos
+    assert store.contains("https://feed/0", "https://x/0/499")
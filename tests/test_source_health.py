@@ -0,0 +1,63 @@
+"""
+Testes do circuit breaker por fonte (core.source_health).
+"""
+from core.source_health import SourceHealth, CLOSED, OPEN, HALF_OPEN
+
+URL = "https://broken.example/rss"
+NOW = 1_700_000_000.0
+MIN = 60
+
+
+def _health():
+    return SourceHealth(threshold=3, base_cooldown=30 * MIN, max_cooldown=120 * MIN)
+
+
+def test_opens_after_consecutive_failures_and_skips_until_cooldown():
+    """Abre após N falhas seguidas; a fonte é pulada até o fim do cooldown."""
+    health = _health()
+    for _ in range(2):
+        health.record_failure(URL, "timeout", now=NOW)
+    assert health.state(URL) == CLOSED and health.allow(URL, now=NOW)
+
+    health.record_failure(URL, "timeout", now=NOW)
+    assert health.state(URL) == OPEN
+    assert health.filter([URL, "https://ok/"], now=NOW + 29 * MIN) == ["https://ok/"]
+
+    # Fim do cooldown: passa para half_open (uma tentativa de teste)
+    assert health.allow(URL, now=NOW + 30 * MIN)
+    assert health.state(URL) == HALF_OPEN
+
+
+def test_failed_probe_doubles_cooldown_up_to_max():
+    """Teste que falha reabre com cooldown dobrado, limitado ao máximo."""
+    health = _health()
+    for _ in range(3):
+        health.record_failure(URL, "timeout", now=NOW)
+
+    now = NOW
+    cooldowns = []
+    for _ in range(3):
+        now += health.summary(now=now)["sources"][URL]["retry_in"]
+        assert health.allow(URL, now=now)
+        health.record_failure(URL, "HTTP 500", now=now)
+        cooldowns.append(health.summary(now=now)["sources"][URL]["retry_in"])
+    assert cooldowns == [60 * MIN, 120 * MIN, 120 * MIN]
+
+
+def test_success_closes_circuit_and_state_roundtrip():
+    """Sucesso fecha o circuito; o estado persiste via to_state/load."""
+    health = _health()
+    for _ in range(3):
+        health.record_failure(URL, "timeout", now=NOW)
+    health.record_failure("https://flaky/", "HTTP 502", now=NOW)
+
+    restored = SourceHealth(health.to_state())
+    summary = restored.summary(now=NOW)
+    assert (summary["open"], summary["degraded"]) == (1, 1)
+    assert summary["sources"][URL]["last_error"] == "timeout"
+
+    assert restored.allow(URL, now=NOW + 30 * MIN)
+    restored.record_success(URL)
+    restored.record_success("https://flaky/")
+    assert restored.state(URL) == CLOSED
+    assert restored.to_state() == {}
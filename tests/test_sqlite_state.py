@@ -0,0 +1,106 @@
+"""
+Testes do backend SQLite de estado (utils.storage.SqliteStateStore).
+Usa banco temporário; não toca nos JSON do projeto.
+"""
+import json
+
+from utils.storage import SqliteStateStore, migrate_json_to_sqlite
+
+
+def _state():
+    return {
+        "dedup": {"https://feed/a": {"https://x/1": 1.0, "https://x/2": 2.0}},
+        "http_cache": {"https://feed/a": {"etag": "abc"}},
+        "html_hashes": {"https://site": "h1"},
+        "last_cleanup": 123.0,
+    }
+
+
+def test_roundtrip_keeps_state_json_shape(tmp_path):
+    """load_state devolve o mesmo formato que foi salvo."""
+    store = SqliteStateStore(str(tmp_path / "state.db"))
+    store.load_state()
+    store.save_state(_state())
+
+    reopened = SqliteStateStore(str(tmp_path / "state.db"))
+    assert reopened.load_state() == _state()
+
+
+def test_save_state_writes_only_changed_rows(tmp_path):
+    """Salvar o mesmo estado de novo não grava nada; cada mudança grava uma linha."""
+    store = SqliteStateStore(str(tmp_path / "state.db"))
+    store.load_state()
+    assert store.save_state(_state()) == 5
+
+    state = store.load_state()
+    assert store.save_state(state) == 0
+
+    state["dedup"]["https://feed/a"]["https://x/3"] = 3.0
+    del state["html_hashes"]["https://site"]
+    assert store.save_state(state) == 2
+    assert "https://site" not in store.load_state()["html_hashes"]
+
+
+def test_sent_news_and_history(tmp_path):
+    """sent_news é idempotente por link e histórico mantém a ordem."""
+    store = SqliteStateStore(str(tmp_path / "state.db"))
+    assert store.add_sent_news("https://x/1", "A", "2026-01-01 10:00:00") is True
+    assert store.add_sent_news("https://x/1", "A", "2026-01-01 10:00:00") is False
+    assert store.is_news_sent("https://x/1")
+    assert store.sent_news_stats() == (1, "2026-01-01 10:00:00")
+
+    store.load_history()
+    store.save_history(["https://x/1", "https://x/2"])
+    assert store.save_history(["https://x/2", "https://x/3"]) == 2
+    assert store.load_history() == ["https://x/2", "https://x/3"]
+
+
+def test_migrate_from_json_files(tmp_path):
+    """Migrador importa os três arquivos JSON (dedup legado em listas incluído)."""
+    (tmp_path / "state.json").write_text(json.dumps({
+        "dedup": {"https://feed/a": ["https://x/1"]},
+        "http_cache": {},
+        "html_hashes": {"https://site": "h1"},
+    }))
+    (tmp_path / "history.json").write_text(json.dumps(["https://x/1"]))
+    (tmp_path / "database.json").write_text(json.dumps({
+        "sent_news": [{"link": "https://x/1", "title": "A", "timestamp": "t"}],
+        "stats": {"total_processed": 7},
+    }))
+
+    store = SqliteStateStore(str(tmp_path / "state.db"))
+    counts = migrate_json_to_sqlite(
+        store,
+        state_path=str(tmp_path / "state.json"),
+        history_path=str(tmp_path / "history.json"),
+        database_path=str(tmp_path / "database.json"),
+    )
+
+    assert counts["dedup"] == 1 and counts["sent_news"] == 1
+    state = store.load_state()
+    assert "https://x/1" in state["dedup"]["https://feed/a"]
+    assert state["html_hashes"] == {"https://site": "h1"}
+    assert store.load_history() == ["https://x/1"]
+    assert store.sent_news_stats() == (7, "t")
+
+
+def test_body_fingerprint_columns_roundtrip_and_migration(tmp_path):
+    """Campos de hash do corpo persistem; bancos antigos ganham as colunas novas."""
+    import sqlite3
+
+    db = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE http_cache (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT) WITHOUT ROWID")
+    conn.execute("INSERT INTO http_cache VALUES ('https://feed/a', 'abc', NULL)")
+    conn.commit()
+    conn.close()
+
+    store = SqliteStateStore(db)
+    state = store.load_state()
+    assert state["http_cache"] == {"https://feed/a": {"etag": "abc"}}
+
+    state["http_cache"]["https://feed/a"].update(body_hash="f00", body_len=10, body_partial=True)
+    assert store.save_state(state) == 1
+    assert SqliteStateStore(db).load_state()["http_cache"]["https://feed/a"] == {
+        "etag": "abc", "body_hash": "f00", "body_len": 10, "body_partial": True,
+    }
@@ -0,0 +1,45 @@
+"""
+Testes da camada de persistência JSON (utils.storage).
+"""
+import json
+
+import pytest
+
+import utils.storage as storage
+from utils.storage import load_json_safe, save_json_safe
+
+
+@pytest.fixture(params=[False, True], ids=["stdlib", "orjson"])
+def codec(request, monkeypatch):
+    if request.param and not storage.HAS_ORJSON:
+        pytest.skip("orjson não instalado")
+    monkeypatch.setattr(storage, "HAS_ORJSON", request.param)
+    return request.param
+
+
+def test_save_is_compact_by_default_and_pretty_on_request(tmp_path, codec):
+    """Padrão compacto; pretty=True indenta. Ambos voltam iguais na leitura."""
+    data = {"dedup": {"https://feed": {"https://x/ç": 1.5}}, "n": [1, 2]}
+    compact, pretty = tmp_path / "c.json", tmp_path / "p.json"
+
+    save_json_safe(str(compact), data)
+    save_json_safe(str(pretty), data, pretty=True)
+
+    assert "\n" not in compact.read_text(encoding="utf-8")
+    assert "\n  " in pretty.read_text(encoding="utf-8")
+    assert load_json_safe(str(compact), None) == data == load_json_safe(str(pretty), None)
+
+
+def test_invalid_data_keeps_previous_file(tmp_path, codec):
+    """Dados não serializáveis não tocam no arquivo existente."""
+    path = tmp_path / "state.json"
+    save_json_safe(str(path), {"ok": True})
+
+    save_json_safe(str(path), {"bad": object()})
+    assert json.loads(path.read_text()) == {"ok": True}
+
+
+def test_corrupted_file_returns_default(tmp_path, codec):
+    path = tmp_path / "broken.json"
+    path.write_text("{not json")
+    assert load_json_safe(str(path), {"default": 1}) == {"default": 1}
@@ -0,0 +1,72 @@
+"""
+Testes do cache de validadores HTTP com evição LRU/TTL (utils.cache.ValidatorCache).
+"""
+from utils.cache import ValidatorCache, ValidatorStats, update_cache_state
+from utils.state_cleanup import cleanup_state
+
+DAY = 24 * 3600
+NOW = 1_700_000_000.0
+
+
+def _cache(data=None, **kwargs):
+    return ValidatorCache(data, stats=ValidatorStats(), **kwargs)
+
+
+def test_behaves_like_state_dict_for_existing_helpers():
+    """update_cache_state/headers funcionam sobre o cache como sobre o dict antigo."""
+    cache = _cache()
+    update_cache_state("https://a/", {"ETag": '"v1"', "Last-Modified": "Mon"}, cache)
+    assert cache.headers("https://a/") == {"If-None-Match": '"v1"', "If-Modified-Since": "Mon"}
+    assert cache.headers("https://nunca/") == {}
+    state = cache.to_state()
+    assert state["https://a/"]["etag"] == '"v1"' and "ts" in state["https://a/"]
+
+
+def test_prune_removes_only_inactive_and_expired_entries():
+    """Evição por URL removida do sources.json e por TTL; o resto do cache fica."""
+    cache = _cache({
+        "https://ativo/": {"etag": "1", "ts": NOW - DAY},
+        "https://removido/": {"etag": "2", "ts": NOW - DAY},
+        "https://velho/": {"etag": "3", "ts": NOW - 30 * DAY},
+    }, ttl=14 * DAY)
+    removed = cache.prune(["https://ativo/", "https://velho/"], now=NOW)
+    assert removed == 2
+    assert list(cache) == ["https://ativo/"]
+    assert cache.stats.evictions == 2 and cache.stats.size == 1
+
+
+def test_lru_overflow_keeps_most_recently_used():
+    """Acima do limite saem os menos usados; touch renova a posição."""
+    cache = _cache({f"https://f{i}/": {"etag": str(i), "ts": NOW + i} for i in range(4)}, max_items=3, ttl=None)
+    cache.touch("https://f0/", now=NOW + 10)
+    assert cache.prune(now=NOW + 10) == 1
+    assert "https://f1/" not in cache and "https://f0/" in cache
+
+
+def test_touch_resolution_avoids_rewriting_unchanged_entries():
+    """Uso frequente não altera o ts a cada varredura (SQLite grava só o que muda)."""
+    cache = _cache({"https://a/": {"etag": "1", "ts": NOW}})
+    cache.touch("https://a/", now=NOW + 3600)
+    assert cache["https://a/"]["ts"] == NOW
+    cache.touch("https://a/", now=NOW + DAY)
+    assert cache["https://a/"]["ts"] == NOW + DAY
+
+
+def test_hit_miss_counters():
+    stats = ValidatorStats()
+    cache = ValidatorCache(stats=stats)
+    cache.hit()
+    cache.hit()
+    cache.miss()
+    assert stats.snapshot()["hit_rate"] == round(2 / 3, 3)
+
+
+def test_cleanup_state_no_longer_wipes_http_cache():
+    """cleanup_state poda o excesso em vez de zerar o cache inteiro."""
+    import time
+
+    now = time.time()
+    http_cache = {f"https://f{i}/": {"etag": str(i), "ts": now - i} for i in range(1100)}
+    state, _ = cleanup_state({"dedup": {}, "http_cache": http_cache, "html_hashes": {}}, reason="teste")
+    assert len(state["http_cache"]) == 1000
+    assert "https://f0/" in state["http_cache"] and "https://f1099/" not in state["http_cache"]
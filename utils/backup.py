@@ -8,7 +8,7 @@ import logging
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
-from utils.storage import p, load_json_safe, save_json_safe
+from utils.storage import p, load_json_safe, save_json_safe, use_sqlite_state, get_state_store
 
 log = logging.getLogger("CyberIntel_Backup")
 
@@ -80,10 +80,10 @@ def cleanup_old_backups(filepath: Optional[str] = None):
         if filepath:
             # Backups de um arquivo específico
             filename = os.path.basename(filepath)
-            backups_to_check = list(backup_dir.glob(f"{filename}_*.json.backup"))
+            backups_to_check = list(backup_dir.glob(f"{filename}_*.backup"))
         else:
             # Todos os backups
-            backups_to_check = list(backup_dir.glob("*.json.backup"))
+            backups_to_check = list(backup_dir.glob("*.backup"))
         
         backups_to_check.sort(key=lambda p: p.stat().st_mtime, reverse=True)
         
@@ -128,7 +128,7 @@ def list_backups(filepath: str) -> List[dict]:
     try:
         backup_dir = ensure_backup_dir()
         filename = os.path.basename(filepath)
-        backups = list(backup_dir.glob(f"{filename}_*.json.backup"))
+        backups = list(backup_dir.glob(f"{filename}_*.backup"))
         
         backup_info = []
         for backup_path in sorted(backups, key=lambda p: p.stat().st_mtime, reverse=True):
@@ -196,6 +196,9 @@ def auto_backup_critical_files():
         "history.json",
         "data/database.json"
     ]
+    if use_sqlite_state():
+        # state/history/database ficam no banco SQLite (backup abaixo)
+        critical_files = ["config.json"]
     
     backed_up = 0
     for filename in critical_files:
@@ -204,6 +207,17 @@ def auto_backup_critical_files():
             if create_backup(filepath, label="auto"):
                 backed_up += 1
     
+    # Backend SQLite: cópia consistente via API de backup (copiar o arquivo com WAL não é seguro)
+    if use_sqlite_state():
+        try:
+            store = get_state_store()
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            dest = ensure_backup_dir() / f"{os.path.basename(store.db_path)}_{timestamp}_auto.backup"
+            store.backup(str(dest))
+            backed_up += 1
+        except Exception as e:
+            log.error(f"Erro ao criar backup do banco de estado: {e}")
+    
     if backed_up > 0:
         log.info(f"📦 Backup automático concluído: {backed_up} arquivos")
     
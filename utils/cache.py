@@ -1,9 +1,33 @@
 """
 Cache utilities - HTTP caching with ETag and Last-Modified support.
+
+Os validadores ficam num ValidatorCache (LRU + TTL): entradas de URLs que
+saíram do sources.json ou que não são usadas há HTTP_CACHE_TTL são removidas
+uma a uma, em vez de apagar o cache inteiro quando ele passa do limite (o que
+fazia a varredura seguinte baixar todos os feeds completos).
+
+Também guarda uma impressão digital (hash rápido + tamanho) do corpo de cada
+feed, para servidores que ignoram ETag/Last-Modified e respondem 200 com o
+mesmo conteúdo: se os bytes lidos forem idênticos aos da última leitura, o
+feed é tratado como um 304 (sem parse e sem processar entradas).
 """
-from typing import Dict, Any
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import AsyncIterator, Dict, Any, Iterable, Iterator, List, Optional
 from .storage import load_json_safe, save_json_safe, p
 
+# Limites do cache de validadores
+HTTP_CACHE_MAX_ITEMS = 1000
+HTTP_CACHE_TTL = 14 * 24 * 3600  # 14 dias sem uso
+# Resolução do timestamp de uso: renovar no máximo 1x por dia evita regravar
+# todas as linhas do cache (SQLite incremental) a cada varredura
+HTTP_CACHE_TOUCH_RESOLUTION = 24 * 3600
+
+# Tamanho do digest BLAKE2b (bytes); só detecta mudança, não é uso criptográfico
+FINGERPRINT_DIGEST_SIZE = 16
+
 
 def load_http_state() -> Dict[str, Dict[str, str]]:
     """
@@ -71,3 +95,250 @@ def update_cache_state(url: str, response_headers: Any, state: Dict[str, Dict[st
         state[url]["last_modified"] = response_headers["Last-Modified"]
     elif "last-modified" in response_headers:
         state[url]["last_modified"] = response_headers["last-modified"]
+
+
+# =========================================================
+# VALIDATOR CACHE (LRU + TTL)
+# =========================================================
+
+class ValidatorStats:
+    """Contadores globais do cache de validadores (expostos em /api/stats)."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        total = self.hits + self.misses
+        return {
+            "entries": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+class ValidatorCache(MutableMapping):
+    """
+    Validadores HTTP por URL (etag, last_modified, body_hash...) em ordem LRU.
+
+    Funciona como o dict `state["http_cache"]` (get_cache_headers,
+    update_cache_state e FingerprintReader aceitam qualquer um dos dois); cada
+    entrada guarda "ts" (último uso) para a evição por TTL.
+    """
+
+    def __init__(self, data: Optional[Dict[str, Dict[str, Any]]] = None,
+                 max_items: int = HTTP_CACHE_MAX_ITEMS, ttl: Optional[float] = HTTP_CACHE_TTL,
+                 stats: Optional[ValidatorStats] = None):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.stats = stats if stats is not None else validator_stats
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        if data:
+            now = time.time()
+            valid = [(url, dict(v)) for url, v in data.items() if isinstance(url, str) and isinstance(v, dict)]
+            for url, entry in sorted(valid, key=lambda kv: kv[1].get("ts") or now):
+                entry.setdefault("ts", round(now, 1))
+                self._items[url] = entry
+
+    @classmethod
+    def from_state(cls, raw: Any, **kwargs: Any) -> "ValidatorCache":
+        return cls(raw if isinstance(raw, dict) else None, **kwargs)
+
+    def to_state(self) -> Dict[str, Dict[str, Any]]:
+        self.stats.size = len(self._items)
+        return {url: dict(entry) for url, entry in self._items.items()}
+
+    # MutableMapping
+    def __getitem__(self, url: str) -> Dict[str, Any]:
+        return self._items[url]
+
+    def __setitem__(self, url: str, entry: Dict[str, Any]) -> None:
+        entry.setdefault("ts", round(time.time(), 1))
+        self._items[url] = entry
+        self._items.move_to_end(url)
+
+    def __delitem__(self, url: str) -> None:
+        del self._items[url]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    # -----------------------------------------------------
+    # Uso
+    # -----------------------------------------------------
+
+    def touch(self, url: str, now: Optional[float] = None) -> None:
+        """Marca a entrada como usada (renova o TTL e move para o fim da fila LRU)."""
+        entry = self._items.get(url)
+        if entry is None:
+            return
+        now = time.time() if now is None else now
+        if now - entry.get("ts", 0) >= HTTP_CACHE_TOUCH_RESOLUTION:
+            entry["ts"] = round(now, 1)
+        self._items.move_to_end(url)
+
+    def headers(self, url: str) -> Dict[str, str]:
+        """Headers condicionais da URL (renova a entrada)."""
+        self.touch(url)
+        return get_cache_headers(url, self)
+
+    def hit(self) -> None:
+        """Resposta servida pelo cache (304 ou corpo idêntico)."""
+        self.stats.hits += 1
+
+    def miss(self) -> None:
+        """Corpo novo baixado e processado."""
+        self.stats.misses += 1
+
+    # -----------------------------------------------------
+    # Evição
+    # -----------------------------------------------------
+
+    def prune(self, active_urls: Optional[Iterable[str]] = None, now: Optional[float] = None) -> int:
+        """
+        Remove entradas de URLs fora de `active_urls` (se informado), entradas sem
+        uso há mais de `ttl` e, por fim, as menos usadas além de `max_items`.
+        Retorna quantas foram removidas.
+        """
+        now = time.time() if now is None else now
+        active = set(active_urls) if active_urls is not None else None
+        stale = [
+            url for url, entry in self._items.items()
+            if (active is not None and url not in active)
+            or (self.ttl is not None and now - entry.get("ts", now) > self.ttl)
+        ]
+        for url in stale:
+            del self._items[url]
+        removed = len(stale)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+            removed += 1
+        self.stats.evictions += removed
+        self.stats.size = len(self._items)
+        return removed
+
+
+# Contadores globais
+validator_stats = ValidatorStats()
+
+
+# =========================================================
+# BODY FINGERPRINT (feeds que sempre respondem 200)
+# =========================================================
+
+def body_fingerprint(data: bytes) -> str:
+    """Hash rápido (BLAKE2b-128) do corpo."""
+    return hashlib.blake2b(data, digest_size=FINGERPRINT_DIGEST_SIZE).hexdigest()
+
+
+def update_body_fingerprint(url: str, digest: str, length: int, state: Dict[str, Dict[str, Any]],
+                            partial: bool = False) -> None:
+    """
+    Guarda hash/tamanho dos bytes lidos do feed.
+
+    Args:
+        partial: True se a leitura parou antes do fim (parse incremental); nesse
+                 caso a comparação seguinte considera só esse prefixo.
+    """
+    entry = state.setdefault(url, {})
+    entry["body_hash"] = digest
+    entry["body_len"] = length
+    if partial:
+        entry["body_partial"] = True
+    else:
+        entry.pop("body_partial", None)
+
+
+class FingerprintReader:
+    """
+    Envolve os pedaços da resposta comparando com a impressão digital guardada.
+
+    - `unchanged()` lê só os bytes necessários (o tamanho guardado e, se a
+      última leitura foi completa, confirma o fim do corpo) e compara o hash;
+    - se mudou, iterar o reader devolve o corpo inteiro (inclusive o que já foi
+      lido) enquanto calcula o hash do que foi consumido;
+    - `remember()` grava a impressão digital do que foi consumido.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], url: str, state: Dict[str, Dict[str, Any]]):
+        self._chunks = chunks.__aiter__()
+        self.url = url
+        self._state = state
+        self._buffered: List[bytes] = []
+        self._eof = False
+        self._hasher = hashlib.blake2b(digest_size=FINGERPRINT_DIGEST_SIZE)
+        self.consumed = 0
+        # Bytes já puxados da resposta (inclui os lidos só para comparar em unchanged())
+        self.received = 0
+
+    async def _next_chunk(self) -> Optional[bytes]:
+        if self._eof:
+            return None
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            return None
+        self.received += len(chunk)
+        self._buffered.append(chunk)
+        return chunk
+
+    async def unchanged(self) -> bool:
+        """True se o corpo é idêntico (no trecho comparável) ao da última leitura."""
+        known = self._state.get(self.url, {})
+        digest, length = known.get("body_hash"), known.get("body_len")
+        if not digest or not isinstance(length, int) or length <= 0:
+            return False
+
+        read = sum(map(len, self._buffered))
+        while read < length:
+            chunk = await self._next_chunk()
+            if chunk is None:
+                return False  # corpo menor que o anterior
+            read += len(chunk)
+        if not known.get("body_partial") and read == length:
+            # Leitura anterior foi completa: o corpo atual também precisa terminar aqui
+            if await self._next_chunk() is not None:
+                return False
+        if read > length and not known.get("body_partial"):
+            return False
+
+        prefix = b"".join(self._buffered)[:length]
+        return body_fingerprint(prefix) == digest
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[bytes]:
+        while True:
+            if self._buffered:
+                chunk = self._buffered.pop(0)
+            else:
+                chunk = await self._next_chunk()
+                if chunk is None:
+                    return
+                self._buffered.pop()
+            self._hasher.update(chunk)
+            self.consumed += len(chunk)
+            yield chunk
+
+    async def read(self, max_bytes: int) -> Optional[bytes]:
+        """Lê o corpo inteiro (None se passar de max_bytes)."""
+        parts = []
+        async for chunk in self:
+            if self.consumed > max_bytes:
+                return None
+            parts.append(chunk)
+        return b"".join(parts)
+
+    def remember(self, partial: bool = False) -> None:
+        """Grava a impressão digital dos bytes consumidos até aqui."""
+        if self.consumed:
+            update_body_fingerprint(self.url, self._hasher.hexdigest(), self.consumed, self._state, partial=partial)
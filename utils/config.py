@@ -0,0 +1,192 @@
+"""
+Config service - Cache em memória do config.json com invalidação por mudança no arquivo.
+
+O config.json era relido do disco (com lock-file e re-serialização para
+validação) em cada varredura, em cada detect_lang e em cada clique no
+dashboard. Aqui o arquivo é lido uma vez e servido como snapshot imutável;
+o cache é invalidado quando:
+
+- o arquivo muda no disco (mtime/inode/tamanho, verificado no máximo a cada
+  STAT_INTERVAL segundos), ou
+- uma escrita passa pela própria API (update_guild / set_config).
+"""
+import copy
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple
+
+from utils.storage import p, load_json_safe, save_json_safe
+
+log = logging.getLogger("CyberIntel")
+
+# Intervalo mínimo entre os os.stat() de verificação do arquivo
+STAT_INTERVAL = 1.0
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
+class GuildConfig(NamedTuple):
+    """Configuração de uma guild (valores já normalizados)."""
+    guild_id: str
+    channel_id: Optional[int]
+    filters: Tuple[str, ...]
+    language: Optional[str]
+
+
+def _freeze(obj: Any) -> Any:
+    """Converte dict/list em MappingProxyType/tuple (recursivo)."""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+def _to_guild(guild_id: str, raw: Any) -> GuildConfig:
+    raw = raw if isinstance(raw, dict) else {}
+    channel_id = raw.get("channel_id")
+    try:
+        channel_id = int(channel_id) if channel_id is not None else None
+    except (TypeError, ValueError):
+        channel_id = None
+    filters = raw.get("filters")
+    filters = tuple(f for f in filters if isinstance(f, str)) if isinstance(filters, list) else ()
+    language = raw.get("language")
+    return GuildConfig(guild_id, channel_id, filters, language if isinstance(language, str) else None)
+
+
+class ConfigService:
+    """
+    Leitura/escrita centralizada do config.json.
+
+    - `snapshot()` devolve o config inteiro imutável (mesmo objeto enquanto nada mudar).
+    - `guild()/guilds()/channel_id()/filters()/language()` são acessores tipados por guild.
+    - `update_guild()` grava (atômico) e já atualiza o cache, sem reler o arquivo.
+    """
+
+    def __init__(self, path: Optional[str] = None, stat_interval: float = STAT_INTERVAL):
+        self._path = path
+        self.stat_interval = stat_interval
+        self._lock = threading.RLock()
+        self._raw: Dict[str, Any] = {}
+        self._snapshot: Mapping[str, Any] = _EMPTY
+        self._guilds: Dict[str, GuildConfig] = {}
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._loaded = False
+        self._next_check = 0.0
+        self.loads = 0
+
+    @property
+    def path(self) -> str:
+        return self._path or p("config.json")
+
+    # -----------------------------------------------------
+    # Cache / invalidação
+    # -----------------------------------------------------
+
+    def _file_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_ino, st.st_size
+
+    def _install(self, raw: Dict[str, Any]) -> None:
+        self._raw = raw
+        self._snapshot = _freeze(raw)
+        self._guilds = {gid: _to_guild(gid, data) for gid, data in raw.items()}
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._loaded and now < self._next_check:
+            return
+        with self._lock:
+            self._next_check = now + self.stat_interval
+            signature = self._file_signature()
+            if self._loaded and signature == self._signature:
+                return
+            raw = load_json_safe(self.path, {}, validate=False) if signature else {}
+            if not isinstance(raw, dict):
+                log.error("config.json inválido (esperado objeto). Usando config vazio.")
+                raw = {}
+            self._install(raw)
+            self._signature = signature
+            self._loaded = True
+            self.loads += 1
+            log.debug(f"⚙️ config.json carregado ({len(raw)} guilds)")
+
+    def invalidate(self) -> None:
+        """Força nova leitura do arquivo no próximo acesso."""
+        with self._lock:
+            self._loaded = False
+
+    # -----------------------------------------------------
+    # Leitura
+    # -----------------------------------------------------
+
+    def snapshot(self) -> Mapping[str, Any]:
+        """Config inteiro como mapeamento imutável (listas viram tuplas)."""
+        self._refresh()
+        return self._snapshot
+
+    def guilds(self) -> Dict[str, GuildConfig]:
+        self._refresh()
+        return dict(self._guilds)
+
+    def guild(self, guild_id: Any) -> GuildConfig:
+        self._refresh()
+        gid = str(guild_id)
+        return self._guilds.get(gid) or _to_guild(gid, None)
+
+    def channel_id(self, guild_id: Any) -> Optional[int]:
+        return self.guild(guild_id).channel_id
+
+    def filters(self, guild_id: Any) -> Tuple[str, ...]:
+        return self.guild(guild_id).filters
+
+    def language(self, guild_id: Any) -> Optional[str]:
+        return self.guild(guild_id).language
+
+    # -----------------------------------------------------
+    # Escrita
+    # -----------------------------------------------------
+
+    def update_guild(self, guild_id: Any, defaults: Optional[Dict[str, Any]] = None, **changes: Any) -> GuildConfig:
+        """
+        Altera campos de uma guild e persiste o config.json.
+
+        Args:
+            guild_id: ID da guild
+            defaults: Valores usados se a guild ainda não existir no config
+            **changes: Campos a gravar (ex: filters=[...], language="pt_BR")
+        """
+        with self._lock:
+            self._loaded = False
+            self._refresh()
+            raw = copy.deepcopy(self._raw)
+            gid = str(guild_id)
+            entry = raw.get(gid)
+            if not isinstance(entry, dict):
+                entry = raw[gid] = copy.deepcopy(defaults) if defaults else {}
+            entry.update(changes)
+            self._write(raw)
+            return self._guilds[gid]
+
+    def set_config(self, raw: Dict[str, Any]) -> None:
+        """Substitui o config inteiro."""
+        with self._lock:
+            self._write(copy.deepcopy(raw))
+
+    def _write(self, raw: Dict[str, Any]) -> None:
+        save_json_safe(self.path, raw, atomic=True, pretty=True)  # editado à mão: mantém indentação
+        self._install(raw)
+        self._signature = self._file_signature()
+        self._loaded = True
+        self._next_check = time.monotonic() + self.stat_interval
+
+
+# Instância global
+config_service = ConfigService()
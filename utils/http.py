@@ -0,0 +1,303 @@
+"""
+HTTP client manager - Pool de conexões aiohttp compartilhado por toda a aplicação.
+
+Cada serviço (ThreatService, cveService, dashboard, html_monitor, scanner)
+criava sua própria ClientSession/TCPConnector e um novo contexto SSL a cada
+chamada, pagando DNS + TCP + TLS de novo em toda consulta. Aqui existe um
+único TCPConnector (keep-alive, limite por host, cache de DNS, contexto SSL
+compartilhado); as sessões dos serviços apenas o reaproveitam
+(connector_owner=False), com timeout padrão por serviço e contadores por
+serviço via TraceConfig.
+
+Uso:
+
+    async with http_client.new_session("nvd") as session:
+        async with session.get(url) as resp:
+            ...
+
+Também concentra a parte de transferência usada pelos downloads de conteúdo:
+Accept-Encoding explícito (gzip/deflate e br se houver brotli), leitura em
+streaming com limite de bytes, detecção de charset (BOM/cabeçalho) e contagem
+de bytes no fio x bytes decodificados por fonte (TransferStats).
+"""
+import asyncio
+import codecs
+import logging
+import re
+import ssl
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+import certifi
+
+from settings import HTTP_POOL_LIMIT, HTTP_POOL_LIMIT_PER_HOST, HTTP_DNS_TTL, HTTP_KEEPALIVE_TIMEOUT
+
+log = logging.getLogger("CyberIntel")
+
+# Timeout total (s) padrão por serviço; chamadas podem sobrescrever com timeout=...
+SERVICE_TIMEOUTS: Dict[str, float] = {
+    "feeds": 30,
+    "html": 30,
+    "nvd": 15,
+    # Páginas da sincronização incremental da NVD (respostas de vários MB)
+    "nvd_sync": 120,
+    "threat": 30,
+    "nodered": 3,
+    "default": 30,
+}
+
+# Codificações aceitas nos downloads; br só se o aiohttp tiver decoder de brotli instalado
+try:
+    from aiohttp.compression_utils import HAS_BROTLI
+except ImportError:  # aiohttp antigo
+    HAS_BROTLI = False
+ACCEPT_ENCODING = "gzip, deflate, br" if HAS_BROTLI else "gzip, deflate"
+
+# Tamanho dos pedaços lidos em streaming
+READ_CHUNK_SIZE = 64 * 1024
+# Bytes iniciais inspecionados para achar <?xml encoding=...?> / <meta charset=...>
+CHARSET_SNIFF_BYTES = 2048
+
+_BOMS: Tuple[Tuple[bytes, str], ...] = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+_HEADER_CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+_BODY_CHARSET_RE = re.compile(rb"""(?:encoding|charset)\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+
+
+class HttpClientManager:
+    """
+    Dono do TCPConnector compartilhado.
+
+    O connector é ligado ao event loop em que foi criado; se o loop mudar
+    (ex: testes), um novo pool é criado sob demanda.
+    """
+
+    def __init__(self, limit: int = HTTP_POOL_LIMIT, limit_per_host: int = HTTP_POOL_LIMIT_PER_HOST,
+                 dns_ttl: int = HTTP_DNS_TTL, keepalive_timeout: float = HTTP_KEEPALIVE_TIMEOUT):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._trace_configs: Dict[str, aiohttp.TraceConfig] = {}
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.connections_created = 0
+
+    # -----------------------------------------------------
+    # Ciclo de vida
+    # -----------------------------------------------------
+
+    @property
+    def ssl_context(self) -> ssl.SSLContext:
+        """Contexto SSL (certifi) criado uma única vez por processo."""
+        if self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+        return self._ssl_context
+
+    def connector(self) -> aiohttp.TCPConnector:
+        """Retorna o connector compartilhado (cria no loop atual se necessário)."""
+        loop = asyncio.get_running_loop()
+        if self._connector is None or self._connector.closed or self._loop is not loop:
+            self._connector = aiohttp.TCPConnector(
+                ssl=self.ssl_context,
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._loop = loop
+            log.debug(
+                f"🌐 Pool HTTP criado (limite={self.limit}, por host={self.limit_per_host}, dns_ttl={self.dns_ttl}s)"
+            )
+        return self._connector
+
+    async def start(self) -> None:
+        """Cria o pool na inicialização do bot (evita o custo na primeira requisição)."""
+        self.connector()
+
+    async def close(self) -> None:
+        """Fecha o pool (encerramento do bot)."""
+        if self._connector is not None and not self._connector.closed:
+            await self._connector.close()
+        self._connector = None
+        self._loop = None
+
+    # -----------------------------------------------------
+    # Sessões
+    # -----------------------------------------------------
+
+    def timeout(self, service: str) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=SERVICE_TIMEOUTS.get(service, SERVICE_TIMEOUTS["default"]))
+
+    def new_session(self, service: str = "default", **kwargs: Any) -> aiohttp.ClientSession:
+        """
+        Sessão leve sobre o pool compartilhado (fechá-la não fecha o pool).
+
+        Args:
+            service: Nome do serviço (timeout padrão e métricas)
+            **kwargs: Repassados para ClientSession (ex: headers=..., timeout=...)
+        """
+        kwargs.setdefault("timeout", self.timeout(service))
+        return aiohttp.ClientSession(
+            connector=self.connector(),
+            connector_owner=False,
+            trace_configs=[self._trace_config(service)],
+            **kwargs,
+        )
+
+    def _trace_config(self, service: str) -> aiohttp.TraceConfig:
+        trace = self._trace_configs.get(service)
+        if trace is None:
+            trace = aiohttp.TraceConfig()
+
+            async def on_request_start(session, ctx, params):
+                self.requests[service] += 1
+
+            async def on_request_exception(session, ctx, params):
+                self.errors[service] += 1
+
+            async def on_connection_create_end(session, ctx, params):
+                self.connections_created += 1
+
+            trace.on_request_start.append(on_request_start)
+            trace.on_request_exception.append(on_request_exception)
+            trace.on_connection_create_end.append(on_connection_create_end)
+            self._trace_configs[service] = trace
+        return trace
+
+    # -----------------------------------------------------
+    # Métricas
+    # -----------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado do pool (conexões em uso/ociosas por host) e contadores por serviço."""
+        in_use, idle = 0, 0
+        per_host: Dict[str, int] = {}
+        connector = self._connector
+        if connector is not None and not connector.closed:
+            # Atributos internos do aiohttp; tolera mudanças de versão
+            try:
+                in_use = len(connector._acquired)
+                per_host = {f"{k.host}:{k.port}": len(v) for k, v in connector._acquired_per_host.items() if v}
+                idle = sum(len(v) for v in connector._conns.values())
+            except AttributeError:
+                pass
+        return {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "in_use": in_use,
+            "idle": idle,
+            "in_use_per_host": per_host,
+            "connections_created": self.connections_created,
+            "requests": dict(self.requests),
+            "errors": dict(self.errors),
+        }
+
+
+# =========================================================
+# Transferência: limite de tamanho, charset e bytes por fonte
+# =========================================================
+
+def _valid_codec(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def detect_charset(content_type: Optional[str], head: bytes, default: str = "utf-8") -> str:
+    """
+    Descobre o charset do corpo uma única vez: BOM > cabeçalho Content-Type >
+    declaração no início do documento (<?xml encoding> / <meta charset>) > default.
+    """
+    for bom, name in _BOMS:
+        if head.startswith(bom):
+            return name
+    match = _HEADER_CHARSET_RE.search(content_type or "")
+    charset = _valid_codec(match.group(1)) if match else None
+    if charset:
+        return charset
+    match = _BODY_CHARSET_RE.search(head[:CHARSET_SNIFF_BYTES])
+    charset = _valid_codec(match.group(1).decode("ascii", "ignore")) if match else None
+    return charset or default
+
+
+def decode_body(body: bytes, content_type: Optional[str] = None) -> str:
+    """Decodifica com o charset detectado; bytes inválidos viram U+FFFD (não somem em silêncio)."""
+    return body.decode(detect_charset(content_type, body[:CHARSET_SNIFF_BYTES]), errors="replace")
+
+
+async def read_limited(resp: aiohttp.ClientResponse, max_bytes: int) -> Optional[bytes]:
+    """
+    Lê o corpo (já descomprimido) em streaming; None assim que passar de max_bytes.
+    Evita que uma fonte com corpo gigante (ou bomba de compressão) ocupe a memória.
+    """
+    if resp.content_length and resp.content_length > max_bytes and not resp.headers.get("Content-Encoding"):
+        return None
+    parts, read = [], 0
+    async for chunk in resp.content.iter_chunked(READ_CHUNK_SIZE):
+        read += len(chunk)
+        if read > max_bytes:
+            return None
+        parts.append(chunk)
+    return b"".join(parts)
+
+
+def wire_bytes(resp: aiohttp.ClientResponse, decoded: int) -> int:
+    """
+    Bytes recebidos no fio (antes da descompressão).
+    aiohttp >= 3.12 expõe a contagem bruta; antes disso usa o Content-Length
+    da resposta comprimida (ou os bytes decodificados se veio sem compressão).
+    """
+    raw = getattr(resp.content, "total_raw_bytes", None)
+    if isinstance(raw, int) and raw > 0:
+        return raw
+    if resp.headers.get("Content-Encoding") and resp.content_length:
+        return resp.content_length
+    return decoded
+
+
+class TransferStats:
+    """Bytes no fio x bytes decodificados por fonte (acumulados desde o início)."""
+
+    def __init__(self):
+        self._sources: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, source: str, wire: int, decoded: int, encoding: Optional[str] = None) -> None:
+        entry = self._sources.setdefault(source, {"requests": 0, "wire_bytes": 0, "decoded_bytes": 0, "encoding": None})
+        entry["requests"] += 1
+        entry["wire_bytes"] += max(0, int(wire))
+        entry["decoded_bytes"] += max(0, int(decoded))
+        entry["encoding"] = (encoding or "identity").lower()
+
+    def record_response(self, source: str, resp: aiohttp.ClientResponse, decoded: int) -> None:
+        self.record(source, wire_bytes(resp, decoded), decoded, resp.headers.get("Content-Encoding"))
+
+    def snapshot(self, top: int = 10) -> Dict[str, Any]:
+        """Totais e as `top` fontes que mais consomem banda."""
+        wire = sum(e["wire_bytes"] for e in self._sources.values())
+        decoded = sum(e["decoded_bytes"] for e in self._sources.values())
+        heaviest = sorted(self._sources.items(), key=lambda kv: kv[1]["wire_bytes"], reverse=True)[:top]
+        return {
+            "accept_encoding": ACCEPT_ENCODING,
+            "wire_bytes": wire,
+            "decoded_bytes": decoded,
+            "ratio": round(wire / decoded, 3) if decoded else None,
+            "sources": {url: dict(e) for url, e in heaviest},
+        }
+
+
+# Instâncias globais
+http_client = HttpClientManager()
+transfer_stats = TransferStats()
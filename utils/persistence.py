@@ -0,0 +1,154 @@
+"""
+Persistence facade - I/O de disco fora do event loop.
+
+Leituras/escritas de JSON (com fsync), limpeza do state, histórico e backups
+rodavam direto dentro de corrotinas; num volume Docker lento cada fsync
+congelava o bot inteiro (inclusive o heartbeat do gateway). Aqui todo esse I/O
+roda numa thread dedicada, com fila limitada e em ordem FIFO:
+
+- `write(key, fn, ...)`: escrita coalescida por chave (ex: caminho do arquivo);
+  se já há uma escrita pendente para a mesma chave, só a mais recente é feita.
+- `run(fn, ...)`: operação avulsa (ex: leitura) aguardando o resultado. Por ser
+  FIFO com as escritas, uma leitura enfileirada depois de uma escrita vê o dado novo.
+- `flush()`: ponto de durabilidade (aguarda tudo que estava pendente).
+"""
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, Optional
+
+log = logging.getLogger("CyberIntel")
+
+# Máximo de operações pendentes (acima disso o chamador aguarda uma vaga)
+PERSISTENCE_MAX_PENDING = 64
+
+
+class _Job:
+    __slots__ = ("fn", "args", "kwargs", "future")
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+
+
+class PersistenceWriter:
+    """
+    Thread escritora única com fila limitada e coalescência por chave.
+
+    Métricas: completed, coalesced, failed, max_depth.
+    """
+
+    def __init__(self, max_pending: int = PERSISTENCE_MAX_PENDING, name: str = "persistence-writer"):
+        self.max_pending = max_pending
+        self.name = name
+        self._pending: "OrderedDict[Hashable, _Job]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closing = False
+        self.completed = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.max_depth = 0
+
+    # -----------------------------------------------------
+    # API pública
+    # -----------------------------------------------------
+
+    async def write(self, key: Hashable, fn: Callable, *args: Any, wait: bool = False, **kwargs: Any) -> Any:
+        """
+        Enfileira uma escrita coalescida por `key`.
+
+        Args:
+            key: Identifica o alvo (ex: caminho do arquivo); escritas pendentes
+                 com a mesma chave são substituídas pela mais recente.
+            fn: Função bloqueante a executar na thread escritora.
+            wait: Se True, aguarda a escrita terminar (ponto de durabilidade).
+        """
+        future = await self._submit(("write", key), fn, args, kwargs)
+        if wait:
+            return await asyncio.wrap_future(future)
+        return None
+
+    async def run(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Executa `fn` na thread escritora (em ordem com as escritas) e devolve o resultado."""
+        future = await self._submit(("run", object()), fn, args, kwargs)
+        return await asyncio.wrap_future(future)
+
+    async def flush(self) -> None:
+        """Aguarda todas as operações pendentes no momento da chamada."""
+        with self._cond:
+            futures = [job.future for job in self._pending.values()]
+        if futures:
+            await asyncio.gather(*(asyncio.wrap_future(f) for f in futures), return_exceptions=True)
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def close(self, timeout: Optional[float] = 30.0) -> None:
+        """Drena a fila e encerra a thread (chamado no encerramento do bot)."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._closing = False
+
+    # -----------------------------------------------------
+    # Internos
+    # -----------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+            self._thread.start()
+
+    async def _submit(self, key: Hashable, fn: Callable, args: tuple, kwargs: dict) -> Future:
+        while True:
+            with self._cond:
+                job = self._pending.get(key)
+                if job is not None:
+                    # Ainda não começou: substitui pelos dados mais recentes
+                    job.fn, job.args, job.kwargs = fn, args, kwargs
+                    self.coalesced += 1
+                    return job.future
+                if len(self._pending) < self.max_pending:
+                    job = _Job(fn, args, kwargs)
+                    self._pending[key] = job
+                    self.max_depth = max(self.max_depth, len(self._pending))
+                    self._ensure_thread()
+                    self._cond.notify()
+                    return job.future
+                oldest = next(iter(self._pending.values())).future
+            # Fila cheia: espera a operação mais antiga liberar uma vaga
+            await asyncio.gather(asyncio.wrap_future(oldest), return_exceptions=True)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                _key, job = self._pending.popitem(last=False)
+
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+            except BaseException as e:
+                self.failed += 1
+                log.error(f"❌ Falha em operação de persistência ({getattr(job.fn, '__name__', job.fn)}): {e}")
+                job.future.set_exception(e)
+            else:
+                self.completed += 1
+                job.future.set_result(result)
+
+
+# Instância global
+persistence = PersistenceWriter()
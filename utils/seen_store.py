@@ -0,0 +1,187 @@
+"""
+Seen-store - Índice de links já vistos com membership O(1) e evição gradual.
+
+Substitui as listas de `state["dedup"][feed]` (busca linear) e a limpeza
+"tudo ou nada" do state_cleanup. Cada índice é um OrderedDict link -> timestamp
+em ordem de inserção/uso (LRU), limitado por quantidade e por idade (TTL):
+a evição remove sempre os links mais antigos, nunca o histórico inteiro.
+
+Usado pelo scanner (dedup por feed), pelo history.json e pelo dbService.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Limites padrão
+MAX_LINKS_PER_FEED = 500
+SEEN_TTL_SECONDS = 30 * 24 * 3600  # 30 dias sem aparecer no feed
+
+
+class LinkIndex:
+    """
+    Conjunto ordenado e limitado de links (LRU + TTL).
+
+    - `in` é O(1) e respeita o TTL (links expirados não contam como vistos).
+    - `add` insere/renova o link no fim da fila e remove os mais antigos além de `max_items`.
+    - `touch` renova um link existente (ex: ainda listado no feed), evitando que expire.
+    """
+
+    __slots__ = ("max_items", "ttl", "_items")
+
+    def __init__(self, max_items: Optional[int] = MAX_LINKS_PER_FEED, ttl: Optional[float] = SEEN_TTL_SECONDS,
+                 items: Optional[Any] = None):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items: "OrderedDict[str, float]" = OrderedDict()
+        if items:
+            self.load(items)
+
+    def load(self, items: Any) -> None:
+        """
+        Carrega links de uma lista (formato legado) ou de um dict {link: timestamp}.
+        Listas legadas recebem o timestamp atual, preservando a ordem.
+        """
+        now = time.time()
+        if isinstance(items, dict):
+            pairs = sorted(
+                ((k, float(v) if isinstance(v, (int, float)) else now) for k, v in items.items() if isinstance(k, str)),
+                key=lambda kv: kv[1],
+            )
+        else:
+            pairs = [(k, now) for k in items if isinstance(k, str)]
+        for link, ts in pairs:
+            self._items[link] = ts
+            self._items.move_to_end(link)
+        self._trim()
+
+    def __contains__(self, link: object) -> bool:
+        ts = self._items.get(link)  # type: ignore[arg-type]
+        if ts is None:
+            return False
+        return self.ttl is None or (time.time() - ts) <= self.ttl
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def add(self, link: str, ts: Optional[float] = None) -> None:
+        self._items[link] = ts if ts is not None else time.time()
+        self._items.move_to_end(link)
+        self._trim()
+
+    def touch(self, link: str) -> None:
+        if link in self._items:
+            self._items[link] = time.time()
+            self._items.move_to_end(link)
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """Remove links além do TTL (os mais antigos ficam no início). Retorna quantos saíram."""
+        if self.ttl is None:
+            return 0
+        now = now if now is not None else time.time()
+        removed = 0
+        while self._items:
+            link, ts = next(iter(self._items.items()))
+            if now - ts <= self.ttl:
+                break
+            self._items.popitem(last=False)
+            removed += 1
+        return removed
+
+    def trim_to(self, max_items: Optional[int]) -> int:
+        """Remove os links mais antigos até sobrar `max_items` (None = sem limite). Retorna quantos saíram."""
+        if max_items is None:
+            return 0
+        removed = 0
+        while len(self._items) > max_items:
+            self._items.popitem(last=False)
+            removed += 1
+        return removed
+
+    def _trim(self) -> None:
+        self.trim_to(self.max_items)
+
+    def to_list(self) -> List[str]:
+        return list(self._items)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {link: round(ts, 3) for link, ts in self._items.items()}
+
+
+class SeenStore:
+    """
+    Links vistos por feed (um LinkIndex por URL de feed).
+
+    Persistido em state.json como {"feed_url": {"link": timestamp, ...}}.
+    Aceita o formato legado {"feed_url": ["link", ...]} na carga.
+    """
+
+    def __init__(self, max_per_feed: int = MAX_LINKS_PER_FEED, ttl: Optional[float] = SEEN_TTL_SECONDS):
+        self.max_per_feed = max_per_feed
+        self.ttl = ttl
+        self._feeds: Dict[str, LinkIndex] = {}
+
+    @classmethod
+    def from_state(cls, raw: Any, **kwargs) -> "SeenStore":
+        store = cls(**kwargs)
+        if isinstance(raw, dict):
+            for feed_url, items in raw.items():
+                if isinstance(feed_url, str) and isinstance(items, (list, dict)):
+                    store._feeds[feed_url] = LinkIndex(store.max_per_feed, store.ttl, items)
+        return store
+
+    def has_feed(self, feed_url: str) -> bool:
+        return feed_url in self._feeds
+
+    def feed(self, feed_url: str) -> LinkIndex:
+        """Retorna (criando se necessário) o índice do feed."""
+        index = self._feeds.get(feed_url)
+        if index is None:
+            index = self._feeds[feed_url] = LinkIndex(self.max_per_feed, self.ttl)
+        return index
+
+    def contains(self, feed_url: str, link: str, touch: bool = False) -> bool:
+        index = self._feeds.get(feed_url)
+        if index is None or link not in index:
+            return False
+        if touch:
+            index.touch(link)
+        return True
+
+    def add(self, feed_url: str, link: str) -> None:
+        self.feed(feed_url).add(link)
+
+    def feeds(self) -> Iterable[str]:
+        return self._feeds.keys()
+
+    def total(self) -> int:
+        return sum(len(index) for index in self._feeds.values())
+
+    def prune(self, max_total: Optional[int] = None, active_feeds: Optional[Iterable[str]] = None) -> int:
+        """
+        Evição gradual: remove links expirados, feeds que saíram do sources.json
+        (se `active_feeds` for informado) e, acima de `max_total`, os links mais
+        antigos dos maiores feeds. Nunca apaga o histórico inteiro.
+
+        Returns:
+            Quantidade de links removidos.
+        """
+        removed = 0
+        if active_feeds is not None:
+            active = set(active_feeds)
+            for feed_url in [f for f in self._feeds if f not in active and not f.startswith("api://")]:
+                removed += len(self._feeds.pop(feed_url))
+
+        for index in self._feeds.values():
+            removed += index.evict_expired()
+
+        if max_total is not None:
+            while self.total() > max_total:
+                largest = max(self._feeds.values(), key=len)
+                removed += largest.trim_to(len(largest) - max(1, len(largest) // 10))
+        return removed
+
+    def to_state(self) -> Dict[str, Dict[str, float]]:
+        return {feed_url: index.to_dict() for feed_url, index in self._feeds.items()}
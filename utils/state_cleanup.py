@@ -6,7 +6,9 @@ import os
 import logging
 import time
 from typing import Dict, Any, Tuple
-from utils.storage import p, load_json_safe, save_json_safe
+from utils.storage import load_state, save_state, state_file_path
+from utils.seen_store import SeenStore
+from utils.cache import ValidatorCache, HTTP_CACHE_MAX_ITEMS
 
 log = logging.getLogger("CyberIntel")
 
@@ -16,8 +18,8 @@ WARN_STATE_SIZE = 5 * 1024 * 1024  # 5 MB - aviso e limpeza parcial
 CLEANUP_INTERVAL = 604800  # 7 dias em segundos
 
 # Limites de itens por seção
-MAX_DEDUP_ITEMS = 2000  # Máximo de itens de deduplicação por feed
-MAX_CACHE_ITEMS = 1000  # Máximo de itens de cache HTTP
+MAX_DEDUP_ITEMS = 20000  # Máximo de links no dedup (todos os feeds; por feed o limite é do SeenStore)
+MAX_CACHE_ITEMS = HTTP_CACHE_MAX_ITEMS  # Máximo de validadores no cache HTTP (LRU)
 MAX_HASHES_ITEMS = 100  # Máximo de hashes HTML
 
 
@@ -47,34 +49,31 @@ def cleanup_state(state: Dict[str, Any], reason: str = "Manual") -> Tuple[Dict[s
         "html_hashes": len(state.get("html_hashes", {}))
     }
     
-    # Limpa dedup (mais crítico - pode crescer muito)
+    # Dedup: evição gradual (TTL + mais antigos primeiro), nunca apaga tudo de uma vez
     dedup = state.get("dedup", {})
     if isinstance(dedup, dict):
-        dedup_count = sum(len(v) if isinstance(v, (list, dict)) else 1 for v in dedup.values())
-        if dedup_count > MAX_DEDUP_ITEMS:
-            log.info(f"🧹 Limpando dedup: {dedup_count} itens -> 0")
-            state["dedup"] = {}
-        else:
-            # Limpa feeds individuais que têm muitos itens
-            cleaned_feeds = 0
-            for feed_url, items in list(dedup.items()):
-                if isinstance(items, list) and len(items) > 500:
-                    dedup[feed_url] = items[-500:]  # Mantém últimos 500
-                    cleaned_feeds += 1
-            if cleaned_feeds > 0:
-                log.info(f"🧹 Limpeza parcial de {cleaned_feeds} feeds no dedup")
-    
-    # Limpa http_cache
+        seen = SeenStore.from_state(dedup)
+        before = seen.total()
+        removed = seen.prune(max_total=MAX_DEDUP_ITEMS)
+        state["dedup"] = seen.to_state()
+        if removed:
+            log.info(f"🧹 Dedup podado gradualmente: {before} -> {before - removed} links")
+    
+    # http_cache: evição por TTL/LRU (só os validadores sem uso), nunca o cache inteiro
     http_cache = state.get("http_cache", {})
-    if isinstance(http_cache, dict) and len(http_cache) > MAX_CACHE_ITEMS:
-        log.info(f"🧹 Limpando http_cache: {len(http_cache)} itens -> 0")
-        state["http_cache"] = {}
+    if isinstance(http_cache, dict):
+        cache = ValidatorCache.from_state(http_cache, max_items=MAX_CACHE_ITEMS)
+        removed = cache.prune()
+        state["http_cache"] = cache.to_state()
+        if removed:
+            log.info(f"🧹 http_cache podado: {len(http_cache)} -> {len(cache)} validadores")
     
     # Limpa html_hashes (menos crítico, mas pode crescer)
     html_hashes = state.get("html_hashes", {})
     if isinstance(html_hashes, dict) and len(html_hashes) > MAX_HASHES_ITEMS:
         log.info(f"🧹 Limpando html_hashes: {len(html_hashes)} itens -> 0")
         state["html_hashes"] = {}
+        state["html_snapshots"] = {}
     
     stats_after = {
         "dedup": len(state.get("dedup", {})) if isinstance(state.get("dedup"), dict) else 0,
@@ -123,8 +122,8 @@ def check_and_cleanup_state(force: bool = False) -> Dict[str, Any]:
     Returns:
         Estado limpo
     """
-    state_file = p("state.json")
-    state = load_json_safe(state_file, {})
+    state_file = state_file_path()
+    state = load_state()
     
     state.setdefault("dedup", {})
     state.setdefault("http_cache", {})
@@ -148,10 +147,10 @@ def check_and_cleanup_state(force: bool = False) -> Dict[str, Any]:
     
     if should_clean:
         state, stats = cleanup_state(state, cleanup_reason)
-        save_json_safe(state_file, state, atomic=True)
+        save_state(state)
         
         # Log do tamanho após limpeza
         new_size = get_state_size(state_file)
-        log.info(f"📊 state.json após limpeza: {new_size / 1024 / 1024:.2f} MB")
+        log.info(f"📊 Estado após limpeza: {new_size / 1024 / 1024:.2f} MB")
     
     return state
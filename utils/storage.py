@@ -3,13 +3,17 @@ Storage utilities - JSON load/save functions.
 Otimizado para auditoria e compliance em cybersegurança/GRC.
 Implementa file locking e escrita atômica para prevenir corrupção.
 """
+import asyncio
+import errno
 import os
 import json
 import logging
+import random
 import tempfile
+import time
 import shutil
 from typing import Any
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 
 # File locking cross-platform
 try:
@@ -23,9 +27,48 @@ except ImportError:
     except ImportError:
         HAS_MSVCRT = False
 
+# Codec JSON opcional mais rápido (orjson); sem ele usa o json da stdlib
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
+
 log = logging.getLogger("MaftyIntel")
 
 
+def dumps_json(data: Any, pretty: bool = False) -> bytes:
+    """
+    Serializa para bytes UTF-8 em uma única passada.
+
+    Compacto por padrão; `pretty=True` usa indentação de 2 espaços (arquivos
+    editados à mão, como config.json). Lança TypeError/ValueError se os dados
+    não forem serializáveis.
+    """
+    if HAS_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(data, option=option)
+        except orjson.JSONEncodeError as e:
+            raise TypeError(str(e)) from e
+    if pretty:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads_json(raw: Any) -> Any:
+    """Desserializa bytes/str JSON (orjson se disponível)."""
+    if HAS_ORJSON:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError as e:
+            raise ValueError(str(e)) from e
+    return json.loads(raw)
+
+
 def p(filename: str) -> str:
     """
     Retorna o caminho absoluto para um arquivo, garantindo que arquivos de dados (.json) 
@@ -48,7 +91,7 @@ def load_json_safe(filepath: str, default: Any, validate: bool = True) -> Any:
     Args:
         filepath: Caminho do arquivo JSON
         default: Valor padrão se falhar
-        validate: Se True, valida estrutura JSON antes de retornar
+        validate: Mantido por compatibilidade; o próprio parse já valida a estrutura
     
     Returns:
         Dados do JSON ou valor padrão
@@ -65,16 +108,12 @@ def load_json_safe(filepath: str, default: Any, validate: bool = True) -> Any:
         
         # Tenta carregar arquivo principal
         try:
-            with _file_lock(filepath):
-                with open(filepath, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-            
-            # Validação básica de integridade
-            if validate:
-                # Testa se pode serializar novamente (valida estrutura)
-                json.dumps(data)
+            with _file_lock(filepath, shared=True):
+                with open(filepath, "rb") as f:
+                    raw = f.read()
             
-            return data
+            # Parse é a validação de integridade (JSON inválido -> ValueError)
+            return loads_json(raw)
             
         except (json.JSONDecodeError, ValueError) as e:
             log.error(f"JSON corrompido em '{filepath}': {e}")
@@ -84,8 +123,8 @@ def load_json_safe(filepath: str, default: Any, validate: bool = True) -> Any:
             if os.path.exists(backup_path):
                 log.warning(f"Tentando recuperar de backup: {backup_path}")
                 try:
-                    with open(backup_path, "r", encoding="utf-8") as f:
-                        backup_data = json.load(f)
+                    with open(backup_path, "rb") as f:
+                        backup_data = loads_json(f.read())
                     # Restaura backup
                     save_json_safe(filepath, backup_data, atomic=True)
                     log.info(f"✅ Backup restaurado com sucesso: {filepath}")
@@ -100,77 +139,170 @@ def load_json_safe(filepath: str, default: Any, validate: bool = True) -> Any:
         return default
 
 
-@contextmanager
-def _file_lock(filepath: str):
-    """
-    Context manager para file locking cross-platform.
-    Previne race conditions em operações concorrentes.
-    """
+# Espera máxima por um lock antes de desistir (LockTimeout)
+LOCK_TIMEOUT = 10.0
+LOCK_RETRY_BASE = 0.005
+LOCK_RETRY_MAX = 0.2
+
+
+class LockTimeout(TimeoutError):
+    """Lock do arquivo não obtido dentro do tempo limite."""
+
+
+class LockStats:
+    """Métricas de contenção dos locks de arquivo (processo inteiro)."""
+
+    def __init__(self):
+        self.acquired = 0
+        self.contended = 0
+        self.timeouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    def record(self, waited_ms: float, contended: bool) -> None:
+        self.acquired += 1
+        if contended:
+            self.contended += 1
+            self.wait_ms_total += waited_ms
+            self.wait_ms_max = max(self.wait_ms_max, waited_ms)
+
+    def snapshot(self) -> dict:
+        return {
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "timeouts": self.timeouts,
+            "wait_ms_total": round(self.wait_ms_total, 1),
+            "wait_ms_max": round(self.wait_ms_max, 1),
+        }
+
+
+lock_stats = LockStats()
+
+
+def _open_lock_fd(filepath: str) -> int:
+    """Abre (criando se preciso) o arquivo de lock persistente ao lado do arquivo de dados."""
     lock_file = filepath + ".lock"
-    lock_fd = None
-    
+    os.makedirs(os.path.dirname(lock_file) or ".", exist_ok=True)
+    return os.open(lock_file, os.O_CREAT | os.O_RDWR, 0o644)
+
+
+def _try_lock(fd: int, shared: bool) -> bool:
+    """Tenta obter o lock sem bloquear. Retorna False se outro processo/escritor o detém."""
     try:
-        # Cria arquivo de lock
-        lock_fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
-        
-        # Aplica lock baseado no OS
         if HAS_FCNTL:
-            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            fcntl.flock(fd, (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
         elif HAS_MSVCRT:
-            msvcrt.locking(lock_fd, msvcrt.LK_LOCK, 1)
-        
-        yield
-        
-    except FileExistsError:
-        # Lock já existe, aguarda um pouco e tenta novamente
-        import time
-        time.sleep(0.1)
-        # Tenta novamente (implementação simples, pode melhorar com retry logic)
-        if os.path.exists(lock_file):
-            log.warning(f"Lock file existe para {filepath}, aguardando...")
-            time.sleep(0.5)
+            # Windows não tem lock compartilhado: leitores também usam exclusivo
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except (BlockingIOError, PermissionError):
+        return False
+    except OSError as e:
+        if e.errno in (errno.EACCES, errno.EAGAIN, errno.EDEADLK):
+            return False
+        raise
+
+
+def _unlock(fd: int) -> None:
+    try:
+        if HAS_FCNTL:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        elif HAS_MSVCRT:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+def _retry_delay(attempt: int) -> float:
+    """Backoff exponencial limitado com jitter (evita escritores sincronizados)."""
+    delay = min(LOCK_RETRY_MAX, LOCK_RETRY_BASE * (2 ** attempt))
+    return random.uniform(delay / 2, delay)
+
+
+@contextmanager
+def _file_lock(filepath: str, shared: bool = False, timeout: float = LOCK_TIMEOUT):
+    """
+    Lock consultivo (fcntl.flock) em um arquivo `.lock` persistente.
+
+    - shared=True: lock compartilhado (vários leitores ao mesmo tempo)
+    - shared=False: lock exclusivo (escrita)
+    - Se ocupado, tenta de novo com backoff + jitter até `timeout` e então
+      lança LockTimeout. O arquivo de lock nunca é apagado (apagar o lock de
+      outro escritor era o que permitia duas escritas simultâneas).
+    """
+    fd = _open_lock_fd(filepath)
+    started = time.monotonic()
+    attempt = 0
+    try:
+        while not _try_lock(fd, shared):
+            waited = time.monotonic() - started
+            if waited >= timeout:
+                lock_stats.timeouts += 1
+                raise LockTimeout(f"Lock de {filepath} não obtido em {timeout:.1f}s")
+            time.sleep(min(_retry_delay(attempt), max(0.0, timeout - waited)))
+            attempt += 1
+    except BaseException:
+        os.close(fd)
+        raise
+
+    lock_stats.record((time.monotonic() - started) * 1000, contended=attempt > 0)
+    try:
         yield
-    except Exception as e:
-        log.error(f"Erro ao criar lock para {filepath}: {e}")
+    finally:
+        _unlock(fd)
+
+
+@asynccontextmanager
+async def async_file_lock(filepath: str, shared: bool = False, timeout: float = LOCK_TIMEOUT):
+    """
+    Variante asyncio do _file_lock: enquanto espera, cede o event loop
+    (asyncio.sleep) em vez de bloquear a thread.
+    """
+    fd = _open_lock_fd(filepath)
+    started = time.monotonic()
+    attempt = 0
+    try:
+        while not _try_lock(fd, shared):
+            waited = time.monotonic() - started
+            if waited >= timeout:
+                lock_stats.timeouts += 1
+                raise LockTimeout(f"Lock de {filepath} não obtido em {timeout:.1f}s")
+            await asyncio.sleep(min(_retry_delay(attempt), max(0.0, timeout - waited)))
+            attempt += 1
+    except BaseException:
+        os.close(fd)
+        raise
+
+    lock_stats.record((time.monotonic() - started) * 1000, contended=attempt > 0)
+    try:
         yield
     finally:
-        if lock_fd is not None:
-            try:
-                if HAS_FCNTL:
-                    fcntl.flock(lock_fd, fcntl.LOCK_UN)
-                os.close(lock_fd)
-            except:
-                pass
-        
-        # Remove arquivo de lock
-        try:
-            if os.path.exists(lock_file):
-                os.remove(lock_file)
-        except:
-            pass
+        _unlock(fd)
 
 
-def save_json_safe(filepath: str, data: Any, atomic: bool = True) -> None:
+def save_json_safe(filepath: str, data: Any, atomic: bool = True, pretty: bool = False) -> None:
     """
-    Salva JSON com indentação de forma segura e atômica.
+    Salva JSON de forma segura e atômica.
     
     Para auditoria e compliance:
     - Escrita atômica (temp file + rename) previne corrupção
     - File locking previne race conditions
-    - Validação de JSON antes de salvar
+    - Serialização única para um buffer (também valida os dados antes de tocar no arquivo)
     
     Args:
         filepath: Caminho do arquivo JSON
         data: Dados a salvar
         atomic: Se True, usa escrita atômica (temp + rename)
+        pretty: Se True, grava indentado (padrão: compacto)
     """
     try:
         # Garante que diretório existe
         os.makedirs(os.path.dirname(filepath) if os.path.dirname(filepath) else ".", exist_ok=True)
         
-        # Valida dados antes de serializar
+        # Serializa uma única vez (falha aqui = dados inválidos, arquivo intacto)
         try:
-            json.dumps(data)  # Testa serialização
+            payload = dumps_json(data, pretty=pretty)
         except (TypeError, ValueError) as e:
             log.error(f"Dados inválidos para JSON '{filepath}': {e}")
             return
@@ -181,14 +313,13 @@ def save_json_safe(filepath: str, data: Any, atomic: bool = True) -> None:
                 # Isso garante que o arquivo original não é corrompido em caso de interrupção
                 temp_dir = os.path.dirname(filepath) or "."
                 with tempfile.NamedTemporaryFile(
-                    mode='w',
-                    encoding='utf-8',
+                    mode='wb',
                     dir=temp_dir,
                     delete=False,
                     suffix='.tmp'
                 ) as tmp_file:
                     tmp_path = tmp_file.name
-                    json.dump(data, tmp_file, indent=2, ensure_ascii=False)
+                    tmp_file.write(payload)
                     tmp_file.flush()
                     os.fsync(tmp_file.fileno())  # Force write to disk
                 
@@ -196,8 +327,8 @@ def save_json_safe(filepath: str, data: Any, atomic: bool = True) -> None:
                 shutil.move(tmp_path, filepath)
             else:
                 # Escrita direta (fallback se atomic falhar)
-                with open(filepath, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
+                with open(filepath, "wb") as f:
+                    f.write(payload)
                     f.flush()
                     os.fsync(f.fileno())
         
@@ -213,3 +344,382 @@ def save_json_safe(filepath: str, data: Any, atomic: bool = True) -> None:
                 log.info(f"Backup criado: {backup_path}")
             except:
                 pass
+
+
+# =========================================================
+# BACKEND SQLITE (STATE_BACKEND=sqlite)
+# =========================================================
+#
+# state.json, history.json e database.json são reescritos inteiros (indent=2,
+# fsync, rename) a cada varredura / notícia enviada. No backend SQLite (WAL)
+# cada seção vira uma tabela indexada e o salvamento grava apenas as linhas
+# que mudaram desde a última leitura/gravação.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_links (
+    feed TEXT NOT NULL,
+    link TEXT NOT NULL,
+    ts   REAL NOT NULL,
+    PRIMARY KEY (feed, link)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_seen_links_feed_ts ON seen_links (feed, ts);
+
+CREATE TABLE IF NOT EXISTS http_cache (
+    url           TEXT PRIMARY KEY,
+    etag          TEXT,
+    last_modified TEXT,
+    body_hash     TEXT,
+    body_len      INTEGER,
+    body_partial  INTEGER,
+    ts            REAL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS html_hashes (
+    url  TEXT PRIMARY KEY,
+    hash TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS history (
+    seq  INTEGER PRIMARY KEY AUTOINCREMENT,
+    link TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS sent_news (
+    seq       INTEGER PRIMARY KEY AUTOINCREMENT,
+    link      TEXT NOT NULL UNIQUE,
+    title     TEXT,
+    timestamp TEXT
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Colunas acrescentadas depois da primeira versão do schema (migração de bancos existentes)
+_ADDED_COLUMNS = {
+    "http_cache": (("body_hash", "TEXT"), ("body_len", "INTEGER"), ("body_partial", "INTEGER"), ("ts", "REAL")),
+}
+# Campos de cada entrada do http_cache, na ordem das colunas
+_HTTP_CACHE_FIELDS = ("etag", "last_modified", "body_hash", "body_len", "body_partial", "ts")
+
+# Seções do state.json com tabela própria (o resto vai para `meta` como JSON)
+_TABLE_SECTIONS = ("dedup", "http_cache", "html_hashes")
+# Chaves de `meta` do database.json (fora do state)
+_DB_META_PREFIX = "db:"
+_TOTAL_PROCESSED_KEY = _DB_META_PREFIX + "total_processed"
+
+
+class SqliteStateStore:
+    """
+    Estado do bot em SQLite (WAL) com gravação incremental.
+
+    `load_state`/`save_state` mantêm o formato do state.json (os chamadores não
+    mudam); o store guarda um snapshot do que está no banco e, ao salvar,
+    aplica só os inserts/updates/deletes da diferença, numa única transação.
+    """
+
+    def __init__(self, db_path: str):
+        import sqlite3
+        import threading
+
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+        self._migrate_schema()
+        self._lock = threading.RLock()
+        self._snapshot: dict = {"dedup": {}, "http_cache": {}, "html_hashes": {}, "meta": {}}
+        self._history_snapshot: dict = {}
+        # Linhas gravadas no último save_state/save_history (métrica/benchmark)
+        self.last_write_rows = 0
+
+    def _migrate_schema(self) -> None:
+        for table, columns in _ADDED_COLUMNS.items():
+            existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            for name, sql_type in columns:
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {sql_type}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            for table in ("seen_links", "http_cache", "html_hashes", "history", "sent_news", "meta"):
+                if self._conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                    return False
+        return True
+
+    # -----------------------------------------------------
+    # state.json
+    # -----------------------------------------------------
+
+    def load_state(self) -> dict:
+        """Carrega o estado no formato do state.json e atualiza o snapshot."""
+        with self._lock:
+            dedup: dict = {}
+            for feed, link, ts in self._conn.execute("SELECT feed, link, ts FROM seen_links ORDER BY feed, ts"):
+                dedup.setdefault(feed, {})[link] = ts
+            http_cache = {}
+            for url, *values in self._conn.execute(f"SELECT url, {', '.join(_HTTP_CACHE_FIELDS)} FROM http_cache"):
+                entry = {field: value for field, value in zip(_HTTP_CACHE_FIELDS, values) if value is not None}
+                if "body_partial" in entry:
+                    entry["body_partial"] = bool(entry["body_partial"])
+                http_cache[url] = entry
+            html_hashes = dict(self._conn.execute("SELECT url, hash FROM html_hashes"))
+            meta = {
+                key: json.loads(value)
+                for key, value in self._conn.execute("SELECT key, value FROM meta")
+                if not key.startswith(_DB_META_PREFIX)
+            }
+
+        self._snapshot = {
+            "dedup": {feed: dict(items) for feed, items in dedup.items()},
+            "http_cache": {url: dict(v) for url, v in http_cache.items()},
+            "html_hashes": dict(html_hashes),
+            "meta": {key: json.dumps(value, sort_keys=True) for key, value in meta.items()},
+        }
+        state = dict(meta)
+        state.update({"dedup": dedup, "http_cache": http_cache, "html_hashes": html_hashes})
+        return state
+
+    def save_state(self, state: dict) -> int:
+        """
+        Grava apenas as diferenças em relação ao snapshot. Retorna o nº de linhas alteradas.
+        """
+        dedup = state.get("dedup") or {}
+        http_cache = state.get("http_cache") or {}
+        html_hashes = state.get("html_hashes") or {}
+        meta = {
+            k: json.dumps(v, sort_keys=True) for k, v in state.items()
+            if k not in _TABLE_SECTIONS and not k.startswith(_DB_META_PREFIX)
+        }
+        snap = self._snapshot
+
+        seen_upserts, seen_deletes = [], []
+        old_dedup = snap["dedup"]
+        for feed, items in dedup.items():
+            if isinstance(items, list):  # formato legado
+                items = {link: 0.0 for link in items}
+            old = old_dedup.get(feed, {})
+            seen_upserts.extend((feed, link, ts) for link, ts in items.items() if old.get(link) != ts)
+            seen_deletes.extend((feed, link) for link in old if link not in items)
+        for feed, old in old_dedup.items():
+            if feed not in dedup:
+                seen_deletes.extend((feed, link) for link in old)
+
+        cache_upserts = [
+            (url, *(v.get(field) for field in _HTTP_CACHE_FIELDS))
+            for url, v in http_cache.items() if snap["http_cache"].get(url) != v
+        ]
+        cache_deletes = [(url,) for url in snap["http_cache"] if url not in http_cache]
+        hash_upserts = [(url, h) for url, h in html_hashes.items() if snap["html_hashes"].get(url) != h]
+        hash_deletes = [(url,) for url in snap["html_hashes"] if url not in html_hashes]
+        meta_upserts = [(k, v) for k, v in meta.items() if snap["meta"].get(k) != v]
+        meta_deletes = [(k,) for k in snap["meta"] if k not in meta]
+
+        with self._transaction() as conn:
+            conn.executemany("INSERT OR REPLACE INTO seen_links (feed, link, ts) VALUES (?, ?, ?)", seen_upserts)
+            conn.executemany("DELETE FROM seen_links WHERE feed = ? AND link = ?", seen_deletes)
+            conn.executemany(
+                f"INSERT OR REPLACE INTO http_cache (url, {', '.join(_HTTP_CACHE_FIELDS)}) "
+                f"VALUES (?, {', '.join('?' * len(_HTTP_CACHE_FIELDS))})",
+                cache_upserts,
+            )
+            conn.executemany("DELETE FROM http_cache WHERE url = ?", cache_deletes)
+            conn.executemany("INSERT OR REPLACE INTO html_hashes (url, hash) VALUES (?, ?)", hash_upserts)
+            conn.executemany("DELETE FROM html_hashes WHERE url = ?", hash_deletes)
+            conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", meta_upserts)
+            conn.executemany("DELETE FROM meta WHERE key = ?", meta_deletes)
+
+        self._snapshot = {
+            "dedup": {
+                feed: ({link: 0.0 for link in items} if isinstance(items, list) else dict(items))
+                for feed, items in dedup.items()
+            },
+            "http_cache": {url: dict(v) for url, v in http_cache.items()},
+            "html_hashes": dict(html_hashes),
+            "meta": meta,
+        }
+        self.last_write_rows = sum(map(len, (
+            seen_upserts, seen_deletes, cache_upserts, cache_deletes,
+            hash_upserts, hash_deletes, meta_upserts, meta_deletes,
+        )))
+        return self.last_write_rows
+
+    # -----------------------------------------------------
+    # history.json
+    # -----------------------------------------------------
+
+    def load_history(self) -> list:
+        with self._lock:
+            links = [row[0] for row in self._conn.execute("SELECT link FROM history ORDER BY seq")]
+        self._history_snapshot = dict.fromkeys(links)
+        return links
+
+    def save_history(self, links: list) -> int:
+        """Insere os links novos (em ordem) e remove os que saíram. Retorna o nº de linhas alteradas."""
+        current = dict.fromkeys(links)
+        inserts = [(link,) for link in current if link not in self._history_snapshot]
+        deletes = [(link,) for link in self._history_snapshot if link not in current]
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM history WHERE link = ?", deletes)
+            conn.executemany("INSERT OR IGNORE INTO history (link) VALUES (?)", inserts)
+        self._history_snapshot = current
+        self.last_write_rows = len(inserts) + len(deletes)
+        return self.last_write_rows
+
+    # -----------------------------------------------------
+    # database.json (sent_news)
+    # -----------------------------------------------------
+
+    def is_news_sent(self, link: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM sent_news WHERE link = ?", (link,)).fetchone() is not None
+
+    def add_sent_news(self, link: str, title: str, timestamp: str) -> bool:
+        """Registra a notícia. Retorna False se o link já estava registrado."""
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO sent_news (link, title, timestamp) VALUES (?, ?, ?)",
+                (link, title, timestamp),
+            )
+            if cur.rowcount == 0:
+                return False
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, '1') "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+                (_TOTAL_PROCESSED_KEY,),
+            )
+        return True
+
+    def sent_news_stats(self) -> tuple:
+        """Retorna (total_processed, timestamp da última notícia ou "N/A")."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (_TOTAL_PROCESSED_KEY,)).fetchone()
+            last = self._conn.execute("SELECT timestamp FROM sent_news ORDER BY seq DESC LIMIT 1").fetchone()
+        total = int(json.loads(row[0])) if row else 0
+        return total, (last[0] if last and last[0] else "N/A")
+
+    # -----------------------------------------------------
+    # Manutenção
+    # -----------------------------------------------------
+
+    def backup(self, dest_path: str) -> None:
+        """Cópia consistente do banco (API de backup do SQLite; seguro com WAL)."""
+        import sqlite3
+
+        with self._lock:
+            dest = sqlite3.connect(dest_path)
+            try:
+                self._conn.backup(dest)
+            finally:
+                dest.close()
+
+
+def migrate_json_to_sqlite(store: SqliteStateStore, state_path: str = None, history_path: str = None,
+                           database_path: str = None) -> dict:
+    """
+    Migração única: importa state.json, history.json e database.json para o SQLite.
+    Os arquivos JSON não são alterados. Retorna contagens por seção.
+    """
+    state_path = state_path or p("state.json")
+    history_path = history_path or p("history.json")
+    database_path = database_path or p("database.json")
+
+    state = load_json_safe(state_path, {}) if os.path.exists(state_path) else {}
+    if not isinstance(state, dict):
+        state = {}
+    # dedup legado em listas recebe timestamp atual (mesma regra do SeenStore)
+    from utils.seen_store import SeenStore
+    state["dedup"] = SeenStore.from_state(state.get("dedup", {})).to_state()
+    store.load_state()
+    store.save_state(state)
+
+    history = load_json_safe(history_path, []) if os.path.exists(history_path) else []
+    history = [link for link in history if isinstance(link, str)] if isinstance(history, list) else []
+    store.load_history()
+    store.save_history(history)
+
+    db = load_json_safe(database_path, {}) if os.path.exists(database_path) else {}
+    sent = db.get("sent_news", []) if isinstance(db, dict) else []
+    with store._transaction() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO sent_news (link, title, timestamp) VALUES (?, ?, ?)",
+            [(i["link"], i.get("title"), i.get("timestamp")) for i in sent if isinstance(i, dict) and i.get("link")],
+        )
+        total = (db.get("stats") or {}).get("total_processed", len(sent)) if isinstance(db, dict) else 0
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (_TOTAL_PROCESSED_KEY, json.dumps(total)))
+
+    counts = {
+        "dedup": sum(len(v) for v in state["dedup"].values()),
+        "http_cache": len(state.get("http_cache") or {}),
+        "html_hashes": len(state.get("html_hashes") or {}),
+        "history": len(history),
+        "sent_news": len(sent),
+    }
+    log.info(f"📦 Migração JSON -> SQLite concluída ({store.db_path}): {counts}")
+    return counts
+
+
+_state_store = None
+
+
+def get_state_store() -> SqliteStateStore:
+    """
+    Retorna o store SQLite global. Na primeira abertura de um banco vazio,
+    migra automaticamente os JSON existentes.
+    """
+    global _state_store
+    if _state_store is None:
+        from settings import STATE_DB_PATH
+        _state_store = SqliteStateStore(p(STATE_DB_PATH))
+        if _state_store.is_empty() and any(os.path.exists(p(f)) for f in ("state.json", "history.json", "database.json")):
+            migrate_json_to_sqlite(_state_store)
+    return _state_store
+
+
+def use_sqlite_state() -> bool:
+    from settings import STATE_BACKEND
+    return STATE_BACKEND == "sqlite"
+
+
+def state_file_path() -> str:
+    """Arquivo físico do estado (para checagem de tamanho/backup)."""
+    if use_sqlite_state():
+        from settings import STATE_DB_PATH
+        return p(STATE_DB_PATH)
+    return p("state.json")
+
+
+def load_state() -> dict:
+    """Carrega o estado unificado (state.json ou SQLite, conforme STATE_BACKEND)."""
+    if use_sqlite_state():
+        return get_state_store().load_state()
+    state = load_json_safe(p("state.json"), {})
+    return state if isinstance(state, dict) else {}
+
+
+def save_state(state: dict) -> None:
+    """Persiste o estado unificado (JSON atômico ou gravação incremental no SQLite)."""
+    if use_sqlite_state():
+        get_state_store().save_state(state)
+    else:
+        save_json_safe(p("state.json"), state, atomic=True)
@@ -8,6 +8,7 @@ from typing import Dict, Any, Optional
 from deep_translator import GoogleTranslator
 
 from utils.storage import p, load_json_safe
+from utils.config import config_service
 
 log = logging.getLogger("MaftyIntel")
 
@@ -45,9 +46,9 @@ class Translator:
         3. Padrão (en_US)
         """
         # 1. Config manual
-        config = load_json_safe(p("config.json"), {})
-        if guild_id in config and "language" in config[guild_id]:
-            return config[guild_id]["language"]
+        language = config_service.language(guild_id)
+        if language:
+            return language
         
         # 2. Locale do Discord (ex: 'pt-BR' -> 'pt_BR')
         if guild_locale:
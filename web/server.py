@@ -10,7 +10,14 @@ import os
 from datetime import datetime
 
 from core.stats import stats
-from utils.storage import p
+from core.delivery import delivery
+from utils.storage import p, lock_stats
+from utils.http import http_client, transfer_stats
+from utils.cache import validator_stats
+from core.fetch_scheduler import fetch_scheduler
+from core.source_health import source_health
+from core.nodered_outbox import nodered_outbox
+from src.services.cveService import nvd_cache_stats
 
 log = logging.getLogger("MaftyWeb")
 
@@ -29,7 +36,32 @@ async def api_stats(request):
         "scans": stats.scans_completed,
         "news_posted": stats.news_posted,
         "cache_hits": stats.cache_hits_total,
-        "last_scan": stats.last_scan_time.isoformat() if stats.last_scan_time else "Never"
+        "cache_hits_304": stats.not_modified_total,
+        "cache_hits_body_hash": stats.body_hash_hits_total,
+        "http_cache": validator_stats.snapshot(),
+        "last_scan": stats.last_scan_time.isoformat() if stats.last_scan_time else "Never",
+        "delivery": {
+            "queue_depth": delivery.total_depth(),
+            "per_channel": {str(cid): depth for cid, depth in delivery.depth().items()},
+            "delivered": stats.messages_delivered,
+            "retries": stats.delivery_retries,
+            "failures": stats.delivery_failures,
+            "dropped": stats.delivery_dropped,
+        },
+        "render": {
+            "last_scan_reused": stats.last_scan_embeds_reused,
+            "built_total": stats.embeds_built_total,
+            "reused_total": stats.embeds_reused_total,
+        },
+        "parse_ms": stats.feed_parse_ms,
+        "file_locks": lock_stats.snapshot(),
+        "http": http_client.stats(),
+        "transfer": transfer_stats.snapshot(),
+        "fetch": {**fetch_scheduler.stats(), "last_fetch_seconds": stats.last_fetch_seconds},
+        "source_health": source_health.summary(),
+        "pipeline": stats.last_pipeline,
+        "nodered": nodered_outbox.stats(),
+        "nvd": nvd_cache_stats(),
     })
 
 # =========================================================